@@ -0,0 +1,143 @@
+"""
+Compare the big-M and tight formulations on dense synthetic networks where a
+share of the routes has a minimum transport quantity: CBC branch-and-bound
+nodes and solve time.
+
+    big_m           EnginePyomo, a binary on every route bounded by BIG_M
+    tight           EnginePyomo, binaries only on routes with a minimum
+                    quantity, bounded by ModelData.route_quantity_bound
+    semicontinuous  EngineFile (MPS), semi-continuous quantities instead of
+                    binaries
+
+Usage: python benchmark/bench_formulation.py [--sizes 5x50 10x100 ...]
+                                            [--share 0.3] [--time-limit 60]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from bench_model_build import dense_network
+
+from transport.context import ModelData
+from transport.engine.engines import EngineFile, EnginePyomo
+from transport.engine.model_file import read_cbc_solution, route_costs
+
+
+def network_with_min_quantities(
+    n_workshops: int, n_clients: int, share: float, seed: int = 0
+) -> ModelData:
+    """
+    dense_network where no route can serve its client alone (capacity 20-60%
+    of the demand) and `share` of the routes, when used, must carry at least
+    half of their capacity.
+    """
+    model_data = dense_network(n_workshops, n_clients, seed)
+    rng = random.Random(seed)
+    for route in model_data.routes:
+        demand = model_data.clients_by_id[route.destination].demand
+        route.transport_capacity = rng.uniform(0.2, 0.6) * demand
+        if rng.random() < share:
+            route.min_transport_quantity = (
+                rng.uniform(0.5, 1.0) * route.transport_capacity
+            )
+    return model_data
+
+
+def solve_pyomo(
+    model_data: ModelData, formulation: str, time_limit: float
+) -> tuple[str, float, int, float]:
+    engine = EnginePyomo(model_data)
+    engine.formulation = formulation
+    engine.solver_options = {"sec": time_limit}
+    engine._build_model()
+
+    start = time.perf_counter()
+    results = engine._solve_model("cbc")
+    elapsed = time.perf_counter() - start
+
+    status = str(results.solver.termination_condition)
+    nodes = results.solver.statistics.branch_and_bound.number_of_created_subproblems
+    objective = (
+        engine.model.objective()
+        if status in ("optimal", "maxTimeLimit")
+        else float("nan")
+    )
+    return status, objective, int(nodes or 0), elapsed
+
+
+def solve_semicontinuous(
+    model_data: ModelData, time_limit: float
+) -> tuple[str, float, int, float]:
+    engine = EngineFile(model_data)
+    engine.formulation = "semicontinuous"
+    engine.solver_options = {"sec": time_limit}
+    with tempfile.TemporaryDirectory(prefix="transport_") as workdir:
+        model_file = Path(workdir) / "model.mps"
+        solution_file = Path(workdir) / "model.sol"
+        engine._write_model(model_file, "mps")
+
+        start = time.perf_counter()
+        completed = subprocess.run(
+            engine._command(model_file, solution_file), capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - start
+
+        status, quantities = read_cbc_solution(solution_file, len(model_data.routes))
+
+    match = re.search(r"Enumerated nodes:\s+(\d+)", completed.stdout)
+    objective = sum(c * q for c, q in zip(route_costs(model_data), quantities))
+    return status, objective, int(match.group(1)) if match else -1, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["5x50", "10x100", "20x200"],
+        help="network sizes as <workshops>x<clients>",
+    )
+    parser.add_argument(
+        "--share",
+        type=float,
+        default=0.3,
+        help="share of the routes with a minimum transport quantity",
+    )
+    parser.add_argument(
+        "--time-limit", type=float, default=60.0, help="CBC time limit [s]"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'workshops':>10} {'clients':>8} {'routes':>8} {'formulation':>15} "
+        f"{'status':>12} {'objective':>12} {'nodes':>8} {'solve [s]':>10}"
+    )
+    for size in args.sizes:
+        n_workshops, n_clients = (int(n) for n in size.split("x"))
+        model_data = network_with_min_quantities(
+            n_workshops, n_clients, args.share, args.seed
+        )
+        runs = {
+            "big_m": lambda: solve_pyomo(model_data, "big_m", args.time_limit),
+            "tight": lambda: solve_pyomo(model_data, "tight", args.time_limit),
+            "semicontinuous": lambda: solve_semicontinuous(model_data, args.time_limit),
+        }
+        for formulation, run in runs.items():
+            status, objective, nodes, elapsed = run()
+            print(
+                f"{n_workshops:>10} {n_clients:>8} {len(model_data.routes):>8} "
+                f"{formulation:>15} {status:>12} {objective:>12.3f} {nodes:>8} "
+                f"{elapsed:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
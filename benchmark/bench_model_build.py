@@ -0,0 +1,96 @@
+"""
+Time EnginePyomo._build_model on dense synthetic networks.
+
+Usage: python benchmark/bench_model_build.py [--sizes 10x100 20x200 ...]
+                                            [--build-mode rules matrix]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from transport.context import ModelData  # noqa: E402
+from transport.engine.engines import EnginePyomo, EnginePyomoMatrix  # noqa: E402
+from transport.factory.model_data_factory import ModelDataFactory  # noqa: E402
+from transport.factory.types import DataDict  # noqa: E402
+
+
+def dense_network(n_workshops: int, n_clients: int, seed: int = 0) -> ModelData:
+    rng = random.Random(seed)
+    data: DataDict = {
+        "workshops": [
+            {
+                "id": f"W{i}",
+                "production_capacity": rng.uniform(50.0, 150.0),
+                "production_cost": rng.uniform(10.0, 30.0),
+            }
+            for i in range(n_workshops)
+        ],
+        "clients": [
+            {"id": f"C{j}", "demand": rng.uniform(1.0, 10.0)} for j in range(n_clients)
+        ],
+        "routes": [
+            {
+                "origin": f"W{i}",
+                "destination": f"C{j}",
+                "transport_cost": rng.uniform(1.0, 20.0),
+                "transport_capacity": rng.uniform(5.0, 50.0),
+                "min_transport_quantity": 0.0,
+                "is_active": True,
+            }
+            for i in range(n_workshops)
+            for j in range(n_clients)
+        ],
+    }
+    return ModelDataFactory()._create_model_data(data)
+
+
+BUILDERS = {"rules": EnginePyomo, "matrix": EnginePyomoMatrix}
+
+
+def time_build(model_data: ModelData, build_mode: str) -> float:
+    engine = BUILDERS[build_mode](model_data)
+    start = time.perf_counter()
+    engine._build_model()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=["5x50", "10x100", "20x200", "50x500"],
+        help="network sizes as <workshops>x<clients>",
+    )
+    parser.add_argument(
+        "--build-mode",
+        nargs="+",
+        choices=sorted(BUILDERS),
+        default=["rules"],
+        help="EnginePyomo model builders to time",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'workshops':>10} {'clients':>8} {'routes':>8} {'mode':>7} {'build [s]':>10}"
+    )
+    for size in args.sizes:
+        n_workshops, n_clients = (int(n) for n in size.split("x"))
+        model_data = dense_network(n_workshops, n_clients)
+        for build_mode in args.build_mode:
+            elapsed = time_build(model_data, build_mode)
+            print(
+                f"{n_workshops:>10} {n_clients:>8} {len(model_data.routes):>8} "
+                f"{build_mode:>7} {elapsed:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
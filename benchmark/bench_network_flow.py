@@ -0,0 +1,76 @@
+"""
+Compare the network_flow engine with the CBC engines on networks without
+minimum transport quantities, where it applies: solve time per network size
+and tightness.
+
+    network   Engine(..., "network_flow"): the network simplex
+    lp        EngineNetworkFlow(..., max_routes=0): CBC on the LP file of the
+              tight formulation, the opt-in handoff of large networks
+    cbc       Engine(..., "cbc"): the Pyomo MIP
+    cbc_lp    Engine(..., "cbc_lp"): the MIP written to an LP file
+
+Usage: python benchmark/bench_network_flow.py [--routes 500 1000 ...]
+                                              [--tightness 0.5 0.8 0.95]
+                                              [--seed 0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+
+from bench_suite import ladder_shape
+
+from transport.engine import Engine
+from transport.engine.engines import EngineNetworkFlow
+from transport.factory import generate_network
+
+RUNS = {
+    "network": lambda data: Engine(data, "network_flow").run(),
+    "lp": lambda data: EngineNetworkFlow(data, max_routes=0).run("network_flow"),
+    "cbc": lambda data: Engine(data, "cbc").run(),
+    "cbc_lp": lambda data: Engine(data, "cbc_lp").run(),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--routes", nargs="+", type=int, default=[500, 1000, 5000, 20000]
+    )
+    parser.add_argument("--tightness", nargs="+", type=float, default=[0.5, 0.8, 0.95])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'routes':>8} {'tightness':>9} "
+        + " ".join(f"{name + ' [s]':>12}" for name in RUNS)
+    )
+    for n_routes in args.routes:
+        n_workshops, n_clients = ladder_shape(n_routes, 10)
+        for tightness in args.tightness:
+            network = generate_network(
+                n_workshops,
+                n_clients,
+                n_routes=n_routes,
+                tightness=tightness,
+                seed=args.seed,
+            )
+            times, objectives = [], []
+            for run in RUNS.values():
+                start = time.perf_counter()
+                result = run(network)
+                times.append(time.perf_counter() - start)
+                objectives.append(result.objective)
+            assert all(
+                math.isclose(o, objectives[0], rel_tol=1e-6) for o in objectives
+            ), objectives
+            print(
+                f"{n_routes:>8} {tightness:>9.2f} "
+                + " ".join(f"{t:>12.3f}" for t in times)
+            )
+
+
+if __name__ == "__main__":
+    main()
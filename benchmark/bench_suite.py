@@ -0,0 +1,397 @@
+"""
+Time every stage of a solve, per engine, across a ladder of network sizes,
+and write the timings to JSON; compare two such files for regressions.
+
+Per size, on a network from transport.factory.generate_network:
+
+    load      ModelDataFactory.columnar_from_json (parse and validation)
+    validate  the validation alone, on the loaded data
+    <engine>  Engine.run, with the phases of SolveResult.stats (build,
+              write, solve, extract) and the model size
+
+With --memory, a second pass runs the load and every engine again within a
+transport.memory_profile.MemoryProfile, and the report gets the bytes per
+workshop / client / route of every stage. Stages above their memory budget
+(peak bytes per route, --memory-budget over MEMORY_BUDGETS) on networks of
+BUDGET_MIN_ROUTES routes or more fail the run, with exit status 1. The pass
+is separate as tracing slows everything down.
+
+--model-data loads ModelData (pydantic objects) instead of
+ColumnarModelData, and the engines solve it.
+
+An engine is skipped above its --max-routes (by default the Pyomo build is
+not run past 1e4 routes, nor CBC on LP files and the network flow past 1e5).
+
+Usage: python benchmark/bench_suite.py [--routes 100 1000 ...]
+                                      [--engines cbc cbc_lp ...]
+                                      [--min-quantity-share 0.0]
+                                      [--tightness 0.8]
+                                      [--structure random] [--seed 0]
+                                      [--time-limit 60] [--output FILE]
+                                      [--memory] [--memory-budget build=2500]
+                                      [--model-data]
+       python benchmark/bench_suite.py --compare BASELINE.json CURRENT.json
+                                      [--tolerance 0.2] [--min-time 0.05]
+                                      [--min-bytes 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import math
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from transport.context import ColumnarModelData, ModelData  # noqa: E402
+from transport.engine import Engine, SolverOptions  # noqa: E402
+from transport.factory import ModelDataFactory, generate_network  # noqa: E402
+from transport.factory.model_data_converter import Converter  # noqa: E402
+from transport.memory_profile import MemoryProfile  # noqa: E402
+
+LADDER = [10**2, 10**3, 10**4, 10**5, 10**6]
+ENGINES = ["cbc", "cbc_lp", "network_flow", "heuristic"]
+# engine -> largest network it is run on by default
+MAX_ROUTES = {
+    "cbc": 10**4,
+    "gurobi": 10**4,
+    "cbc_lp": 10**5,
+    "cbc_mps": 10**5,
+    "network_flow": 10**5,
+}
+# stage -> highest peak bytes per route (read and model_data are the
+# --model-data loading, load the columnar one)
+MEMORY_BUDGETS = {
+    "read": 1200,
+    "model_data": 2000,
+    "load": 600,
+    "presolve": 1000,
+    "build": 2500,
+    "write": 2500,
+    "solve": 2500,  # EnginePyomo writes its problem file within solve
+    "extract": 250,
+}
+# per-route memory of smaller networks is mostly fixed overhead
+BUDGET_MIN_ROUTES = 10**4
+
+
+def ladder_shape(n_routes: int, routes_per_client: int) -> tuple[int, int]:
+    """
+    (workshops, clients) of a network with n_routes routes: every client has
+    routes_per_client of them on average, from about sqrt(clients) workshops
+    """
+    n_clients = max(1, n_routes // routes_per_client)
+    n_workshops = max(2 * routes_per_client, math.isqrt(n_clients))
+    return n_workshops, n_clients
+
+
+def timed(function, *args, **kwargs) -> tuple[Any, float]:
+    start = time.perf_counter()
+    value = function(*args, **kwargs)
+    return value, time.perf_counter() - start
+
+
+def load(file: Path, model_data: bool) -> ModelData | ColumnarModelData:
+    if model_data:
+        return ModelDataFactory.from_json(file)
+    return ModelDataFactory.columnar_from_json(file)
+
+
+def memory_use(profile: MemoryProfile, run: dict[str, Any]) -> dict[str, Any]:
+    """
+    stage -> bytes of the stage and per workshop / client / route
+    """
+    per_entity = profile.per_entity(
+        run["n_workshops"], run["n_clients"], run["n_routes"]
+    )
+    return {
+        stage: {**memory, **per_entity[stage]}
+        for stage, memory in profile.as_dict().items()
+    }
+
+
+def bench_size(
+    n_routes: int,
+    engines: list[str],
+    max_routes: dict[str, int],
+    args: argparse.Namespace,
+) -> dict[str, Any]:
+    n_workshops, n_clients = ladder_shape(n_routes, args.routes_per_client)
+    network, generate = timed(
+        generate_network,
+        n_workshops,
+        n_clients,
+        n_routes=n_routes,
+        min_quantity_share=args.min_quantity_share,
+        tightness=args.tightness,
+        structure=args.structure,
+        seed=args.seed,
+    )
+    run: dict[str, Any] = {
+        "n_routes": n_routes,
+        "n_workshops": n_workshops,
+        "n_clients": n_clients,
+        "stages": {"generate": generate},
+        "engines": {},
+    }
+
+    with tempfile.TemporaryDirectory(prefix="transport_bench_") as workdir:
+        file = Path(workdir) / "network.json"
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump(Converter.from_columnar(network), f)
+        run["file_bytes"] = file.stat().st_size
+        loaded, run["stages"]["load"] = timed(load, file, args.model_data)
+        if isinstance(loaded, ColumnarModelData):
+            _, run["stages"]["validate"] = timed(loaded.validate)
+
+        options = SolverOptions(time_limit=args.time_limit)
+        for engine_type in engines:
+            if n_routes > max_routes.get(engine_type, math.inf):
+                run["engines"][engine_type] = {"skipped": "max_routes"}
+                continue
+            try:
+                engine = Engine(loaded, engine_type, solver_options=options)
+                result, wall = timed(engine.run)
+            except Exception as error:  # a failing engine should not end the run
+                run["engines"][engine_type] = {"error": repr(error)}
+                continue
+            run["engines"][engine_type] = {
+                "status": result.status,
+                "objective": result.objective,
+                "wall": wall,
+                **(result.stats.as_dict() if result.stats is not None else {}),
+            }
+
+        if args.memory:
+            del loaded
+            with MemoryProfile() as profile:
+                loaded = load(file, args.model_data)
+            run["memory"] = {"load": memory_use(profile, run)}
+            for engine_type, stats in run["engines"].items():
+                if "status" not in stats:
+                    continue
+                with MemoryProfile() as profile:
+                    Engine(loaded, engine_type, solver_options=options).run()
+                run["memory"][engine_type] = memory_use(profile, run)
+    return run
+
+
+def over_budget(run: dict[str, Any], budgets: dict[str, float]) -> list[str]:
+    """
+    Stages of a run whose peak bytes per route exceed their budget
+    """
+    if run["n_routes"] < BUDGET_MIN_ROUTES:
+        return []
+    return [
+        f"{run['n_routes']:>8} {scope}.{stage:<22} "
+        f"{memory['peak_per_route']:>10.0f} {budgets[stage]:>10.0f}"
+        for scope, stages in run.get("memory", {}).items()
+        for stage, memory in stages.items()
+        if stage in budgets and memory["peak_per_route"] > budgets[stage]
+    ]
+
+
+def environment() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def timings(report: dict[str, Any]) -> dict[tuple[int, str], float]:
+    """
+    (n_routes, "stage" or "engine.phase_wall") -> seconds, of a report
+    """
+    values = {}
+    for run in report["runs"]:
+        for stage, seconds in run["stages"].items():
+            values[run["n_routes"], stage] = seconds
+        for engine_type, stats in run["engines"].items():
+            for name, value in stats.items():
+                if name == "wall" or name.endswith("_wall"):
+                    values[run["n_routes"], f"{engine_type}.{name}"] = value
+    return values
+
+
+def peaks_per_route(report: dict[str, Any]) -> dict[tuple[int, str], float]:
+    """
+    (n_routes, "scope.stage.peak_per_route") -> bytes, of a --memory report
+    """
+    return {
+        (run["n_routes"], f"{scope}.{stage}.peak_per_route"): memory["peak_per_route"]
+        for run in report["runs"]
+        for scope, stages in run.get("memory", {}).items()
+        for stage, memory in stages.items()
+    }
+
+
+def compare(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    tolerance: float,
+    min_time: float,
+    min_bytes: float = 10.0,
+) -> list[str]:
+    """
+    Timings and peak bytes per route of current more than tolerance (0.2 is
+    20%) above those of baseline; the ones under min_time seconds or
+    min_bytes per route in both are noise
+    """
+    regressions = []
+    for values, floor in (
+        (timings, min_time),
+        (peaks_per_route, min_bytes),
+    ):
+        regressions += _regressions(values(baseline), values(current), tolerance, floor)
+    return regressions
+
+
+def _regressions(
+    before: dict[tuple[int, str], float],
+    after: dict[tuple[int, str], float],
+    tolerance: float,
+    floor: float,
+) -> list[str]:
+    regressions = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        if max(old, new) < floor or new <= old * (1 + tolerance):
+            continue
+        n_routes, name = key
+        regressions.append(
+            f"{n_routes:>8} {name:<28} {old:>10.3f} {new:>10.3f} "
+            f"{new / old if old > 0 else math.inf:>7.2f}x"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--routes", nargs="+", type=int, default=LADDER, help="network sizes"
+    )
+    parser.add_argument("--engines", nargs="+", default=ENGINES)
+    parser.add_argument(
+        "--max-routes",
+        nargs="+",
+        default=[],
+        metavar="ENGINE=N",
+        help="largest network to run an engine on, over the defaults",
+    )
+    parser.add_argument("--routes-per-client", type=int, default=10)
+    parser.add_argument("--min-quantity-share", type=float, default=0.0)
+    parser.add_argument("--tightness", type=float, default=0.8)
+    parser.add_argument("--structure", choices=["random", "regional"], default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--time-limit", type=float, default=60.0, help="solver time limit [s]"
+    )
+    parser.add_argument("--output", type=Path, help="JSON report to write")
+    parser.add_argument(
+        "--model-data",
+        action="store_true",
+        help="load ModelData instead of ColumnarModelData",
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="profile the memory of every stage"
+    )
+    parser.add_argument(
+        "--memory-budget",
+        nargs="+",
+        default=[],
+        metavar="STAGE=BYTES",
+        help="peak bytes per route of a stage, over MEMORY_BUDGETS",
+    )
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        type=Path,
+        metavar=("BASELINE", "CURRENT"),
+        help="compare two reports instead of running; exit 1 on a regression",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("--min-bytes", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, current = (json.loads(path.read_text()) for path in args.compare)
+        regressions = compare(
+            baseline, current, args.tolerance, args.min_time, args.min_bytes
+        )
+        if regressions:
+            print(f"{'routes':>8} {'value':<28} {'before':>10} {'after':>10}")
+            print("\n".join(regressions))
+        sys.exit(1 if regressions else 0)
+
+    max_routes = dict(MAX_ROUTES)
+    for limit in args.max_routes:
+        engine_type, n = limit.split("=")
+        max_routes[engine_type] = int(float(n))
+    budgets = dict(MEMORY_BUDGETS)
+    for budget in args.memory_budget:
+        stage, n = budget.split("=")
+        budgets[stage] = float(n)
+
+    report: dict[str, Any] = {
+        "environment": environment(),
+        "arguments": {
+            name: value
+            for name, value in vars(args).items()
+            if name not in ("output", "compare", "tolerance", "min_time", "min_bytes")
+        },
+        "runs": [],
+    }
+    print(
+        f"{'routes':>8} {'load [s]':>9} {'valid. [s]':>10} {'engine':>13} "
+        f"{'status':>12} {'build [s]':>10} {'solve [s]':>10} {'total [s]':>10}"
+    )
+    failures = []
+    for n_routes in args.routes:
+        run = bench_size(n_routes, args.engines, max_routes, args)
+        report["runs"].append(run)
+        failures += over_budget(run, budgets)
+        for engine_type, stats in run["engines"].items():
+            status = stats.get("status", "skipped" if "skipped" in stats else "error")
+            print(
+                f"{n_routes:>8} {run['stages']['load']:>9.3f} "
+                f"{run['stages'].get('validate', math.nan):>10.3f} {engine_type:>13} "
+                f"{status:>12} {stats.get('build_wall', math.nan):>10.3f} "
+                f"{stats.get('solve_wall', math.nan):>10.3f} "
+                f"{stats.get('wall', math.nan):>10.3f}"
+            )
+        if args.output is not None:  # keep what is done if a size fails
+            args.output.write_text(json.dumps(report, indent=2, default=str))
+
+    if failures:
+        print(
+            f"\nover budget:\n{'routes':>8} {'stage':<28} {'peak/route':>10} {'budget':>10}"
+        )
+        print("\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,15 @@
+from transport.context.columnar_model_data import ColumnarModelData, as_columnar
 from transport.context.model_data import ModelData
 from transport.context.objects import Client, Workshop, Route
+from transport.context.objects.validation_utils import ModelDataValidationError
 
 
 __all__ = [
     "Client",
+    "ColumnarModelData",
     "ModelData",
+    "ModelDataValidationError",
     "Route",
     "Workshop",
+    "as_columnar",
 ]
\ No newline at end of file
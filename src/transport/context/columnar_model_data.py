@@ -0,0 +1,592 @@
+from __future__ import annotations
+
+import gc
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from functools import cached_property
+from typing import Any, TypeVar
+
+import numpy as np
+from pydantic import BaseModel
+
+from transport.context.model_data import ModelData
+from transport.context.objects import Client, Route, Workshop
+from transport.context.objects.validation_utils import (
+    ModelDataValidationError,
+    assert_min_active_routes_array,
+    assert_min_count,
+    assert_route_endpoints_exist_array,
+    assert_unique_route_pairs_array,
+    check_ids_not_empty_array,
+    check_unique_ids_array,
+    check_values_in_range,
+    intern_ids,
+    values_out_of_range,
+)
+
+BaseModelT = TypeVar("BaseModelT", bound=BaseModel)
+
+
+class ColumnarModelData:
+    """
+    Array-backed counterpart of ModelData for very large networks.
+
+    Workshops and clients are interned: a route stores the positions of its
+    endpoints in workshop_ids / client_ids (route_origin, route_destination)
+    instead of their ids, and every numeric attribute is one NumPy column.
+    The checks of ModelData and of the Workshop / Client / Route validators
+    run once, vectorized, when the object is built.
+
+    The object API of ModelData (workshops, clients, routes, the *_by_id and
+    routes_by_* indexes, route_quantity_bound, update_values, ...) is kept as
+    views built on first access, so every engine accepts a ColumnarModelData;
+    the array-based ones (matrix build, file writers, network flow) read the
+    columns directly. The views are snapshots: change values through
+    update_values, not through the view objects.
+
+    Attributes
+    ----------
+    workshop_ids, client_ids : np.ndarray[str]
+    production_capacity, production_cost : np.ndarray[float], per workshop
+    demand : np.ndarray[float], per client
+    route_origin, route_destination : np.ndarray[int32], per route
+    transport_cost, transport_capacity, min_transport_quantity :
+        np.ndarray[float], per route
+    is_active : np.ndarray[bool], per route
+    """
+
+    def __init__(
+        self,
+        workshop_ids: Sequence[str] | np.ndarray,
+        production_capacity: Sequence[float] | np.ndarray,
+        production_cost: Sequence[float] | np.ndarray,
+        client_ids: Sequence[str] | np.ndarray,
+        demand: Sequence[float] | np.ndarray,
+        route_origin: Sequence[int] | np.ndarray,
+        route_destination: Sequence[int] | np.ndarray,
+        transport_cost: Sequence[float] | np.ndarray,
+        transport_capacity: Sequence[float] | np.ndarray,
+        min_transport_quantity: Sequence[float] | np.ndarray,
+        is_active: Sequence[bool] | np.ndarray | None = None,
+        validate: bool = True,
+    ) -> None:
+        self.workshop_ids = np.asarray(workshop_ids, dtype=str)
+        self.production_capacity = _column(production_capacity)
+        self.production_cost = _column(production_cost)
+
+        self.client_ids = np.asarray(client_ids, dtype=str)
+        self.demand = _column(demand)
+
+        self.route_origin = np.asarray(route_origin, dtype=np.int32)
+        self.route_destination = np.asarray(route_destination, dtype=np.int32)
+        self.transport_cost = _column(transport_cost)
+        self.transport_capacity = _column(transport_capacity)
+        self.min_transport_quantity = _column(min_transport_quantity)
+        self.is_active = (
+            np.ones(len(self.route_origin), dtype=bool)
+            if is_active is None
+            else np.asarray(is_active, dtype=bool)
+        )
+
+        # route id -> quantity, filled by the engines like ModelData's
+        self.transport_quantity: dict[Any, float] = {}
+
+        # validate=False is for columns checked already (e.g. a snapshot)
+        if validate:
+            self.validate()
+
+    @classmethod
+    def from_columns(
+        cls,
+        workshop_ids: Sequence[str] | np.ndarray,
+        production_capacity: Sequence[float] | np.ndarray,
+        production_cost: Sequence[float] | np.ndarray,
+        client_ids: Sequence[str] | np.ndarray,
+        demand: Sequence[float] | np.ndarray,
+        origin: Sequence[str] | np.ndarray,
+        destination: Sequence[str] | np.ndarray,
+        transport_cost: Sequence[float] | np.ndarray,
+        transport_capacity: Sequence[float] | np.ndarray,
+        min_transport_quantity: Sequence[float] | np.ndarray,
+        is_active: Sequence[bool] | np.ndarray | None = None,
+    ) -> "ColumnarModelData":
+        """
+        Build from routes given by workshop / client ids (as in a table with
+        one row per route), interning them.
+        """
+        workshop_ids = np.asarray(workshop_ids, dtype=str)
+        client_ids = np.asarray(client_ids, dtype=str)
+        origin = np.asarray(origin, dtype=str)
+        destination = np.asarray(destination, dtype=str)
+
+        columnar = cls(
+            workshop_ids=workshop_ids,
+            production_capacity=production_capacity,
+            production_cost=production_cost,
+            client_ids=client_ids,
+            demand=demand,
+            # unknown endpoints intern to -1, validate names them by id
+            route_origin=intern_ids(origin, workshop_ids),
+            route_destination=intern_ids(destination, client_ids),
+            transport_cost=transport_cost,
+            transport_capacity=transport_capacity,
+            min_transport_quantity=min_transport_quantity,
+            is_active=is_active,
+            validate=False,
+        )
+        columnar.validate(origin, destination)
+        return columnar
+
+    @classmethod
+    def from_model_data(cls, model_data: ModelData) -> "ColumnarModelData":
+        """
+        Columnar copy of a ModelData
+        """
+        workshops = model_data.workshops
+        clients = model_data.clients
+        routes = model_data.routes
+        workshop_pos = {w.id_: i for i, w in enumerate(workshops)}
+        client_pos = {c.id_: k for k, c in enumerate(clients)}
+        n = len(routes)
+        return cls(
+            workshop_ids=[w.id_ for w in workshops],
+            production_capacity=[w.production_capacity for w in workshops],
+            production_cost=[w.production_cost for w in workshops],
+            client_ids=[c.id_ for c in clients],
+            demand=[c.demand for c in clients],
+            route_origin=np.fromiter(
+                (workshop_pos[r.origin] for r in routes), dtype=np.int32, count=n
+            ),
+            route_destination=np.fromiter(
+                (client_pos[r.destination] for r in routes), dtype=np.int32, count=n
+            ),
+            transport_cost=np.fromiter(
+                (r.transport_cost for r in routes), dtype=float, count=n
+            ),
+            transport_capacity=np.fromiter(
+                (r.transport_capacity for r in routes), dtype=float, count=n
+            ),
+            min_transport_quantity=np.fromiter(
+                (r.min_transport_quantity for r in routes), dtype=float, count=n
+            ),
+            is_active=np.fromiter((r.is_active for r in routes), dtype=bool, count=n),
+        )
+
+    def to_model_data(self) -> ModelData:
+        """
+        ModelData with the same workshops, clients and routes
+        """
+        return ModelData(
+            workshops=[w.model_copy() for w in self.workshops],
+            clients=[c.model_copy() for c in self.clients],
+            routes=[r.model_copy() for r in self.routes],
+        )
+
+    def validate(
+        self,
+        origin: np.ndarray | None = None,
+        destination: np.ndarray | None = None,
+    ) -> None:
+        """
+        Raise a ModelDataValidationError listing every violation, if any.
+        """
+        errors = self.violations(origin, destination)
+        if errors:
+            raise ModelDataValidationError(errors)
+
+    def violations(
+        self,
+        origin: np.ndarray | None = None,
+        destination: np.ndarray | None = None,
+    ) -> list[str]:
+        """
+        Vectorized equivalent of the ModelData and object validators: the
+        messages of all the checks that fail (not only the first one).
+
+        origin / destination are the ids the routes were given with, when
+        built from_columns; they name the endpoints that could not be
+        interned.
+        """
+        n_workshops = len(self.workshop_ids)
+        n_clients = len(self.client_ids)
+        n_routes = len(self.route_origin)
+        errors = _length_errors(
+            "workshop", n_workshops, self.production_capacity, self.production_cost
+        )
+        errors += _length_errors("client", n_clients, self.demand)
+        errors += _length_errors(
+            "route",
+            n_routes,
+            self.route_destination,
+            self.transport_cost,
+            self.transport_capacity,
+            self.min_transport_quantity,
+            self.is_active,
+        )
+        if errors:
+            return errors  # the columns cannot be lined up
+
+        # objects
+        errors += _errors(check_ids_not_empty_array, self.workshop_ids, "Workshop.id_")
+        errors += _errors(check_ids_not_empty_array, self.client_ids, "Client.id_")
+        workshop = self._id_of("Workshop", self.workshop_ids)
+        errors += values_out_of_range(self.production_capacity, 0.0, None, workshop)
+        errors += values_out_of_range(self.production_cost, 0.0, None, workshop)
+        errors += values_out_of_range(
+            self.demand, 0.0, None, self._id_of("Client", self.client_ids)
+        )
+        if origin is not None and destination is not None:
+            errors += _errors(check_ids_not_empty_array, origin, "Route.origin")
+            errors += _errors(
+                check_ids_not_empty_array, destination, "Route.destination"
+            )
+
+        route = self._route_label
+        errors += values_out_of_range(self.transport_cost, 0.0, None, route)
+        errors += values_out_of_range(self.transport_capacity, 0.0, None, route)
+        errors += values_out_of_range(
+            self.min_transport_quantity, 0.0, self.transport_capacity, route
+        )
+
+        # ids and references
+        errors += _errors(check_unique_ids_array, self.workshop_ids, "workshops")
+        errors += _errors(check_unique_ids_array, self.client_ids, "clients")
+        errors += _errors(assert_min_count, range(n_workshops), "workshop")
+        errors += _errors(assert_min_count, range(n_clients), "client")
+        errors += _errors(assert_min_active_routes_array, self.is_active, 1)
+
+        known_origin = (self.route_origin >= 0) & (self.route_origin < n_workshops)
+        known_destination = (self.route_destination >= 0) & (
+            self.route_destination < n_clients
+        )
+        if origin is not None and destination is not None:
+            errors += _errors(
+                assert_route_endpoints_exist_array,
+                origin[~known_origin],
+                destination[~known_destination],
+                self.workshop_ids,
+                self.client_ids,
+            )
+        elif not (known_origin.all() and known_destination.all()):
+            bad = ~(known_origin & known_destination)
+            errors.append(
+                "Referential integrity error: routes "
+                f"{np.flatnonzero(bad)[:10].tolist()} point outside "
+                "workshop_ids / client_ids"
+            )
+
+        # route pairs, among the routes whose endpoints exist
+        known = known_origin & known_destination
+        route_origin = self.route_origin[known]
+        route_destination = self.route_destination[known]
+        same = self.workshop_ids[route_origin] == self.client_ids[route_destination]
+        errors += [
+            f"Route origin and destination must be different, got: {id_}"
+            for id_ in self.workshop_ids[route_origin[same]].tolist()
+        ]
+        errors += _errors(
+            assert_unique_route_pairs_array,
+            route_origin,
+            route_destination,
+            self.workshop_ids,
+            self.client_ids,
+        )
+        return errors
+
+    # --- ids ------------------------------------------------------------
+
+    @cached_property
+    def route_ids(self) -> list[str]:
+        """
+        Route.id_ ("origin,destination") of every route, built once
+        """
+        origin = np.char.add(self.workshop_ids, ",")[self.route_origin]
+        return np.char.add(origin, self.client_ids[self.route_destination]).tolist()
+
+    @cached_property
+    def route_index(self) -> dict[str, int]:
+        """
+        route id -> position
+        """
+        return {r: j for j, r in enumerate(self.route_ids)}
+
+    @cached_property
+    def workshop_index(self) -> dict[str, int]:
+        return {w: i for i, w in enumerate(self.workshop_ids.tolist())}
+
+    @cached_property
+    def client_index(self) -> dict[str, int]:
+        return {c: k for k, c in enumerate(self.client_ids.tolist())}
+
+    @property
+    def route_cost(self) -> np.ndarray:
+        """
+        Objective coefficient of every route: transport cost plus the
+        production cost of its workshop
+        """
+        return self.transport_cost + self.production_cost[self.route_origin]
+
+    def route_quantity_bounds(self) -> np.ndarray:
+        """
+        ModelData.route_quantity_bound of every route
+        """
+        return np.minimum(
+            np.minimum(
+                self.transport_capacity, self.production_capacity[self.route_origin]
+            ),
+            np.maximum(
+                self.demand[self.route_destination], self.min_transport_quantity
+            ),
+        )
+
+    def csr_by_origin(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (indptr, indices) of the workshop x route incidence matrix: the routes
+        of workshop i are indices[indptr[i]:indptr[i + 1]], in their order
+        """
+        return _csr_pattern(self.route_origin, len(self.workshop_ids))
+
+    def csr_by_destination(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        csr_by_origin for the client x route incidence matrix
+        """
+        return _csr_pattern(self.route_destination, len(self.client_ids))
+
+    # --- object views (ModelData API) -----------------------------------
+
+    @cached_property
+    def workshops(self) -> list[Workshop]:
+        keys = ("id_", "production_capacity", "production_cost")
+        return _construct(
+            Workshop,
+            keys,
+            self.workshop_ids.tolist(),
+            self.production_capacity.tolist(),
+            self.production_cost.tolist(),
+        )
+
+    @cached_property
+    def clients(self) -> list[Client]:
+        keys = ("id_", "demand")
+        return _construct(Client, keys, self.client_ids.tolist(), self.demand.tolist())
+
+    @cached_property
+    def routes(self) -> list[Route]:
+        keys = (
+            "origin",
+            "destination",
+            "transport_cost",
+            "transport_capacity",
+            "min_transport_quantity",
+            "is_active",
+        )
+        workshops = self.workshop_ids.tolist()
+        clients = self.client_ids.tolist()
+        return _construct(
+            Route,
+            keys,
+            [workshops[o] for o in self.route_origin.tolist()],
+            [clients[d] for d in self.route_destination.tolist()],
+            self.transport_cost.tolist(),
+            self.transport_capacity.tolist(),
+            self.min_transport_quantity.tolist(),
+            self.is_active.tolist(),
+        )
+
+    @cached_property
+    def workshops_by_id(self) -> dict[str, Workshop]:
+        return {w.id_: w for w in self.workshops}
+
+    @cached_property
+    def clients_by_id(self) -> dict[str, Client]:
+        return {c.id_: c for c in self.clients}
+
+    @cached_property
+    def routes_by_id(self) -> dict[str, Route]:
+        return dict(zip(self.route_ids, self.routes))
+
+    @cached_property
+    def routes_by_origin(self) -> dict[str, list[Route]]:
+        """
+        workshop id -> routes leaving that workshop (every workshop is a key)
+        """
+        return self._group_routes(self.workshop_ids, self.route_origin)
+
+    @cached_property
+    def routes_by_destination(self) -> dict[str, list[Route]]:
+        """
+        client id -> routes arriving at that client (every client is a key)
+        """
+        return self._group_routes(self.client_ids, self.route_destination)
+
+    @property
+    def active_routes(self) -> list[Route]:
+        return [r for r, active in zip(self.routes, self.is_active.tolist()) if active]
+
+    def route_quantity_bound(self, route: Route) -> float:
+        """
+        See ModelData.route_quantity_bound
+        """
+        j = self.route_index[route.id_]
+        return min(
+            float(self.transport_capacity[j]),
+            float(self.production_capacity[self.route_origin[j]]),
+            max(
+                float(self.demand[self.route_destination[j]]),
+                float(self.min_transport_quantity[j]),
+            ),
+        )
+
+    def update_values(
+        self,
+        client_demand: Mapping[str, float] | None = None,
+        transport_cost: Mapping[str, float] | None = None,
+        production_capacity: Mapping[str, float] | None = None,
+    ) -> None:
+        """
+        See ModelData.update_values; the object views are rebuilt on next
+        access.
+        """
+        updates = [
+            (client_demand, self.client_index, self.demand, "client", "Client"),
+            (transport_cost, self.route_index, self.transport_cost, "route", "Route"),
+            (
+                production_capacity,
+                self.workshop_index,
+                self.production_capacity,
+                "workshop",
+                "Workshop",
+            ),
+        ]
+        resolved = []
+        for values, index, column, name, label in updates:
+            values = values or {}
+            ids = list(values)
+            unknown = [id_ for id_ in ids if id_ not in index]
+            if unknown:
+                raise ValueError(f"Unknown {name} id: {unknown[0]}")
+            positions = np.fromiter(
+                (index[i] for i in ids), dtype=np.int64, count=len(ids)
+            )
+            new = np.fromiter(values.values(), dtype=float, count=len(ids))
+            check_values_in_range(new, 0.0, None, lambda k: f"{label}[{ids[k]}]")
+            resolved.append((column, positions, new))
+
+        for column, positions, new in resolved:
+            column[positions] = new
+        self.refresh_index()
+
+    def refresh_index(self) -> None:
+        """
+        Drop the object views, e.g. after writing to the columns directly.
+        """
+        for name in _CACHED_VIEWS:
+            self.__dict__.pop(name, None)
+
+    def _route_label(self, j: int) -> str:
+        origin = _name(self.workshop_ids, self.route_origin[j])
+        destination = _name(self.client_ids, self.route_destination[j])
+        return f"Route[{origin},{destination}]"
+
+    @staticmethod
+    def _id_of(label: str, ids: np.ndarray):
+        return lambda k: f"{label}[{ids[k]}]"
+
+    def _group_routes(
+        self, ids: np.ndarray, route_node: np.ndarray
+    ) -> dict[str, list[Route]]:
+        routes = self.routes
+        index: dict[str, list[Route]] = {id_: [] for id_ in ids.tolist()}
+        keys = ids.tolist()
+        for j, node in enumerate(route_node.tolist()):
+            index[keys[node]].append(routes[j])
+        return index
+
+
+def as_columnar(model_data: ModelData | ColumnarModelData) -> ColumnarModelData:
+    """
+    model_data itself if it is a ColumnarModelData, else a columnar copy
+    """
+    if isinstance(model_data, ColumnarModelData):
+        return model_data
+    return ColumnarModelData.from_model_data(model_data)
+
+
+_CACHED_VIEWS = (
+    "workshops",
+    "clients",
+    "routes",
+    "workshops_by_id",
+    "clients_by_id",
+    "routes_by_id",
+    "routes_by_origin",
+    "routes_by_destination",
+)
+
+
+def _column(values: Sequence[float] | np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=float)
+
+
+def _length_errors(name: str, n: int, *columns: np.ndarray) -> list[str]:
+    if any(len(column) != n for column in columns):
+        return [
+            f"Every {name} column must have {n} values, "
+            f"got {[len(column) for column in columns]}"
+        ]
+    return []
+
+
+def _errors(check: Callable[..., None], *args: Any) -> list[str]:
+    """
+    The message of check(*args), if it raises
+    """
+    try:
+        check(*args)
+    except ValueError as error:
+        return [str(error)]
+    return []
+
+
+def _construct(
+    model: type[BaseModelT], keys: tuple[str, ...], *columns: list[Any]
+) -> list[BaseModelT]:
+    """
+    model instances from already validated columns, one per row, built with
+    model_construct (no validation)
+    """
+    construct = model.model_construct
+    # the instances hold no cycles; letting the cyclic GC rescan them while
+    # the list grows costs more than building them
+    with _paused_gc():
+        return [construct(**dict(zip(keys, values))) for values in zip(*columns)]
+
+
+@contextmanager
+def _paused_gc() -> Iterator[None]:
+    """
+    The cyclic GC off for the block, back on after it if it was on
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _csr_pattern(
+    row_of_route: np.ndarray, n_rows: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sparsity pattern of a 0/1 matrix with one non-zero per route (column).
+    """
+    indices = np.argsort(row_of_route, kind="stable")
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row_of_route, minlength=n_rows), out=indptr[1:])
+    return indptr, indices
+
+
+def _name(ids: np.ndarray, position: int) -> str:
+    return str(ids[position]) if 0 <= position < len(ids) else "?"
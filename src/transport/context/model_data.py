@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from collections.abc import Collection
+from collections.abc import Collection, Mapping
+from functools import cached_property
 from typing import List
 
 from pydantic import (
@@ -20,6 +21,7 @@ from transport.context.objects.validation_utils import (
     assert_route_endpoints_exist,
     assert_unique_route_pairs,
     check_unique_ids,
+    check_value_in_range,
 )
 
 
@@ -33,23 +35,100 @@ class ModelData(BaseModel):
     routes: List[Route] = Field(default_factory=list)
     transport_quantity: dict[Route, float] = Field(default_factory=dict)
 
-    # --- derived views (computed on access; no sync issues) ---
-    @property
+    # --- derived views (built on first access, reset on field assignment) ---
+    @cached_property
     def workshops_by_id(self) -> dict[str, Workshop]:
         return {w.id_: w for w in self.workshops}
 
-    @property
+    @cached_property
     def clients_by_id(self) -> dict[str, Client]:
         return {c.id_: c for c in self.clients}
 
-    @property
+    @cached_property
     def routes_by_id(self) -> dict[str, Route]:
         return {r.id_: r for r in self.routes}
 
+    @cached_property
+    def routes_by_origin(self) -> dict[str, list[Route]]:
+        """
+        workshop id -> routes leaving that workshop (every workshop is a key)
+        """
+        index: dict[str, list[Route]] = {w.id_: [] for w in self.workshops}
+        for r in self.routes:
+            index.setdefault(r.origin, []).append(r)
+        return index
+
+    @cached_property
+    def routes_by_destination(self) -> dict[str, list[Route]]:
+        """
+        client id -> routes arriving at that client (every client is a key)
+        """
+        index: dict[str, list[Route]] = {c.id_: [] for c in self.clients}
+        for r in self.routes:
+            index.setdefault(r.destination, []).append(r)
+        return index
+
     @property
     def active_routes(self) -> list[Route]:
         return [r for r in self.routes if getattr(r, "is_active", False)]
 
+    def route_quantity_bound(self, route: Route) -> float:
+        """
+        Largest quantity route has to carry in an optimal solution: its
+        transport capacity, its workshop's production capacity, and its
+        client's demand (or its own minimum quantity, if larger).
+        """
+        return min(
+            route.transport_capacity,
+            self.workshops_by_id[route.origin].production_capacity,
+            max(
+                self.clients_by_id[route.destination].demand,
+                route.min_transport_quantity,
+            ),
+        )
+
+    def update_values(
+        self,
+        client_demand: Mapping[str, float] | None = None,
+        transport_cost: Mapping[str, float] | None = None,
+        production_capacity: Mapping[str, float] | None = None,
+    ) -> None:
+        """
+        Set new demands / transport costs / production capacities in place.
+
+        Each argument maps ids (client id, route id "origin,destination",
+        workshop id) to the new value. Every value is checked before anything
+        is changed, so a bad value leaves the data untouched.
+        """
+        client_demand = client_demand or {}
+        transport_cost = transport_cost or {}
+        production_capacity = production_capacity or {}
+
+        for client_id, value in client_demand.items():
+            _lookup(self.clients_by_id, client_id, "client")
+            check_value_in_range(value, 0.0, None, "Client[" + client_id + "]")
+        for route_id, value in transport_cost.items():
+            _lookup(self.routes_by_id, route_id, "route")
+            check_value_in_range(value, 0.0, None, "Route[" + route_id + "]")
+        for workshop_id, value in production_capacity.items():
+            _lookup(self.workshops_by_id, workshop_id, "workshop")
+            check_value_in_range(value, 0.0, None, "Workshop[" + workshop_id + "]")
+
+        for client_id, value in client_demand.items():
+            self.clients_by_id[client_id].demand = float(value)
+        for route_id, value in transport_cost.items():
+            self.routes_by_id[route_id].transport_cost = float(value)
+        for workshop_id, value in production_capacity.items():
+            self.workshops_by_id[workshop_id].production_capacity = float(value)
+
+    def refresh_index(self) -> None:
+        """
+        Drop the cached views. Only needed after mutating the lists in place
+        (e.g. ``routes.append``); assigning a field resets them automatically.
+        """
+        for name in _CACHED_VIEWS:
+            self.__dict__.pop(name, None)
+
     @field_validator("workshops", "clients", "routes")
     @classmethod
     def no_duplicate_ids(cls, values: Collection[HasId], info: ValidationInfo):
@@ -76,4 +155,21 @@ class ModelData(BaseModel):
         assert_route_endpoints_exist(self.routes, w_ids, c_ids)
         assert_unique_route_pairs(self.routes)
 
+        self.refresh_index()
         return self
+
+
+_CACHED_VIEWS = (
+    "workshops_by_id",
+    "clients_by_id",
+    "routes_by_id",
+    "routes_by_origin",
+    "routes_by_destination",
+)
+
+
+def _lookup(index: Mapping[str, HasId], id_: str, name: str) -> HasId:
+    try:
+        return index[id_]
+    except KeyError:
+        raise ValueError(f"Unknown {name} id: {id_}") from None
@@ -1,7 +1,30 @@
 from collections import Counter
-from collections.abc import Collection, Iterable
+from collections.abc import Callable, Collection, Iterable
 from typing import Protocol
 
+import numpy as np
+
+
+class ModelDataValidationError(ValueError):
+    """
+    Every violation found by a bulk (column-wise) validation, at once.
+    errors holds the messages, worded like the per-object validators'.
+    """
+
+    # violations written out in the message; all of them are in errors
+    MAX_SHOWN = 50
+
+    def __init__(self, errors: list[str]) -> None:
+        self.errors: list[str] = list(errors)
+        n = len(self.errors)
+        lines = self.errors[: self.MAX_SHOWN]
+        if n > self.MAX_SHOWN:
+            lines.append(f"... and {n - self.MAX_SHOWN} more")
+        super().__init__(
+            f"{n} validation error{'s' if n > 1 else ''} for ModelData\n  "
+            + "\n  ".join(lines)
+        )
+
 
 class HasId(Protocol):
     id_: str
@@ -92,3 +115,140 @@ def assert_unique_route_pairs(routes: Iterable[RouteProtocol]) -> None:
         seen.add(key)
     if dups:
         raise ValueError(f"Duplicate (origin, destination) routes: {sorted(dups)}")
+
+
+# --- vectorized checks, on the columns of ColumnarModelData -----------------
+
+
+def intern_ids(values: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """
+    Position of every value in ids (unique), -1 for values not in ids.
+    """
+    if len(ids) == 0:
+        return np.full(len(values), -1, dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    sorted_ids = ids[order]
+    pos = np.minimum(np.searchsorted(sorted_ids, values), len(ids) - 1)
+    return np.where(sorted_ids[pos] == values, order[pos], -1)
+
+
+def check_unique_ids_array(ids: np.ndarray, field_name: str) -> None:
+    unique, counts = np.unique(ids, return_counts=True)
+    dup_ids = unique[counts > 1].tolist()
+    if dup_ids:
+        raise ValueError(
+            (f"There cannot be repeated ids on ModelData.{field_name}: ({dup_ids})")
+        )
+
+
+def check_ids_not_empty_array(ids: np.ndarray, name: str) -> None:
+    if len(ids) and (np.char.strip(ids) == "").any():
+        raise ValueError(f"{name} cannot be empty")
+
+
+def values_out_of_range(
+    values: np.ndarray,
+    min_range: int | float | np.ndarray | None,
+    max_range: int | float | np.ndarray | None,
+    id_of: Callable[[int], str],
+) -> list[str]:
+    """
+    check_value_in_range over a column: the message of every value out of
+    range, id_of(position) naming its object. min_range / max_range are a
+    scalar or a column of bounds.
+    """
+    bad = np.zeros(len(values), dtype=bool)
+    if min_range is not None:
+        bad |= values < min_range
+    if max_range is not None:
+        bad |= values > max_range
+    messages: list[str] = []
+    for k in np.flatnonzero(bad).tolist():
+        try:
+            check_value_in_range(
+                float(values[k]),
+                _bound_at(min_range, k),
+                _bound_at(max_range, k),
+                id_of(k),
+            )
+        except ValueError as error:
+            messages.append(str(error))
+    return messages
+
+
+def check_values_in_range(
+    values: np.ndarray,
+    min_range: int | float | np.ndarray | None,
+    max_range: int | float | np.ndarray | None,
+    id_of: Callable[[int], str],
+) -> None:
+    """
+    Raises for the first value of values_out_of_range
+    """
+    messages = values_out_of_range(values, min_range, max_range, id_of)
+    if messages:
+        raise ValueError(messages[0])
+
+
+def assert_min_active_routes_array(is_active: np.ndarray, min_active: int = 1) -> None:
+    active = int(np.count_nonzero(is_active))
+    if active < min_active:
+        raise ValueError(
+            (
+                f"ModelData must contain at least {min_active} "
+                f"active route (found {active})."
+            )
+        )
+
+
+def assert_route_endpoints_exist_array(
+    origin: np.ndarray,
+    destination: np.ndarray,
+    workshop_ids: np.ndarray,
+    client_ids: np.ndarray,
+) -> None:
+    """
+    assert_route_endpoints_exist on columns of origin / destination ids
+    """
+    missing_origins = np.unique(origin[~np.isin(origin, workshop_ids)]).tolist()
+    missing_destinations = np.unique(
+        destination[~np.isin(destination, client_ids)]
+    ).tolist()
+    problems: list[str] = []
+    if missing_origins:
+        problems.append(f"unknown workshop ids in routes.origin: {missing_origins}")
+    if missing_destinations:
+        problems.append(
+            f"unknown client ids in routes.destination: {missing_destinations}"
+        )
+    if problems:
+        raise ValueError("Referential integrity error: " + "; ".join(problems))
+
+
+def assert_unique_route_pairs_array(
+    origin: np.ndarray,
+    destination: np.ndarray,
+    workshop_ids: np.ndarray,
+    client_ids: np.ndarray,
+) -> None:
+    """
+    assert_unique_route_pairs on interned endpoints (positions in
+    workshop_ids / client_ids)
+    """
+    key = origin.astype(np.int64) * len(client_ids) + destination
+    unique, counts = np.unique(key, return_counts=True)
+    dup_keys = unique[counts > 1]
+    if dup_keys.size:
+        dups = sorted(
+            zip(
+                workshop_ids[dup_keys // len(client_ids)].tolist(),
+                client_ids[dup_keys % len(client_ids)].tolist(),
+            )
+        )
+        raise ValueError(f"Duplicate (origin, destination) routes: {dups}")
+
+
+def _bound_at(bound: int | float | np.ndarray | None, k: int) -> int | float | None:
+    if isinstance(bound, np.ndarray):
+        return float(bound[k])
+    return bound
@@ -1,6 +1,34 @@
+from transport.engine.async_engine import AsyncEngine, SolveEvent, worker_context
 from transport.engine.engine import Engine
+from transport.engine.engine_config import EngineConfig
+from transport.engine.job_queue import Job, JobQueue, JobQueueMetrics
+from transport.engine.presolve import Presolve, PresolveResult, PresolveStats
+from transport.engine.result_cache import (
+    ResultCache,
+    ResultCacheStats,
+    model_fingerprint,
+)
+from transport.engine.scenario_batch import Scenario, ScenarioBatch, ScenarioResult
+from transport.engine.solver_options import SolverOptions
 
 
 __all__ = [
+    "AsyncEngine",
     "Engine",
+    "EngineConfig",
+    "Job",
+    "JobQueue",
+    "JobQueueMetrics",
+    "Presolve",
+    "PresolveResult",
+    "PresolveStats",
+    "ResultCache",
+    "ResultCacheStats",
+    "Scenario",
+    "ScenarioBatch",
+    "ScenarioResult",
+    "SolveEvent",
+    "SolverOptions",
+    "model_fingerprint",
+    "worker_context",
 ]
@@ -0,0 +1,281 @@
+"""
+Solve from asyncio code without blocking the event loop.
+
+AsyncEngine runs an Engine in a worker process: the model build, the solver
+subprocess and the extraction all happen there. The worker leads its own
+process group, so cancelling the job (or its timeout) kills the solver
+subprocess with it; Pyomo gives no handle on the CBC process it starts, and
+a thread could not be stopped anyway.
+
+Workers are forked from a server process that has transport.engine
+imported already (multiprocessing's "forkserver", "spawn" where there is
+none); a job carries its environment, so a PATH set after the server
+started still selects the solver executable.
+
+    job = AsyncEngine(Engine(model_data, "cbc"), timeout=60, limit=semaphore)
+    task = asyncio.create_task(job.run())
+    async for event in job.events():
+        print(event.kind, event.phase)
+    result = await task
+
+or simply `result = await engine.run_async(timeout=60)`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any
+
+from transport.engine.result import SolveResult
+from transport.engine.solve_stats import SolveStats, on_phase
+
+if TYPE_CHECKING:
+    from multiprocessing.connection import Connection
+
+    from transport.context import ColumnarModelData, ModelData
+    from transport.engine.engine import Engine
+    from transport.engine.engine_config import EngineConfig
+
+# kinds of SolveEvent after which a job sends no more
+FINAL_EVENTS = ("done", "failed", "cancelled", "timeout")
+
+
+@dataclass(frozen=True)
+class SolveEvent:
+    """
+    Progress of an AsyncEngine job:
+
+        queued     waiting for a slot of the limit
+        started    the worker is starting
+        phase      the worker entered a SolveStats phase (phase: its name)
+        done       result: the SolveResult
+        failed     error: the exception raised by the solve
+        cancelled  the job was cancelled, the worker killed
+        timeout    the job ran out of time, the worker killed
+    """
+
+    kind: str
+    # seconds since the job was created
+    elapsed: float
+    phase: str | None = None
+    result: SolveResult | None = None
+    error: BaseException | None = None
+
+
+class AsyncEngine:
+    """
+    One solve of an Engine, run in a worker process; see the module
+    docstring.
+
+    timeout : seconds the solve may take once started (waiting for the
+        limit is not counted); the worker is killed and TimeoutError raised
+        when it runs out
+    limit : semaphore shared by the jobs that may not run at the same time;
+        a job holds it from the start of its worker until the worker ends
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        timeout: float | None = None,
+        limit: asyncio.Semaphore | None = None,
+    ) -> None:
+        if timeout is not None and not timeout > 0:
+            raise ValueError(f"timeout must be positive, not {timeout}")
+        self.engine: Engine = engine
+        self.timeout: float | None = timeout
+        self.limit: asyncio.Semaphore | None = limit
+        # events not read yet by events()
+        self._events: asyncio.Queue[SolveEvent] = asyncio.Queue()
+        self._start = time.perf_counter()
+
+    async def run(self) -> SolveResult:
+        """
+        The result of Engine.run, including its result cache and hooks.
+        Raises TimeoutError, CancelledError, or the error of the solve.
+        """
+        engine = self.engine
+        cache = engine.result_cache
+        if cache is not None:
+            stats = SolveStats()
+            with stats.phase("cache"):
+                key = engine.result_key()
+                result = cache.get(key)
+            if result is not None:
+                return self._done(replace(result, stats=stats))
+
+        self._emit("queued")
+        try:
+            if self.limit is None:
+                result = await self._solve_with_timeout()
+            else:
+                async with self.limit:
+                    result = await self._solve_with_timeout()
+        except asyncio.CancelledError:
+            self._emit("cancelled")
+            raise
+        except TimeoutError:
+            self._emit("timeout")
+            raise
+        except Exception as error:
+            self._emit("failed", error=error)
+            raise
+
+        if cache is not None:
+            cache.put(key, result)
+        return self._done(result)
+
+    async def events(self) -> AsyncIterator[SolveEvent]:
+        """
+        The events of the job as they come, until its final one; the ones
+        sent before the iteration started are delivered first.
+        """
+        while True:
+            event = await self._events.get()
+            yield event
+            if event.kind in FINAL_EVENTS:
+                return
+
+    async def _solve_with_timeout(self) -> SolveResult:
+        self._emit("started")
+        return await asyncio.wait_for(self._solve(), self.timeout)
+
+    async def _solve(self) -> SolveResult:
+        loop = asyncio.get_running_loop()
+        messages: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+        receiver, sender = worker_context().Pipe(duplex=False)
+        process = worker_context().Process(
+            target=_solve_in_worker,
+            # rebuilt there from its configuration; the result cache and hooks
+            # stay with the AsyncEngine
+            args=(sender, self.engine.data, self.engine.config, dict(os.environ)),
+            daemon=True,
+        )
+        # starting the first worker starts the fork server: not in the loop
+        starting = loop.run_in_executor(None, process.start)
+        reader = None
+        try:
+            await asyncio.shield(starting)
+            sender.close()
+            # a thread waits on the pipe, the event loop on the queue
+            reader = loop.run_in_executor(
+                None, _read_messages, receiver, messages, loop.call_soon_threadsafe
+            )
+            while True:
+                kind, value = await messages.get()
+                if kind == "phase":
+                    self._emit("phase", phase=value)
+                elif kind == "result":
+                    return value
+                elif kind == "error":
+                    raise value
+                else:  # the pipe closed without a result
+                    raise RuntimeError(
+                        f"the solve worker ended with exit code {process.exitcode}"
+                    )
+        finally:
+            # even when cancelled: the worker must not outlive the job
+            await asyncio.shield(asyncio.wait([starting]))
+            sender.close()
+            _kill(process)
+            if reader is not None:  # it ends on the closed pipe
+                await asyncio.shield(reader)
+            receiver.close()
+            if process.pid is not None:
+                process.join()
+
+    def _done(self, result: SolveResult) -> SolveResult:
+        for hook in self.engine.hooks:
+            hook(result)
+        self._emit("done", result=result)
+        return result
+
+    def _emit(self, kind: str, **values: Any) -> None:
+        elapsed = time.perf_counter() - self._start
+        self._events.put_nowait(SolveEvent(kind, elapsed, **values))
+
+
+def _read_messages(
+    receiver: Connection,
+    messages: asyncio.Queue,
+    call_soon: Callable[..., Any],
+) -> None:
+    while True:
+        try:
+            message = receiver.recv()
+        except (EOFError, OSError):
+            call_soon(messages.put_nowait, ("closed", None))
+            return
+        call_soon(messages.put_nowait, message)
+        if message[0] in ("result", "error"):
+            return
+
+
+def _kill(process: multiprocessing.Process) -> None:
+    """
+    Kill the worker and its process group (the solver subprocess)
+    """
+    if process.pid is None or process.exitcode is not None:
+        return
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except (ProcessLookupError, PermissionError):
+            pass  # it has not called setsid yet, or has ended
+    process.kill()
+
+
+_CONTEXT: multiprocessing.context.BaseContext | None = None
+
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method of the solve workers, shared by AsyncEngine and the job
+    server: a forkserver with transport.engine preloaded, spawn without one
+    """
+    global _CONTEXT
+    if _CONTEXT is None:
+        methods = multiprocessing.get_all_start_methods()
+        if "forkserver" in methods:
+            _CONTEXT = multiprocessing.get_context("forkserver")
+            _CONTEXT.set_forkserver_preload(["transport.engine"])
+        else:
+            _CONTEXT = multiprocessing.get_context("spawn")
+    return _CONTEXT
+
+
+# --- worker side --------------------------------------------------------------
+
+
+def _solve_in_worker(
+    sender: Connection,
+    model_data: ModelData | ColumnarModelData,
+    config: EngineConfig,
+    environ: dict[str, str],
+) -> None:
+    if hasattr(os, "setsid"):
+        os.setsid()  # lead a process group, which the solver joins
+    os.environ.clear()
+    os.environ.update(environ)
+
+    from transport.engine.engine import Engine
+
+    try:
+        with on_phase(lambda name: sender.send(("phase", name))):
+            result = Engine.from_config(model_data, config).run()
+    except Exception as error:
+        try:
+            sender.send(("error", error))
+        except Exception:  # not picklable
+            sender.send(("error", RuntimeError(f"{type(error).__name__}: {error}")))
+    else:
+        sender.send(("result", result))
+    finally:
+        sender.close()
@@ -1,38 +1,203 @@
-from typing import Literal
+import asyncio
+from collections.abc import Iterable, Mapping
+from dataclasses import replace
+from typing import Any, Literal
 from pathlib import Path
 from transport.factory.model_data_factory import ModelDataFactory
 
+from transport.engine.async_engine import AsyncEngine
+from transport.engine.presolve import Presolve, PresolveResult
 from transport.engine.result import SolveResult
-from transport.context import ModelData
-from transport.engine.engines import AbstractEngine, EngineHexaly, EnginePyomo
+from transport.engine.engine_config import EngineConfig
+from transport.engine.result_cache import ResultCache
+from transport.engine.solve_stats import PhaseTiming, SolveHook, SolveStats
+from transport.engine.solver_options import SolverOptions
+from transport.context import ColumnarModelData, ModelData
+from transport.engine.engines import (
+    AbstractEngine,
+    EngineDecomposition,
+    EngineHeuristic,
+    EnginePyomoPersistent,
+)
 
 
 class Engine:
     
     def __init__(
         self, 
-        model_data: ModelData, 
-        engine_type: Literal["cbc", "gurobi", "hexaly"]
+        model_data: ModelData | ColumnarModelData,
+        engine_type: Literal["cbc", "gurobi", "hexaly", "cbc_lp", "cbc_mps", "network_flow", "heuristic"],
+        build_mode: Literal["rules", "matrix"] = "rules",
+        persistent: bool = False,
+        solver_options: dict[str, Any] | SolverOptions | None = None,
+        formulation: Literal["big_m", "tight", "semicontinuous"] = "big_m",
+        presolve: bool = False,
+        result_cache: ResultCache | None = None,
+        warm_start: SolveResult | Mapping[str, float] | Literal["heuristic"] | None = None,
+        hooks: Iterable[SolveHook] = (),
+        decompose: bool = False,
+        regions: Mapping[str, str] | None = None,
+        sensitivity: bool = False,
+        max_workers: int | None = None,
     ):
-        self.data: ModelData = model_data
-        self.engine_type: str = engine_type
-        
-        engines: dict[str, AbstractEngine] = {
-            "cbc": EnginePyomo,
-            "gurobi": EnginePyomo,
-            "hexaly": EngineHexaly,
-        }
-        
-        engine_class: AbstractEngine | None = engines.get(engine_type)
-        
-        if engine_class is None:
-            raise ValueError((
-                f"engine_type can only be ['cbc', 'gurobi', 'hexaly'], "
-                f"but it is {engine_type}"
-            ))
+        self.data: ModelData | ColumnarModelData = model_data
+        # every solve option, checked together (see EngineConfig)
+        self.config: EngineConfig = EngineConfig(
+            engine_type=engine_type,
+            build_mode=build_mode,
+            persistent=persistent,
+            solver_options=solver_options,
+            formulation=formulation,
+            presolve=presolve,
+            warm_start=warm_start,
+            decompose=decompose,
+            regions=regions,
+            sensitivity=sensitivity,
+            max_workers=max_workers,
+        )
+        # the solver options in the names of the backend of engine_type
+        self.solver_options: dict[str, Any] = self.config.backend_options()
+        # run() returns the stored result of an identical data / configuration
+        self.result_cache: ResultCache | None = result_cache
+        # called with every result of run(), e.g. to export result.stats
+        self.hooks: list[SolveHook] = list(hooks)
+        engine_class = self.config.engine_class
+
+        # the engine solves the presolved model when there is one left
+        self.presolve_result: PresolveResult | None = None
+        self.presolve_timing: PhaseTiming | None = None
+        if presolve:
+            presolve_stats = SolveStats()
+            with presolve_stats.phase("presolve"):
+                self.presolve_result = Presolve(self.data).run()
+            self.presolve_timing = presolve_stats.phases["presolve"]
+        if self.presolve_result is not None and self.presolve_result.model_data is None:
+            self.engine: AbstractEngine | None = None
+            return
+        engine_data = (
+            self.data
+            if self.presolve_result is None
+            else self.presolve_result.model_data
+        )
+
+        if decompose:
+            self.engine = EngineDecomposition(
+                engine_data, engine_class, regions, max_workers
+            )
         else:
-            self.engine: AbstractEngine = engine_class(self.data)
+            self.engine = engine_class(engine_data)
+        self.engine.solver_options = self.solver_options
+        if formulation != "big_m":
+            self.engine.formulation = formulation
+        if sensitivity:
+            self.engine.sensitivity = True
+
+    @classmethod
+    def from_config(
+        cls,
+        model_data: ModelData | ColumnarModelData,
+        config: EngineConfig,
+        result_cache: ResultCache | None = None,
+        hooks: Iterable[SolveHook] = (),
+    ) -> "Engine":
+        """
+        Engine solving model_data with the options of config
+        """
+        return cls(
+            model_data, result_cache=result_cache, hooks=hooks, **config.options()
+        )
+
+    @property
+    def engine_type(self) -> str:
+        return self.config.engine_type
     
     def run(self) -> SolveResult:
-        return self.engine.run(self.engine_type)
+        if self.result_cache is None:
+            result = self._run()
+        else:
+            stats = SolveStats()
+            with stats.phase("cache"):
+                key = self.result_key()
+                result = self.result_cache.get(key)
+            if result is None:
+                result = self._run()
+                self.result_cache.put(key, result)
+            else:
+                result = replace(result, stats=stats)
+        for hook in self.hooks:
+            hook(result)
+        return result
+
+    async def run_async(
+        self,
+        timeout: float | None = None,
+        limit: asyncio.Semaphore | None = None,
+    ) -> SolveResult:
+        """
+        run() in a worker process, without blocking the event loop; see
+        AsyncEngine for timeout and limit, and for progress events
+        """
+        return await AsyncEngine(self, timeout=timeout, limit=limit).run()
+
+    def result_key(self) -> str:
+        """
+        Key of the current data and configuration in a ResultCache
+        """
+        return self.config.cache_key(self.data)
+
+    @property
+    def warm_start_accepted(self) -> bool | None:
+        """
+        After run(): whether the solver used warm_start (None when there was
+        none, or the solver does not report it)
+        """
+        return getattr(self.engine, "warm_start_accepted", None)
+
+    def _run(self) -> SolveResult:
+        stats = SolveStats()
+        if self.presolve_timing is not None:
+            stats.phases["presolve"] = self.presolve_timing
+        if self.config.warm_start is not None and self.engine is not None:
+            with stats.phase("warm_start"):
+                self.engine.warm_start = self._warm_start_quantity()
+
+        result = self._solve()
+        if self.engine is not None:
+            stats = replace(
+                self.engine.stats, phases={**stats.phases, **self.engine.stats.phases}
+            )
+        return replace(result, stats=stats)
+
+    def _solve(self) -> SolveResult:
+        if self.presolve_result is None:
+            return self.engine.run(self.engine_type)
+        if self.engine is None:
+            return self.presolve_result.solution()
+        return self.presolve_result.postsolve(self.engine.run(self.engine_type))
+
+    def _warm_start_quantity(self) -> Mapping[str, float] | None:
+        if isinstance(self.config.warm_start, SolveResult):
+            return self.config.warm_start.transport_quantity or None
+        if self.config.warm_start == "heuristic":
+            start = EngineHeuristic(self.engine.data).run("heuristic")
+            return start.transport_quantity if start.status == "heuristic" else None
+        return self.config.warm_start
+
+    def update(
+        self,
+        client_demand: dict[str, float] | None = None,
+        transport_cost: dict[str, float] | None = None,
+        production_capacity: dict[str, float] | None = None,
+    ) -> None:
+        """
+        Change demands / costs / capacities of a persistent engine in place;
+        the next run() re-solves without rebuilding the model.
+        """
+        if not isinstance(self.engine, EnginePyomoPersistent):
+            raise TypeError("update() requires Engine(..., persistent=True)")
+        self.engine.update(
+            client_demand=client_demand,
+            transport_cost=transport_cost,
+            production_capacity=production_capacity,
+        )
 
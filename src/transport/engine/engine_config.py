@@ -0,0 +1,203 @@
+"""
+How an Engine solves, apart from the data: EngineConfig.
+
+The options of Engine depend on each other (persistent only with a Pyomo
+engine, regions only with decompose, ...); EngineConfig checks them together
+when it is created. Engine builds one from its keyword arguments, AsyncEngine
+hands it to its worker, and JobQueue builds one from the arguments of a job.
+Its cache_key is the key of a result in a ResultCache and of a job in a
+JobQueue.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from typing import Any, Literal
+
+from transport.context import ColumnarModelData, ModelData
+from transport.engine.engines import (
+    AbstractEngine,
+    EngineFile,
+    EngineHeuristic,
+    EngineHexaly,
+    EngineNetworkFlow,
+    EnginePyomo,
+    EnginePyomoMatrix,
+    EnginePyomoPersistent,
+)
+from transport.engine.result import SolveResult
+from transport.engine.result_cache import result_key
+from transport.engine.solver_options import SolverOptions
+
+# engine_type -> engine solving it
+ENGINES: dict[str, type[AbstractEngine]] = {
+    "cbc": EnginePyomo,
+    "gurobi": EnginePyomo,
+    "hexaly": EngineHexaly,
+    "cbc_lp": EngineFile,
+    "cbc_mps": EngineFile,
+    "network_flow": EngineNetworkFlow,
+    "heuristic": EngineHeuristic,
+}
+
+# alternative model builders for the Pyomo engines
+PYOMO_BUILDERS: dict[str, type[AbstractEngine]] = {
+    "rules": EnginePyomo,
+    "matrix": EnginePyomoMatrix,
+}
+
+# formulation -> engines that can build it
+FORMULATIONS: dict[str, tuple[type[AbstractEngine], ...]] = {
+    "big_m": tuple(ENGINES.values()),
+    "tight": (EnginePyomo, EngineFile),
+    "semicontinuous": (EngineFile,),
+}
+
+# engine_type -> backend whose option names it takes; network_flow hands
+# instances it cannot solve to cbc, the heuristic takes none
+BACKENDS = {
+    "cbc": "cbc",
+    "gurobi": "gurobi",
+    "hexaly": "hexaly",
+    "cbc_lp": "cbc",
+    "cbc_mps": "cbc",
+    "network_flow": "cbc",
+}
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    """
+    The solve options of Engine; ValueError when they cannot be combined.
+    """
+
+    engine_type: Literal[
+        "cbc", "gurobi", "hexaly", "cbc_lp", "cbc_mps", "network_flow", "heuristic"
+    ]
+    # model builder of the Pyomo engines
+    build_mode: Literal["rules", "matrix"] = "rules"
+    # keep the model between runs (see EnginePyomoPersistent)
+    persistent: bool = False
+    # SolverOptions are translated to the backend of engine_type; a dict is
+    # passed as is, with the backend's own names
+    solver_options: dict[str, Any] | SolverOptions | None = None
+    formulation: Literal["big_m", "tight", "semicontinuous"] = "big_m"
+    # solve the model reduced by Presolve
+    presolve: bool = False
+    # starting solution of the Pyomo engines: route_id -> quantity, a
+    # previous SolveResult, or "heuristic" to start from EngineHeuristic
+    warm_start: SolveResult | Mapping[str, float] | Literal["heuristic"] | None = None
+    # solve every connected component of the network on its own, in
+    # parallel; regions (client id -> region) relax the capacity of the
+    # workshops shared by the regions of a component, see EngineDecomposition
+    decompose: bool = False
+    regions: Mapping[str, str] | None = None
+    # processes solving the components at the same time with decompose
+    # (default: one per CPU); 1 solves them in this process
+    max_workers: int | None = None
+    # add the duals of the capacity / demand constraints and the reduced
+    # costs of the routes to the result (SolveResult.sensitivity); with
+    # presolve, those of the reduced model
+    sensitivity: bool = False
+
+    def __post_init__(self) -> None:
+        engine_class = ENGINES.get(self.engine_type)
+        if engine_class is None:
+            raise ValueError(
+                f"engine_type can only be {list(ENGINES)}, "
+                f"but it is {self.engine_type}"
+            )
+        if self.build_mode not in PYOMO_BUILDERS:
+            raise ValueError(
+                f"build_mode can only be {list(PYOMO_BUILDERS)}, "
+                f"but it is {self.build_mode}"
+            )
+        if self.persistent and (
+            engine_class is not EnginePyomo or self.build_mode != "rules"
+        ):
+            raise ValueError(
+                f"persistent is only available for ['cbc', 'gurobi'] with "
+                f"build_mode 'rules', not {self.engine_type} / {self.build_mode}"
+            )
+        if self.formulation not in FORMULATIONS:
+            raise ValueError(
+                f"formulation can only be {list(FORMULATIONS)}, "
+                f"but it is {self.formulation}"
+            )
+        if engine_class not in FORMULATIONS[self.formulation]:
+            raise ValueError(
+                f"formulation {self.formulation} is not available for "
+                f"{self.engine_type}"
+            )
+        if self.presolve and self.persistent:
+            raise ValueError("presolve cannot be combined with persistent")
+        if self.warm_start is not None and engine_class is not EnginePyomo:
+            raise ValueError(
+                f"warm_start is only available for ['cbc', 'gurobi'], "
+                f"not {self.engine_type}"
+            )
+        if self.decompose and (self.persistent or self.warm_start is not None):
+            raise ValueError(
+                "decompose cannot be combined with persistent or warm_start"
+            )
+        if self.regions is not None and not self.decompose:
+            raise ValueError("regions requires decompose")
+        if self.max_workers is not None and not self.decompose:
+            raise ValueError("max_workers requires decompose")
+        if self.max_workers is not None and self.max_workers < 1:
+            raise ValueError(
+                f"max_workers can only be a positive integer, "
+                f"but it is {self.max_workers}"
+            )
+        if self.sensitivity and (engine_class is not EnginePyomo or self.persistent):
+            raise ValueError(
+                f"sensitivity is only available for ['cbc', 'gurobi'] without "
+                f"persistent, not {self.engine_type}"
+                f"{' / persistent' if self.persistent else ''}"
+            )
+
+    @property
+    def engine_class(self) -> type[AbstractEngine]:
+        """
+        Engine building and solving the model (of every component, with
+        decompose)
+        """
+        if self.persistent:
+            return EnginePyomoPersistent
+        engine_class = ENGINES[self.engine_type]
+        if engine_class is EnginePyomo:
+            return PYOMO_BUILDERS[self.build_mode]
+        return engine_class
+
+    def backend_options(self) -> dict[str, Any]:
+        """
+        solver_options with the option names of the backend of engine_type
+        """
+        if not isinstance(self.solver_options, SolverOptions):
+            return dict(self.solver_options or {})
+        backend = BACKENDS.get(self.engine_type)
+        return {} if backend is None else self.solver_options.for_solver(backend)
+
+    def options(self) -> dict[str, Any]:
+        """
+        The fields as keyword arguments of EngineConfig or Engine
+        """
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def cache_key(self, model_data: ModelData | ColumnarModelData) -> str:
+        """
+        Key of solving model_data with this configuration, in a ResultCache
+        or a JobQueue. persistent, warm_start and max_workers leave the
+        result unchanged.
+        """
+        return result_key(
+            model_data,
+            engine_type=self.engine_type,
+            build_mode=self.build_mode,
+            formulation=self.formulation,
+            presolve=self.presolve,
+            solver_options=self.backend_options(),
+            **({"decompose": True, "regions": self.regions} if self.decompose else {}),
+            **({"sensitivity": True} if self.sensitivity else {}),
+        )
@@ -1,10 +1,23 @@
 from transport.engine.engines.abstract_engine import AbstractEngine
-from transport.engine.engines.engine_hexaly import EngineHexaly
+from transport.engine.engines.engine_decomposition import EngineDecomposition
+from transport.engine.engines.engine_file import EngineFile
+from transport.engine.engines.engine_heuristic import EngineHeuristic
+from transport.engine.engines.engine_hexaly import EngineHexaly, HexalyProgress
+from transport.engine.engines.engine_network_flow import EngineNetworkFlow
 from transport.engine.engines.engine_pyomo import EnginePyomo
+from transport.engine.engines.engine_pyomo_matrix import EnginePyomoMatrix
+from transport.engine.engines.engine_pyomo_persistent import EnginePyomoPersistent
 
 
 __all__ = [
     "AbstractEngine",
+    "EngineDecomposition",
+    "EngineFile",
+    "EngineHeuristic",
     "EngineHexaly",
+    "EngineNetworkFlow",
     "EnginePyomo",
+    "EnginePyomoMatrix",
+    "EnginePyomoPersistent",
+    "HexalyProgress",
 ]
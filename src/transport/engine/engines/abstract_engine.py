@@ -1,12 +1,18 @@
 from abc import ABC, abstractmethod
+from typing import Any
 
-from transport.context import ModelData
+from transport.context import ColumnarModelData, ModelData
+from transport.engine.solve_stats import SolveStats
 
 
 class AbstractEngine(ABC):
     
-    def __init__(self, model_data: ModelData) -> None:
-        self.data: ModelData = model_data
+    def __init__(self, model_data: ModelData | ColumnarModelData) -> None:
+        self.data: ModelData | ColumnarModelData = model_data
+        # options handed to the solver as-is, with the backend's own names
+        self.solver_options: dict[str, Any] = {}
+        # phases of the last run, see solve_stats
+        self.stats: SolveStats = SolveStats()
     
     @abstractmethod
     def run(self, solver: str) -> None:
@@ -0,0 +1,593 @@
+"""
+Decomposition of a network into independent subproblems.
+
+Routes are the only links between workshops and clients, so the connected
+components of the workshop - client route graph are independent problems:
+each has its own workshops, clients and routes, and the optimum of the whole
+is the union of their optima. EngineDecomposition solves every component
+with the engine it wraps, across a process pool, and merges their
+SolveResults (objectives, bounds and transport quantities add up; the
+bound is unknown as soon as that of a component is).
+
+A component spanning several regions (client id -> region, optional) that
+share a few workshops is only loosely coupled: the capacities of the shared
+workshops are the only rows linking the regions. With regions, such a
+component is solved by Lagrangian relaxation of those rows: every region is
+solved on its own, with a price added to the production cost of the shared
+workshops, and the prices follow a subgradient of the capacity violations.
+The best relaxed objective is a lower bound; a feasible solution comes from
+a relaxation that respects the capacities, or from splitting the capacity of
+every shared workshop between its regions. When the gap does not close, the
+result is "feasible" with the bound and gap of the relaxation; when no
+feasible solution is found, the component is solved whole.
+
+With sensitivity, the duals and reduced costs of the whole are those of the
+components: a component solved by Lagrangian relaxation has none (its
+regions are solved with priced costs), so then neither has the whole.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any
+
+import numpy as np
+from typing_extensions import override
+
+from transport.context import ColumnarModelData, ModelData, as_columnar
+from transport.engine.async_engine import worker_context
+from transport.engine.engines.abstract_engine import AbstractEngine
+from transport.engine.result import Sensitivity, SolveResult, relative_gap
+from transport.engine.solve_stats import SolveStats
+
+# quantities / capacities below this are treated as zero
+_EPS = 1e-9
+
+# statuses of a component solved to optimality
+_OPTIMAL = ("optimal",)
+
+# block -> future of its SolveResult
+_Submit = Callable[[ColumnarModelData], Future]
+
+
+@dataclass(frozen=True)
+class _Block:
+    """
+    Routes of the network solved together, as their own ColumnarModelData
+    """
+
+    data: ColumnarModelData
+    routes: np.ndarray  # positions in the whole network
+    workshops: np.ndarray  # positions of data.workshop_ids in the whole network
+
+
+class EngineDecomposition(AbstractEngine):
+    """
+    Solves every connected component of the network with engine_class (the
+    engine Engine would use); see the module docstring.
+
+    regions : client id -> region, for the Lagrangian relaxation of the
+        components spanning several regions (clients missing from it are a
+        region of their own)
+    max_workers : processes solving components at the same time (default:
+        one per CPU); components are solved in this process when there is a
+        single one, with max_workers 1 (as the job server's workers do), or
+        when this process may not start others (a daemon process, such as an
+        AsyncEngine worker)
+    """
+
+    def __init__(
+        self,
+        model_data: ModelData | ColumnarModelData,
+        engine_class: type[AbstractEngine],
+        regions: Mapping[str, str] | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        super().__init__(model_data)
+        self.engine_class: type[AbstractEngine] = engine_class
+        self.regions: Mapping[str, str] | None = regions
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        # handed to the engine of every component, like Engine does
+        self.formulation: str = "big_m"
+        self.sensitivity: bool = False
+        # subgradient steps of a Lagrangian component, and the relative gap
+        # between its solution and bound at which it stops
+        self.iterations: int = 30
+        self.gap_tolerance: float = 1e-4
+        # after run(): the result of every component, largest first
+        self.component_results: list[SolveResult] = []
+
+    @override
+    def run(self, solver: str) -> SolveResult:
+        self.stats = SolveStats()
+        with self.stats.phase("decompose"):
+            data = as_columnar(self.data)
+            blocks = self._blocks(data)
+        if blocks is None:  # a client with demand and no route
+            return _failed("infeasible", solver)
+
+        with self.stats.phase("solve"):
+            with self._executor(sum(len(b) for b in blocks)) as executor:
+                submit = self._solver(executor, solver)
+                submit_component = self._solver(executor, solver, self.sensitivity)
+                futures = [
+                    submit_component(block[0].data)
+                    for block in blocks
+                    if len(block) == 1
+                ]
+                results = [
+                    self._lagrangian(data, block, submit, solver)
+                    for block in blocks
+                    if len(block) > 1
+                ]
+                results = [f.result() for f in futures] + results
+
+        with self.stats.phase("extract"):
+            self.component_results = results
+            self._record_model_size(results)
+            result = _merge(results, solver)
+            if self.sensitivity and result.transport_quantity:
+                result = replace(result, sensitivity=_merge_sensitivity(data, results))
+            return result
+
+    # --- decomposition ----------------------------------------------------
+
+    def _blocks(self, data: ColumnarModelData) -> list[list[_Block]] | None:
+        """
+        The blocks of every component: one block, or one per region of a
+        component spanning several regions. Largest components first, so
+        they start first.
+        """
+        n_workshops = len(data.workshop_ids)
+        reached = np.zeros(len(data.client_ids), dtype=bool)
+        reached[data.route_destination] = True
+        if (data.demand[~reached] > _EPS).any():
+            return None
+
+        labels = connected_components(
+            data.route_origin, data.route_destination + n_workshops
+        )
+        _, route_component = np.unique(labels[data.route_origin], return_inverse=True)
+        order = np.argsort(route_component, kind="stable")
+        bounds = np.flatnonzero(np.diff(route_component[order])) + 1
+        components = sorted(np.split(order, bounds), key=len, reverse=True)
+
+        client_region = self._client_regions(data)
+        blocks = []
+        for routes in components:
+            if len(routes) == 0:
+                continue
+            if client_region is None:
+                blocks.append([_block(data, routes)])
+                continue
+            region = client_region[data.route_destination[routes]]
+            if (region == region[0]).all():
+                blocks.append([_block(data, routes)])
+                continue
+            order = np.argsort(region, kind="stable")
+            bounds = np.flatnonzero(np.diff(region[order])) + 1
+            blocks.append(
+                [_block(data, routes[part]) for part in np.split(order, bounds)]
+            )
+        return blocks
+
+    def _client_regions(self, data: ColumnarModelData) -> np.ndarray | None:
+        """
+        Region number of every client, None without regions
+        """
+        if not self.regions:
+            return None
+        names: dict[Any, int] = {}
+        return np.array(
+            [
+                names.setdefault(self.regions.get(c, ("client", c)), len(names))
+                for c in data.client_ids.tolist()
+            ]
+        )
+
+    # --- solving ----------------------------------------------------------
+
+    def _executor(self, n_blocks: int) -> Executor:
+        if min(self.max_workers, n_blocks) > 1 and _may_fork():
+            return ProcessPoolExecutor(
+                max_workers=min(self.max_workers, n_blocks),
+                mp_context=worker_context(),
+            )
+        return _InProcess()
+
+    def _solver(
+        self, executor: Executor, solver: str, sensitivity: bool = False
+    ) -> _Submit:
+        """
+        block -> future of its result with the component engine
+        """
+        arguments = (
+            self.engine_class,
+            solver,
+            self.solver_options,
+            self.formulation,
+            sensitivity,
+        )
+
+        def submit(data: ColumnarModelData) -> Future:
+            return executor.submit(_solve_block, data, *arguments)
+
+        return submit
+
+    def _lagrangian(
+        self,
+        data: ColumnarModelData,
+        blocks: list[_Block],
+        submit: _Submit,
+        solver: str,
+    ) -> SolveResult:
+        """
+        A component whose regions (blocks) are coupled by the capacity of the
+        workshops they share
+        """
+        # shared workshops, and where they are in every block
+        counts = np.bincount(
+            np.concatenate([b.workshops for b in blocks]),
+            minlength=len(data.workshop_ids),
+        )
+        shared = np.flatnonzero(counts > 1)
+        # workshops of every block that are shared, and their position in shared
+        is_shared = [counts[b.workshops] > 1 for b in blocks]
+        local = [
+            np.searchsorted(shared, b.workshops[mask])
+            for b, mask in zip(blocks, is_shared)
+        ]
+        capacity = data.production_capacity[shared]
+
+        price = np.zeros(len(shared))
+        # best relaxed objective, a lower bound (only known when every region
+        # reports a bound), and the best value of the priced solutions, which
+        # the steps follow either way
+        bound = -np.inf
+        dual = -np.inf
+        best: tuple[float, list[SolveResult]] | None = None
+        step_scale, stalled = 2.0, 0
+        last: list[SolveResult] = []
+        for _ in range(self.iterations):
+            priced = []
+            for block, index, mask in zip(blocks, local, is_shared):
+                production_cost = block.data.production_cost.copy()
+                production_cost[mask] += price[index]
+                priced.append(_with_values(block.data, production_cost=production_cost))
+            last = _solve_all(submit, priced)
+            failed = next((r for r in last if not r.transport_quantity), None)
+            if failed is not None:
+                # a region that cannot be solved with all of its capacities
+                if failed.status == "infeasible":
+                    return failed
+                break
+
+            usage = self._shared_usage(blocks, last, local, is_shared, len(shared))
+            relaxed = sum(r.objective for r in last) - price @ capacity
+            relaxed_bound = sum(_bound(r) for r in last) - price @ capacity
+            if relaxed_bound > bound:
+                bound = relaxed_bound
+            if dual == -np.inf or relaxed > dual + _EPS * max(1.0, abs(dual)):
+                dual, stalled = relaxed, 0
+            else:
+                stalled += 1
+                if stalled >= 3:
+                    step_scale, stalled = step_scale / 2, 0
+
+            violation = usage - capacity
+            if (violation <= _EPS * np.maximum(capacity, 1.0)).all():
+                # feasible: its cost without the prices
+                value = sum(r.objective for r in last) - price @ usage
+                if best is None or value < best[0]:
+                    best = (value, last)
+            if best is not None and relative_gap(best[0], bound) <= self.gap_tolerance:
+                break
+
+            subgradient = np.where(price > 0, violation, np.maximum(violation, 0.0))
+            norm = subgradient @ subgradient
+            if norm <= _EPS:
+                break
+            target = (
+                best[0] if best is not None else relaxed + 0.05 * max(abs(relaxed), 1.0)
+            )
+            price = np.maximum(
+                price + step_scale * (target - relaxed) / norm * violation, 0.0
+            )
+
+        if last and (best is None or relative_gap(best[0], bound) > self.gap_tolerance):
+            repaired = self._repair(blocks, last, local, is_shared, capacity, submit)
+            if repaired is not None and (best is None or repaired[0] < best[0]):
+                best = repaired
+        if best is None:
+            # no feasible split of the shared capacities: solve it whole
+            routes = np.concatenate([b.routes for b in blocks])
+            return submit(_block(data, np.sort(routes)).data).result()
+
+        value, results = best
+        if bound == -np.inf:
+            bound = float("nan")
+        gap = relative_gap(value, bound)
+        return SolveResult(
+            status="optimal" if gap <= self.gap_tolerance else "feasible",
+            objective=value,
+            transport_quantity={
+                route: quantity
+                for result in results
+                for route, quantity in result.transport_quantity.items()
+            },
+            solver=solver,
+            bound=bound,
+            gap=gap,
+        )
+
+    def _repair(
+        self,
+        blocks: list[_Block],
+        results: list[SolveResult],
+        local: list[np.ndarray],
+        is_shared: list[np.ndarray],
+        capacity: np.ndarray,
+        submit: _Submit,
+    ) -> tuple[float, list[SolveResult]] | None:
+        """
+        Split the capacity of every shared workshop between the blocks, in
+        proportion to their use of it in results, and solve them again with
+        their share and the original costs
+        """
+        uses = [
+            _production(b, r)[mask] for b, r, mask in zip(blocks, results, is_shared)
+        ]
+        usage = np.zeros(len(capacity))
+        counts = np.zeros(len(capacity))
+        for index, use in zip(local, uses):
+            np.add.at(usage, index, use)
+            np.add.at(counts, index, 1.0)
+        # over-used capacity is scaled down, spare capacity split evenly
+        scale = np.where(usage > capacity, capacity / np.maximum(usage, _EPS), 1.0)
+        spare = np.maximum(capacity - usage, 0.0) / np.maximum(counts, 1.0)
+
+        split = []
+        for block, index, mask, use in zip(blocks, local, is_shared, uses):
+            production_capacity = block.data.production_capacity.copy()
+            production_capacity[mask] = use * scale[index] + spare[index]
+            split.append(
+                _with_values(block.data, production_capacity=production_capacity)
+            )
+        repaired = _solve_all(submit, split)
+        if any(not r.transport_quantity for r in repaired):
+            return None
+        return sum(r.objective for r in repaired), repaired
+
+    @staticmethod
+    def _shared_usage(
+        blocks: list[_Block],
+        results: list[SolveResult],
+        local: list[np.ndarray],
+        is_shared: list[np.ndarray],
+        n_shared: int,
+    ) -> np.ndarray:
+        usage = np.zeros(n_shared)
+        for block, result, index, mask in zip(blocks, results, local, is_shared):
+            np.add.at(usage, index, _production(block, result)[mask])
+        return usage
+
+    def _record_model_size(self, results: list[SolveResult]) -> None:
+        for name in ("variables", "binaries", "constraints", "nonzeros"):
+            values = [getattr(r.stats, name, None) for r in results]
+            if values and None not in values:
+                setattr(self.stats, name, sum(values))
+
+
+def connected_components(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Label of every node 0..max(a, b) of the graph with edges a[j] - b[j]:
+    nodes get the same label exactly when they are connected. The label of
+    a component is its smallest node.
+    """
+    n = int(max(a.max(initial=-1), b.max(initial=-1))) + 1
+    label = np.arange(n)
+    a = a.astype(np.int64)
+    b = b.astype(np.int64)
+    while True:
+        # hook every edge onto the smaller label, then shortcut the chains
+        smaller = np.minimum(label[a], label[b])
+        before = label.copy()
+        np.minimum.at(label, label[a], smaller)
+        np.minimum.at(label, label[b], smaller)
+        while True:
+            jumped = label[label]
+            if (jumped == label).all():
+                break
+            label = jumped
+        if (label == before).all():
+            return label
+
+
+def _block(data: ColumnarModelData, routes: np.ndarray) -> _Block:
+    """
+    The routes of data, with their workshops and clients
+    """
+    workshops, origin = np.unique(data.route_origin[routes], return_inverse=True)
+    clients, destination = np.unique(
+        data.route_destination[routes], return_inverse=True
+    )
+    columnar = ColumnarModelData(
+        workshop_ids=data.workshop_ids[workshops],
+        production_capacity=data.production_capacity[workshops],
+        production_cost=data.production_cost[workshops],
+        client_ids=data.client_ids[clients],
+        demand=data.demand[clients],
+        route_origin=origin,
+        route_destination=destination,
+        transport_cost=data.transport_cost[routes],
+        transport_capacity=data.transport_capacity[routes],
+        min_transport_quantity=data.min_transport_quantity[routes],
+        is_active=data.is_active[routes],
+        validate=False,
+    )
+    return _Block(columnar, routes, workshops)
+
+
+def _solve_all(
+    submit: _Submit, blocks: Sequence[ColumnarModelData]
+) -> list[SolveResult]:
+    """
+    Results of the blocks, solved at the same time
+    """
+    futures = [submit(data) for data in blocks]
+    return [future.result() for future in futures]
+
+
+def _with_values(data: ColumnarModelData, **columns: np.ndarray) -> ColumnarModelData:
+    """
+    Copy of data with other workshop columns (production_cost, ...)
+    """
+    values = {
+        name: getattr(data, name)
+        for name in (
+            "workshop_ids",
+            "production_capacity",
+            "production_cost",
+            "client_ids",
+            "demand",
+            "route_origin",
+            "route_destination",
+            "transport_cost",
+            "transport_capacity",
+            "min_transport_quantity",
+            "is_active",
+        )
+    }
+    return ColumnarModelData(**{**values, **columns}, validate=False)
+
+
+def _production(block: _Block, result: SolveResult) -> np.ndarray:
+    """
+    Quantity produced by every workshop of block in result
+    """
+    quantity = np.array(
+        [result.transport_quantity.get(r, 0.0) for r in block.data.route_ids]
+    )
+    return np.bincount(
+        block.data.route_origin,
+        weights=quantity,
+        minlength=len(block.data.workshop_ids),
+    )
+
+
+def _bound(result: SolveResult) -> float:
+    """
+    Lower bound on the objective of a block: the solver's, the objective of
+    an optimal solution, NaN when neither is known (so that a sum of bounds
+    is unknown as soon as one of them is)
+    """
+    if result.bound == result.bound:
+        return result.bound
+    return result.objective if result.status in _OPTIMAL else float("nan")
+
+
+def _merge(results: list[SolveResult], solver: str) -> SolveResult:
+    """
+    One result for the union of the components
+    """
+    if not results:  # no route carries anything
+        return SolveResult(
+            status="optimal", objective=0.0, transport_quantity={}, solver=solver
+        )
+    failed = [r for r in results if not r.transport_quantity]
+    if failed:
+        infeasible = [r for r in failed if r.status == "infeasible"]
+        return _failed((infeasible or failed)[0].status, solver)
+
+    objective = sum(r.objective for r in results)
+    bound = sum(_bound(r) for r in results)
+    statuses = [r.status for r in results if r.status not in _OPTIMAL]
+    return SolveResult(
+        status=statuses[0] if statuses else "optimal",
+        objective=objective,
+        transport_quantity={
+            route: quantity
+            for result in results
+            for route, quantity in result.transport_quantity.items()
+        },
+        solver=solver,
+        bound=bound,
+        gap=relative_gap(objective, bound),
+    )
+
+
+def _merge_sensitivity(
+    data: ColumnarModelData, results: list[SolveResult]
+) -> Sensitivity | None:
+    """
+    Sensitivity of the union of the components, None unless they all have
+    one; the workshops and clients in no component have a dual of 0
+    """
+    sections = [r.sensitivity for r in results]
+    if any(s is None for s in sections):
+        return None
+    workshop_capacity = dict.fromkeys(data.workshop_ids.tolist(), 0.0)
+    client_demand = dict.fromkeys(data.client_ids.tolist(), 0.0)
+    for section in sections:
+        workshop_capacity.update(section.workshop_capacity)
+        client_demand.update(section.client_demand)
+    return Sensitivity(
+        workshop_capacity=workshop_capacity,
+        client_demand=client_demand,
+        route_capacity={
+            route: dual for s in sections for route, dual in s.route_capacity.items()
+        },
+        reduced_cost={
+            route: cost for s in sections for route, cost in s.reduced_cost.items()
+        },
+        source="dual_lp" if any(s.source == "dual_lp" for s in sections) else "solver",
+    )
+
+
+def _failed(status: str, solver: str) -> SolveResult:
+    return SolveResult(
+        status=status, objective=float("nan"), transport_quantity={}, solver=solver
+    )
+
+
+def _may_fork() -> bool:
+    # daemon processes (multiprocessing workers) cannot have children
+    return not multiprocessing.current_process().daemon
+
+
+class _InProcess(Executor):
+    """
+    Executor running every task on submission, in this process
+    """
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+
+# --- worker side --------------------------------------------------------------
+
+
+def _solve_block(
+    data: ColumnarModelData,
+    engine_class: type[AbstractEngine],
+    solver: str,
+    solver_options: dict[str, Any],
+    formulation: str,
+    sensitivity: bool,
+) -> SolveResult:
+    engine = engine_class(data)
+    engine.solver_options = solver_options
+    if formulation != "big_m":
+        engine.formulation = formulation
+    if sensitivity:
+        engine.sensitivity = True
+    return replace(engine.run(solver), stats=engine.stats)
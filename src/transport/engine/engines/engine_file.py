@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import subprocess
+import tempfile
+from pathlib import Path
+
+from typing_extensions import override
+
+from transport.context import ColumnarModelData, ModelData, as_columnar
+from transport.engine.engines.abstract_engine import AbstractEngine
+from transport.engine.model_file import (
+    binary_count,
+    cbc_summary,
+    read_cbc_solution,
+    route_costs,
+    write_lp,
+    write_mps,
+)
+from transport.engine.result import SolveResult, relative_gap
+from transport.engine.solve_stats import SolveStats
+
+_SOLUTION_STATUSES = ("optimal", "maxTimeLimit", "maxIterations", "maxEvaluations")
+
+
+class EngineFile(AbstractEngine):
+    """
+    Runs CBC on an LP or MPS file streamed directly from ModelData, skipping
+    the Pyomo model entirely, and reads CBC's solution file back.
+
+    The solver argument of run selects the file format: "cbc_lp" or "cbc_mps".
+    """
+
+    FORMATS = {"cbc_lp": "lp", "cbc_mps": "mps"}
+
+    def __init__(
+        self,
+        model_data: ModelData | ColumnarModelData,
+        executable: str = "cbc",
+        keepfiles: str | Path | None = None,
+    ) -> None:
+        super().__init__(model_data)
+        self.BIG_M = 1e6
+        # "big_m", "tight" or "semicontinuous", see model_file
+        self.formulation: str = "big_m"
+        # cbc binary to call (a path or a name on PATH)
+        self.executable: str = executable
+        # directory where the model/solution files are kept after the run;
+        # a temporary directory is used (and removed) when None
+        self.keepfiles: Path | None = None if keepfiles is None else Path(keepfiles)
+        # stdout of the last cbc run
+        self._log: str = ""
+
+    @override
+    def run(self, solver: str) -> SolveResult:
+        file_format = self.FORMATS.get(solver)
+        if file_format is None:
+            raise ValueError(
+                f"solver can only be {list(self.FORMATS)}, but it is {solver}"
+            )
+
+        if self.keepfiles is not None:
+            self.keepfiles.mkdir(parents=True, exist_ok=True)
+            return self._run_in(self.keepfiles, file_format)
+        with tempfile.TemporaryDirectory(prefix="transport_") as workdir:
+            return self._run_in(Path(workdir), file_format)
+
+    def _run_in(self, workdir: Path, file_format: str) -> SolveResult:
+        model_file = workdir / f"model.{file_format}"
+        solution_file = workdir / "model.sol"
+        # the writers and the solution mapping read the columns; convert once
+        data = as_columnar(self.data)
+        self.stats = SolveStats()
+        self.stats.set_model_size(
+            n_workshops=len(data.workshop_ids),
+            n_clients=len(data.client_ids),
+            n_routes=len(data.route_ids),
+            n_binaries=binary_count(data, self.formulation),
+        )
+
+        with self.stats.phase("write"):
+            self._write_model(model_file, file_format, data)
+        with self.stats.phase("solve"):
+            self._solve_model(model_file, solution_file)
+        with self.stats.phase("extract"):
+            return self._solve_result(solution_file, data)
+
+    def _solve_result(
+        self, solution_file: Path, data: ColumnarModelData
+    ) -> SolveResult:
+        status, quantities = read_cbc_solution(solution_file, len(data.route_ids))
+        summary = cbc_summary(self._log)
+        if "nodes" in summary:
+            self.stats.nodes = int(summary["nodes"])
+        if "iterations" in summary:
+            self.stats.iterations = int(summary["iterations"])
+
+        # the incumbent of a solve stopped on a limit is a result too
+        if status not in _SOLUTION_STATUSES or quantities is None:
+            return SolveResult(
+                status=status,
+                objective=float("nan"),
+                transport_quantity={},
+                solver="cbc",
+            )
+
+        objective = sum(c * q for c, q in zip(route_costs(data), quantities))
+        bound = summary.get("lower_bound", float("nan"))
+        if bound != bound and status == "optimal":
+            bound = objective
+        return SolveResult(
+            status=status,
+            objective=objective,
+            transport_quantity=dict(zip(data.route_ids, quantities)),
+            solver="cbc",
+            bound=bound,
+            gap=relative_gap(objective, bound),
+        )
+
+    def _write_model(
+        self,
+        model_file: Path,
+        file_format: str,
+        data: ModelData | ColumnarModelData | None = None,
+    ) -> None:
+        writer = write_lp if file_format == "lp" else write_mps
+        with open(model_file, "w", encoding="utf-8") as f:
+            writer(self.data if data is None else data, f, self.BIG_M, self.formulation)
+
+    def _solve_model(self, model_file: Path, solution_file: Path) -> None:
+        completed = subprocess.run(
+            self._command(model_file, solution_file),
+            capture_output=True,
+            text=True,
+        )
+        self._log = completed.stdout
+        if completed.returncode != 0 or not solution_file.exists():
+            raise RuntimeError(
+                f"{self.executable} failed (exit code {completed.returncode}):\n"
+                f"{completed.stdout}{completed.stderr}"
+            )
+
+    def _command(self, model_file: Path, solution_file: Path) -> list[str]:
+        options = [
+            arg
+            for name, value in self.solver_options.items()
+            for arg in (f"-{name}", str(value))
+        ]
+        return [
+            self.executable,
+            "-import",
+            str(model_file),
+            *options,
+            "-solve",
+            "-solu",
+            str(solution_file),
+        ]
@@ -0,0 +1,414 @@
+from __future__ import annotations
+
+import heapq
+
+import numpy as np
+from typing_extensions import override
+
+from transport.context import ColumnarModelData, ModelData, as_columnar
+from transport.engine.engines.abstract_engine import AbstractEngine
+from transport.engine.result import SolveResult, relative_gap
+from transport.engine.solve_stats import SolveStats
+
+# quantities / capacities below this are treated as zero
+_EPS = 1e-9
+
+
+class EngineHeuristic(AbstractEngine):
+    """
+    Feasible solution of the EnginePyomo model without a solver, with an
+    estimate of how far it is from the optimum.
+
+    Construction is Vogel's approximation on the route arrays: the client of
+    highest regret (cost of its second cheapest usable route minus its
+    cheapest) is served next, from its cheapest routes first, as much as the
+    route and the remaining production capacity of its workshop allow. The
+    regrets of the clients of every workshop used up are then recomputed. A
+    route below its min_transport_quantity either ships the minimum
+    (over-delivering) or nothing.
+
+    Demand left unmet is then repaired with augmenting paths in the residual
+    network: from a workshop with capacity left to an unmet client, moving
+    other clients to other workshops on the way. Without minimum quantities
+    this is a maximum flow, so a solution is found whenever one exists.
+
+    Local improvement then repeats, up to max_passes times or until nothing
+    changes, for every client:
+      - cut the over-delivery on its most expensive routes,
+      - shift quantity from a used route to a cheaper route of the same
+        client that has room, keeping every route at 0 or above its minimum
+        and every workshop within its capacity.
+
+    The lower bound is the optimum of the relaxation without production
+    capacities nor minimum quantities: every client filled from its cheapest
+    routes. The result has status "heuristic" with bound and gap set;
+    "infeasible" when even the relaxation is infeasible, and "noSolution"
+    when the repaired construction still misses a demand (only possible with
+    minimum quantities).
+
+    transport_quantity maps every route id to its quantity, so a result can
+    be used as the starting point of another engine.
+    """
+
+    def __init__(self, model_data: ModelData | ColumnarModelData) -> None:
+        super().__init__(model_data)
+        self.max_passes: int = 10
+
+    @override
+    def run(self, solver: str) -> SolveResult:
+        self.stats = SolveStats()
+        with self.stats.phase("build"):
+            data = as_columnar(self.data)
+            self._setup(data)
+
+        with self.stats.phase("solve"):
+            status, bound = self._solve()
+        if status != "heuristic":
+            return SolveResult(
+                status=status,
+                objective=float("nan"),
+                transport_quantity={},
+                solver=solver,
+                bound=bound,
+            )
+
+        with self.stats.phase("extract"):
+            objective = float(self.cost @ self.flow)
+            return SolveResult(
+                status=status,
+                objective=objective,
+                transport_quantity=dict(zip(data.route_ids, self.flow.tolist())),
+                solver=solver,
+                bound=bound,
+                gap=relative_gap(objective, bound),
+            )
+
+    def _solve(self) -> tuple[str, float]:
+        """
+        Status and lower bound; the solution is left in flow
+        """
+        bound = self._lower_bound()
+        if bound is None:
+            return "infeasible", float("nan")
+        self._construct()
+        self._repair()
+        if (self.delivered < self.demand - _EPS).any():
+            return "noSolution", bound
+        # improvement passes
+        self.stats.iterations = 0
+        for _ in range(self.max_passes):
+            self.stats.iterations += 1
+            if not self._improve():
+                break
+        return "heuristic", bound
+
+    def _setup(self, data: ColumnarModelData) -> None:
+        self.cost = data.route_cost
+        self.origin = data.route_origin.astype(np.int64)
+        self.destination = data.route_destination.astype(np.int64)
+        self.capacity = data.transport_capacity
+        # more than this is never useful on a route
+        self.upper = data.route_quantity_bounds()
+        self.minimum = data.min_transport_quantity
+        self.demand = data.demand
+        self.production_capacity = data.production_capacity
+        # routes of workshop w: by_origin[origin_start[w]:origin_start[w + 1]]
+        self.origin_start, self.by_origin = data.csr_by_origin()
+
+        # routes of client c, cheapest first: order[start[c]:start[c + 1]]
+        self.order = np.lexsort((self.cost, self.destination))
+        self.start = np.zeros(len(self.demand) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(self.destination, minlength=len(self.demand)),
+            out=self.start[1:],
+        )
+
+        self.flow = np.zeros(len(self.cost))
+        self.left = self.production_capacity.astype(float)
+        self.delivered = np.zeros(len(self.demand))
+
+    def _lower_bound(self) -> float | None:
+        """
+        Cost of filling every client from its cheapest routes up to their
+        transport_capacity; None when that cannot meet the demand or the
+        demand exceeds the total production capacity.
+        """
+        if self.demand.sum() > self.production_capacity.sum() + _EPS:
+            return None
+        # a client with a demand and no route
+        if (self.demand[np.diff(self.start) == 0] > _EPS).any():
+            return None
+        client = self.destination[self.order]
+        capacity = self.capacity[self.order]
+        demand = self.demand[client]
+        # capacity of the cheaper routes of the same client
+        before = np.cumsum(capacity) - capacity
+        before -= before[self.start[client]]
+        take = np.clip(demand - before, 0.0, capacity)
+        if (
+            np.bincount(client, take, minlength=len(self.demand)) < self.demand - _EPS
+        ).any():
+            return None
+        return float(self.cost[self.order] @ take)
+
+    def _construct(self) -> None:
+        regret = np.full(len(self.demand), -np.inf)
+        pending = np.flatnonzero(self.demand > _EPS)
+        regret[pending] = self._regrets(pending)
+        # (-regret, client), with stale entries left behind when a regret is
+        # recomputed
+        heap = list(zip((-regret[pending]).tolist(), pending.tolist()))
+        heapq.heapify(heap)
+        while heap:
+            negative, client = heapq.heappop(heap)
+            if -negative != regret[client] or negative == np.inf:
+                continue
+            regret[client] = -np.inf
+            shipped = self._fill(client, self.demand[client] - self.delivered[client])
+            # workshops used up change the regret of the clients they serve
+            workshops = np.unique(self.origin[shipped])
+            workshops = workshops[self.left[workshops] <= _EPS]
+            if len(workshops) == 0:
+                continue
+            clients = np.unique(
+                self.destination[
+                    self._segments(self.by_origin, self.origin_start, workshops)
+                ]
+            )
+            clients = clients[regret[clients] > -np.inf]
+            regret[clients] = self._regrets(clients)
+            for entry in zip((-regret[clients]).tolist(), clients.tolist()):
+                heapq.heappush(heap, entry)
+
+    def _regrets(self, clients: np.ndarray) -> np.ndarray:
+        """
+        Cost of the second cheapest usable route of every client minus its
+        cheapest; inf with a single usable route, -inf without one
+        """
+        routes = self._segments(self.order, self.start, clients)
+        usable = (self.upper[routes] - self.flow[routes] > _EPS) & (
+            self.left[self.origin[routes]] > _EPS
+        )
+        # rank of every usable route among those of its client, from 1
+        client = np.repeat(
+            np.arange(len(clients)), self.start[clients + 1] - self.start[clients]
+        )
+        rank = np.cumsum(usable)
+        rank -= np.concatenate(([0], rank))[
+            np.searchsorted(client, np.arange(len(clients)))
+        ][client]
+        cheapest = np.full(len(clients), np.nan)
+        second = np.full(len(clients), np.inf)
+        cheapest[client[usable & (rank == 1)]] = self.cost[routes[usable & (rank == 1)]]
+        second[client[usable & (rank == 2)]] = self.cost[routes[usable & (rank == 2)]]
+        regret = second - cheapest
+        regret[np.isnan(cheapest)] = -np.inf
+        return regret
+
+    @staticmethod
+    def _segments(
+        values: np.ndarray, start: np.ndarray, rows: np.ndarray
+    ) -> np.ndarray:
+        """
+        values[start[r]:start[r + 1]] of every row r of rows, concatenated
+        """
+        count = start[rows + 1] - start[rows]
+        offset = np.repeat(start[rows] - (np.cumsum(count) - count), count)
+        return values[np.arange(count.sum()) + offset]
+
+    def _fill(self, client: int, need: float) -> np.ndarray:
+        routes = self._routes(client)
+        # one route per workshop and client, so the workshop limits of the
+        # routes of a client are independent
+        available = np.minimum(
+            self.upper[routes] - self.flow[routes], self.left[self.origin[routes]]
+        )
+        available[available < _EPS] = 0.0
+        take = np.clip(need - (np.cumsum(available) - available), 0.0, available)
+        short = (take > _EPS) & (take < self.minimum[routes] - _EPS)
+        if short.any():
+            # the cumulative fill cuts through a minimum: route by route
+            take[:] = 0.0
+            for k, route in enumerate(routes.tolist()):
+                if need <= _EPS:
+                    break
+                quantity = min(need, available[k])
+                if quantity < self.minimum[route] - _EPS:
+                    if available[k] < self.minimum[route] - _EPS:
+                        continue
+                    quantity = self.minimum[route]
+                take[k] = quantity
+                need -= quantity
+        self._ship(routes, take)
+        return routes[take > 0]
+
+    def _repair(self) -> None:
+        """
+        Augmenting paths from the workshops with capacity left to the clients
+        below their demand, found breadth first in the residual network: a
+        route can take up to its upper bound and give back down to its
+        minimum. A path opening a closed route carries its minimum at least
+        (over-delivering to the client it ends at if need be); when it cannot,
+        the route is kept closed for the next searches. Every unmet client
+        reached by a search is augmented along its path before searching again.
+        """
+        n_workshops, n_clients = len(self.left), len(self.demand)
+        closed = np.zeros(len(self.flow), dtype=bool)
+        while (self.delivered < self.demand - _EPS).any():
+            n_closed = int(closed.sum())
+            # route into every client / workshop reached; -1 for the sources
+            into_client = np.full(n_clients, -2, dtype=np.int64)
+            into_workshop = np.full(n_workshops, -2, dtype=np.int64)
+            queue = np.flatnonzero(self.left > _EPS).tolist()
+            into_workshop[queue] = -1
+            for workshop in queue:
+                routes = self.by_origin[
+                    self.origin_start[workshop] : self.origin_start[workshop + 1]
+                ]
+                clients = self.destination[routes]
+                reached = (into_client[clients] == -2) & (
+                    self._forward(routes, closed) > _EPS
+                )
+                into_client[clients[reached]] = routes[reached]
+                # one route per workshop and client: the clients are distinct
+                back = self._segments(self.order, self.start, clients[reached])
+                back = back[
+                    (into_workshop[self.origin[back]] == -2)
+                    & (self._backward(back) > _EPS)
+                ]
+                workshops, first = np.unique(self.origin[back], return_index=True)
+                into_workshop[workshops] = back[first]
+                queue.extend(workshops.tolist())
+
+            targets = np.flatnonzero(
+                (into_client >= 0) & (self.delivered < self.demand - _EPS)
+            )
+            augmented = False
+            for target in targets.tolist():
+                forward, backward = [], []
+                client = target
+                while True:
+                    forward.append(into_client[client])
+                    source = self.origin[forward[-1]]
+                    if into_workshop[source] == -1:
+                        break
+                    backward.append(into_workshop[source])
+                    client = self.destination[backward[-1]]
+                forward = np.array(forward)
+                backward = np.array(backward, dtype=np.int64)
+                room = min(
+                    self.left[source],
+                    self._forward(forward, closed).min(),
+                    self._backward(backward).min(initial=np.inf),
+                )
+                # minimum of the routes the path opens
+                opened = forward[
+                    (self.flow[forward] <= _EPS) & (self.minimum[forward] > _EPS)
+                ]
+                amount = max(
+                    min(self.demand[target] - self.delivered[target], room),
+                    self.minimum[opened].max(initial=0.0),
+                )
+                if amount > room + _EPS:
+                    closed[opened] = True
+                    continue
+                if amount <= _EPS:
+                    continue
+                self._ship(
+                    np.concatenate((forward, backward)),
+                    np.repeat([amount, -amount], [len(forward), len(backward)]),
+                )
+                augmented = True
+            if not augmented and closed.sum() == n_closed:
+                break
+
+    def _forward(self, routes: np.ndarray, closed: np.ndarray) -> np.ndarray:
+        """
+        Quantity the routes can still take in _repair
+        """
+        return np.where(closed[routes], 0.0, self.upper[routes] - self.flow[routes])
+
+    def _backward(self, routes: np.ndarray) -> np.ndarray:
+        """
+        Quantity the routes can give back in _repair
+        """
+        return np.where(
+            self.minimum[routes] > _EPS,
+            self.flow[routes] - self.minimum[routes],
+            self.flow[routes],
+        )
+
+    def _improve(self) -> bool:
+        """
+        One pass of local moves over every client; True if any cost was saved.
+        """
+        improved = False
+        for client in range(len(self.demand)):
+            improved |= self._cut_excess(client)
+            improved |= self._shift(client)
+        return improved
+
+    def _cut_excess(self, client: int) -> bool:
+        excess = self.delivered[client] - self.demand[client]
+        improved = False
+        # most expensive first
+        for route in self._routes(client)[::-1].tolist():
+            if excess <= _EPS:
+                break
+            flow = self.flow[route]
+            if flow <= _EPS:
+                continue
+            # close the route, or bring it down to its minimum
+            cut = (
+                flow
+                if flow <= excess + _EPS
+                else min(excess, flow - self.minimum[route])
+            )
+            if cut > _EPS and self.cost[route] > 0:
+                self._ship(np.array([route]), np.array([-cut]))
+                excess -= cut
+                improved = True
+        return improved
+
+    def _shift(self, client: int) -> bool:
+        routes = self._routes(client)
+        improved = False
+        # from the most expensive used route to the best cheaper one
+        for k in range(len(routes) - 1, 0, -1):
+            source = routes[k]
+            flow = self.flow[source]
+            if flow <= _EPS:
+                continue
+            targets = routes[:k]
+            saving = self.cost[source] - self.cost[targets]
+            room = np.minimum(
+                self.upper[targets] - self.flow[targets],
+                self.left[self.origin[targets]],
+            )
+            # moving everything closes the source; otherwise it keeps its
+            # minimum
+            amount = np.where(room >= flow - _EPS, flow, flow - self.minimum[source])
+            amount = np.minimum(amount, room)
+            # a closed target must be opened at its minimum at least
+            opens = self.flow[targets] <= _EPS
+            amount[opens & (amount < self.minimum[targets] - _EPS)] = 0.0
+            leftover = flow - amount
+            amount[(leftover > _EPS) & (leftover < self.minimum[source] - _EPS)] = 0.0
+            gain = saving * amount
+            best = int(np.argmax(gain))
+            if gain[best] <= _EPS:
+                continue
+            self._ship(
+                np.array([source, targets[best]]),
+                np.array([-amount[best], amount[best]]),
+            )
+            improved = True
+        return improved
+
+    def _routes(self, client: int) -> np.ndarray:
+        return self.order[self.start[client] : self.start[client + 1]]
+
+    def _ship(self, routes: np.ndarray, quantity: np.ndarray) -> None:
+        self.flow[routes] += quantity
+        np.add.at(self.left, self.origin[routes], -quantity)
+        np.add.at(self.delivered, self.destination[routes], quantity)
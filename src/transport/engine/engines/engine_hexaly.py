@@ -1,14 +1,169 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
 from typing_extensions import override
 
-from transport.context import ModelData
+from transport.context import ColumnarModelData, ModelData, as_columnar
 from transport.engine.engines.abstract_engine import AbstractEngine
+from transport.engine.result import SolveResult
+from transport.engine.solve_stats import SolveStats
+
+# quantities below the route minimum by less than this count as shipped
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class HexalyProgress:
+    seconds: float  # running time
+    iterations: int
+    # incumbent objective, NaN until a feasible solution is found
+    objective: float
 
 
 class EngineHexaly(AbstractEngine):
-    
-    def __init__(self, model_data: ModelData) -> None:
+    """
+    Hexaly's local search on the EnginePyomo model, for instances too large
+    for CBC to close.
+
+    The model is stated with Hexaly's array operators: one float decision per
+    route (bounded by its transport_capacity) gathered in an array, constant
+    arrays for costs and minimum quantities, and a lambda function per
+    family of sums, so the Python side builds O(workshops + clients)
+    expressions instead of one per route. A route with a minimum quantity
+    ships iif(x >= min, x, 0), which replaces the var_is_route_used
+    binaries.
+
+    Hexaly stops at the time_limit (solver_options, Hexaly's parameter
+    names; DEFAULT_TIME_LIMIT seconds when no limit is given) and the result
+    is the best solution found: status "optimal" when Hexaly proved it,
+    "feasible" otherwise, "infeasible" when the model is proven infeasible
+    and "noSolution" when no feasible solution was found in time.
+
+    progress_callback, when set, is called every progress_interval seconds
+    with a HexalyProgress.
+    """
+
+    DEFAULT_TIME_LIMIT = 60
+
+    def __init__(self, model_data: ModelData | ColumnarModelData) -> None:
         super().__init__(model_data)
+        self.progress_callback: Callable[[HexalyProgress], None] | None = None
+        self.progress_interval: int = 1
 
     @override
-    def run(self, solver: str) -> None:
-        raise NotImplementedError
+    def run(self, solver: str) -> SolveResult:
+        # optional dependency, needs a Hexaly license
+        import hexaly.optimizer
+
+        statuses = {
+            hexaly.optimizer.HxSolutionStatus.OPTIMAL: "optimal",
+            hexaly.optimizer.HxSolutionStatus.FEASIBLE: "feasible",
+            hexaly.optimizer.HxSolutionStatus.INCONSISTENT: "infeasible",
+            hexaly.optimizer.HxSolutionStatus.INFEASIBLE: "noSolution",
+        }
+        data = as_columnar(self.data)
+        self.stats = SolveStats()
+        with hexaly.optimizer.HexalyOptimizer() as optimizer:
+            with self.stats.phase("build"):
+                self._build_model(optimizer.model, data)
+            self._set_params(optimizer.param)
+            if self.progress_callback is not None:
+                optimizer.param.time_between_ticks = self.progress_interval
+                optimizer.add_callback(
+                    hexaly.optimizer.HxCallbackType.TIME_TICKED, self._on_tick
+                )
+            with self.stats.phase("solve"):
+                optimizer.solve()
+            self.stats.iterations = int(optimizer.statistics.nb_iterations)
+
+            status = statuses[optimizer.solution.status]
+            if status not in ("optimal", "feasible"):
+                return SolveResult(
+                    status=status,
+                    objective=float("nan"),
+                    transport_quantity={},
+                    solver=solver,
+                )
+            with self.stats.phase("extract"):
+                quantities = np.array([x.value for x in self._x], dtype=float)
+
+        with self.stats.phase("extract"):
+            # what the model ships: nothing on a route below its minimum
+            quantities[quantities < data.min_transport_quantity - _EPS] = 0.0
+            return SolveResult(
+                status=status,
+                objective=float(data.route_cost @ quantities),
+                transport_quantity=dict(zip(data.route_ids, quantities.tolist())),
+                solver=solver,
+            )
+
+    def _build_model(self, model: Any, data: ColumnarModelData) -> None:
+        # decisions are the only per-route objects
+        self._x = [
+            model.float(0.0, bound) for bound in data.transport_capacity.tolist()
+        ]
+        x = model.array(self._x)
+
+        if data.min_transport_quantity.any():
+            minimum = model.array(data.min_transport_quantity.tolist())
+
+            def quantity(j: Any) -> Any:
+                return model.iif(
+                    model.at(x, j) >= model.at(minimum, j), model.at(x, j), 0.0
+                )
+
+        else:
+
+            def quantity(j: Any) -> Any:
+                return model.at(x, j)
+
+        # sum of quantity over the routes of every workshop / client: their
+        # positions in CSR order, and one lambda over a range of them
+        for (indptr, indices), limits, is_capacity in (
+            (data.csr_by_origin(), data.production_capacity, True),
+            (data.csr_by_destination(), data.demand, False),
+        ):
+            routes = model.array(indices.tolist())
+            term = model.lambda_function(
+                lambda k, routes=routes: quantity(model.at(routes, k))
+            )
+            for start, stop, limit in zip(
+                indptr[:-1].tolist(), indptr[1:].tolist(), limits.tolist()
+            ):
+                total = model.sum(model.range(start, stop), term)
+                model.constraint(total <= limit if is_capacity else total >= limit)
+
+        cost = model.array(data.route_cost.tolist())
+        self._objective = model.sum(
+            model.range(0, len(self._x)),
+            model.lambda_function(lambda j: model.at(cost, j) * quantity(j)),
+        )
+        model.minimize(self._objective)
+        model.close()
+
+    def _set_params(self, param: Any) -> None:
+        param.verbosity = 0
+        if not {"time_limit", "iteration_limit"} & set(self.solver_options):
+            param.time_limit = self.DEFAULT_TIME_LIMIT
+        for name, value in self.solver_options.items():
+            setattr(param, name, value)
+
+    def _on_tick(self, optimizer: Any, _: Any) -> None:
+        import hexaly.optimizer
+
+        feasible = optimizer.solution.status in (
+            hexaly.optimizer.HxSolutionStatus.OPTIMAL,
+            hexaly.optimizer.HxSolutionStatus.FEASIBLE,
+        )
+        statistics = optimizer.statistics
+        self.progress_callback(
+            HexalyProgress(
+                seconds=float(statistics.running_time),
+                iterations=int(statistics.nb_iterations),
+                objective=float(self._objective.value) if feasible else float("nan"),
+            )
+        )
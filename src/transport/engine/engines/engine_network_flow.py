@@ -0,0 +1,489 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from typing_extensions import override
+
+from transport.context import ColumnarModelData, ModelData, as_columnar
+from transport.engine.engines.abstract_engine import AbstractEngine
+from transport.engine.engines.engine_file import EngineFile
+from transport.engine.engines.engine_pyomo import EnginePyomo
+from transport.engine.result import SolveResult
+from transport.engine.solve_stats import SolveStats
+
+# reduced costs / quantities below this, relative to the largest cost /
+# supply, count as zero
+_EPS = 1e-9
+
+
+class EngineNetworkFlow(AbstractEngine):
+    """
+    Solves instances without minimum transport quantities as a min-cost flow,
+    with no external solver.
+
+    When no route has min_transport_quantity > 0 the EnginePyomo model is a
+    pure transportation LP (the var_is_route_used binaries and big-M rows are
+    redundant). It is solved exactly on the network
+
+        source -> workshop   capacity production_capacity, cost production_cost
+        workshop -> client   capacity transport_capacity,  cost transport_cost
+
+    the source supplying the total demand and every client taking its own, by
+    the primal network simplex (see _NetworkSimplex).
+
+    Instances with minimum quantities are handed to EnginePyomo with
+    fallback_solver. max_routes (None: no limit) hands the larger instances
+    to fallback_solver as the LP they are (the "tight" formulation, without
+    binaries): with EngineFile on an LP file for "cbc", with EnginePyomo
+    otherwise.
+    """
+
+    def __init__(
+        self,
+        model_data: ModelData | ColumnarModelData,
+        fallback_solver: str = "cbc",
+        max_routes: int | None = None,
+    ) -> None:
+        super().__init__(model_data)
+        self.fallback_solver: str = fallback_solver
+        self.max_routes: int | None = max_routes
+
+    @staticmethod
+    def is_pure_transportation(model_data: ModelData | ColumnarModelData) -> bool:
+        if isinstance(model_data, ColumnarModelData):
+            return not model_data.min_transport_quantity.any()
+        return all(r.min_transport_quantity == 0 for r in model_data.routes)
+
+    @override
+    def run(self, solver: str) -> SolveResult:
+        if not self.is_pure_transportation(self.data):
+            return self._fall_back(EnginePyomo(self.data), self.fallback_solver)
+        if self.max_routes is not None and _n_routes(self.data) > self.max_routes:
+            if self.fallback_solver == "cbc":
+                engine, solver = EngineFile(self.data), "cbc_lp"
+            else:
+                engine, solver = EnginePyomo(self.data), self.fallback_solver
+            engine.formulation = "tight"
+            return self._fall_back(engine, solver)
+
+        self.stats = SolveStats()
+        with self.stats.phase("build"):
+            data = as_columnar(self.data)
+            simplex = self._build_network(data)
+        # the transportation LP this network solves
+        self.stats.set_model_size(
+            n_workshops=len(data.workshop_ids),
+            n_clients=len(data.client_ids),
+            n_routes=len(data.route_ids),
+            n_binaries=0,
+        )
+
+        with self.stats.phase("solve"):
+            self.stats.iterations = simplex.solve()
+        if not simplex.is_feasible():
+            return SolveResult(
+                status="infeasible",
+                objective=float("nan"),
+                transport_quantity={},
+                solver=solver,
+            )
+
+        with self.stats.phase("extract"):
+            flow = simplex.flow()[: len(data.route_ids)]
+            route_cost = data.transport_cost + data.production_cost[data.route_origin]
+            objective = float(flow @ route_cost)
+            # the simplex stops on an optimal basis: its potentials prove it
+            return SolveResult(
+                status="optimal",
+                objective=objective,
+                transport_quantity=dict(zip(data.route_ids, flow.tolist())),
+                solver=solver,
+                bound=objective,
+                gap=0.0,
+            )
+
+    def _fall_back(self, engine: AbstractEngine, solver: str) -> SolveResult:
+        engine.solver_options = self.solver_options
+        result = engine.run(solver)
+        self.stats = engine.stats
+        return result
+
+    @staticmethod
+    def _build_network(data: ColumnarModelData) -> _NetworkSimplex:
+        """
+        Nodes: the source (0), the workshops (1..), the clients (then); arcs:
+        the routes, in the order of data.route_ids, then source -> workshop.
+
+        The starting basis fills every client from its cheapest routes, and
+        keeps at every workshop the cheapest of those routes its capacity
+        allows. The routes used to capacity start at their upper bound; a
+        client met in full has the last route it uses in the tree, the others
+        get the rest of their demand on their artificial arc.
+        """
+        n_workshops, n_clients = len(data.workshop_ids), len(data.client_ids)
+        n_routes = len(data.route_ids)
+        origin, destination = data.route_origin, data.route_destination
+        capacity, demand = data.transport_capacity, data.demand
+        cost = data.transport_cost + data.production_cost[origin]
+
+        # cheapest routes first: what each of them takes of its client
+        order = np.lexsort((cost, destination))
+        before = np.cumsum(capacity[order]) - capacity[order]
+        before -= before[np.searchsorted(destination[order], destination[order])]
+        take = np.zeros(n_routes)
+        take[order] = np.clip(demand[destination[order]] - before, 0.0, capacity[order])
+        # the cheapest ones a workshop can supply
+        order = np.lexsort((cost, origin))
+        load = np.cumsum(take[order])
+        load -= np.concatenate(([0.0], load))[
+            np.searchsorted(origin[order], origin[order])
+        ]
+        take[order[load > data.production_capacity[origin[order]]]] = 0.0
+
+        met = np.bincount(destination, take, minlength=n_clients) >= demand
+        met &= demand > 0
+        partial = (take > 0) & (take < capacity)
+        # a client short of its demand keeps only routes at capacity
+        take[partial & ~met[destination]] = 0.0
+        used = np.flatnonzero(take > 0)
+        # the tree route of a met client: its partial one, else any
+        last = used[np.lexsort((partial[used], destination[used]))]
+        is_last = np.ones(len(last), dtype=bool)
+        is_last[:-1] = destination[last][1:] != destination[last][:-1]
+        last = last[is_last]
+        last = last[met[destination[last]]]
+
+        tree = np.full(1 + n_workshops + n_clients, -1)
+        tree[1 + n_workshops + destination[last]] = last
+        supplying = np.unique(origin[used])
+        tree[1 + supplying] = n_routes + supplying
+        upper = np.zeros(n_routes + n_workshops, dtype=bool)
+        upper[used] = True
+        upper[last] = False
+        return _NetworkSimplex(
+            source=np.concatenate((origin + 1, np.zeros(n_workshops, dtype=np.int64))),
+            target=np.concatenate(
+                (destination + 1 + n_workshops, np.arange(1, n_workshops + 1))
+            ),
+            cost=np.concatenate((data.transport_cost, data.production_cost)),
+            capacity=np.concatenate(
+                (data.transport_capacity, data.production_capacity)
+            ),
+            supply=np.concatenate(
+                ([data.demand.sum()], np.zeros(n_workshops), -data.demand)
+            ),
+            tree=tree,
+            upper=upper,
+        )
+
+
+def _n_routes(model_data: ModelData | ColumnarModelData) -> int:
+    if isinstance(model_data, ColumnarModelData):
+        return len(model_data.route_ids)
+    return len(model_data.routes)
+
+
+class _NetworkSimplex:
+    """
+    Primal network simplex of min cost @ flow, 0 <= flow <= capacity, the
+    flow leaving every node minus the flow entering it equal to its supply.
+
+    The basis is a spanning tree rooted at an artificial node, joined to
+    every other node by an artificial arc: the initial tree carries the
+    supplies on them, at a cost above that of any path of real arcs, so they
+    all leave the tree when the problem is feasible. Every other arc is at
+    its lower (state 1) or upper (state -1) bound; node potentials pi give
+    the tree arcs a zero reduced cost (cost + pi[source] - pi[target]).
+
+    A pivot brings in the arc of most negative state * reduced cost of the
+    next block of arcs, pushes flow around the cycle it closes in the tree
+    and takes out the last blocking arc met from the join node, which keeps
+    the tree strongly feasible and the method finite (as in LEMON's
+    NetworkSimplex). The tree is kept in preorder in a NumPy array, with the
+    position and subtree size of every node: a subtree is a slice of it, so
+    the subtree moving to its new parent is re-rooted and shifted to its new
+    potentials with array operations, and the Python loops only walk the
+    cycle.
+    """
+
+    def __init__(
+        self,
+        source: np.ndarray,
+        target: np.ndarray,
+        cost: np.ndarray,
+        capacity: np.ndarray,
+        supply: np.ndarray,
+        tree: np.ndarray | None = None,
+        upper: np.ndarray | None = None,
+    ) -> None:
+        """
+        A starting basis: tree, the arc joining every node to its parent (-1:
+        the artificial arc to the root), and upper, the arcs at capacity. The
+        flows it leaves on the tree arcs must be within bounds, positive on
+        the arcs pointing down and below capacity on those pointing up (a
+        strongly feasible tree). None: the artificial arcs alone.
+        """
+        n_nodes, n_arcs = len(supply), len(source)
+        root = n_nodes
+        nodes = np.arange(n_nodes)
+        if tree is None:
+            tree = np.full(n_nodes, -1)
+        if upper is None:
+            upper = np.zeros(n_arcs, dtype=bool)
+        up = supply >= 0
+        scale = 1.0 + float(np.abs(cost).max(initial=0.0))
+        artificial = scale * (n_nodes + 1)
+
+        # artificial arcs: node -> root for the nodes with a supply, root ->
+        # node (at the artificial cost) for those with a demand
+        self.n_arcs = n_arcs
+        self.source = np.concatenate((source, np.where(up, nodes, root))).astype(
+            np.int64
+        )
+        self.target = np.concatenate((target, np.where(up, root, nodes))).astype(
+            np.int64
+        )
+        self.cost = np.concatenate((cost, np.where(up, 0.0, artificial)))
+        self.capacity = np.concatenate((capacity, np.full(n_nodes, np.inf)))
+        self.tolerance = _EPS * scale
+        self.flow_tolerance = _EPS * (1.0 + float(np.abs(supply).max(initial=0.0)))
+
+        # the tree: parent, arc to the parent, whether it points up and its
+        # flow and capacity, of every node; the preorder, the position of every
+        # node in it, and the size of every subtree
+        pred = np.where(tree >= 0, tree, n_arcs + nodes)
+        up = self.source[pred] == nodes
+        self.parent: list[int] = np.where(
+            up, self.target[pred], self.source[pred]
+        ).tolist() + [-1]
+        self.pred: list[int] = pred.tolist() + [-1]
+        self.up: list[bool] = up.tolist() + [False]
+        self.pred_capacity: list[float] = self.capacity[pred].tolist() + [0.0]
+        children: list[list[int]] = [[] for _ in range(n_nodes + 1)]
+        for node, above in enumerate(self.parent[:-1]):
+            children[above].append(node)
+        order, stack = [], [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(children[node])
+        self.order = np.array(order, dtype=np.int64)
+        self.position = np.empty(n_nodes + 1, dtype=np.int64)
+        self.position[self.order] = np.arange(n_nodes + 1)
+
+        # flows of the tree arcs: what the subtree below them supplies, besides
+        # the arcs at capacity
+        at_capacity = np.where(upper, capacity, 0.0)
+        below = (
+            supply
+            - np.bincount(self.source[:n_arcs], at_capacity, minlength=n_nodes)
+            + np.bincount(self.target[:n_arcs], at_capacity, minlength=n_nodes)
+        ).tolist() + [0.0]
+        self.size: list[int] = [1] * (n_nodes + 1)
+        for node in reversed(order[1:]):
+            below[self.parent[node]] += below[node]
+            self.size[self.parent[node]] += self.size[node]
+        self.pred_flow: list[float] = [
+            flow if node_up else -flow for flow, node_up in zip(below, self.up)
+        ]
+        self.state = np.ones(n_arcs + n_nodes, dtype=np.int8)
+        self.state[:n_arcs][upper] = -1
+        self.state[pred] = 0
+
+        # potentials: a zero reduced cost on every tree arc, from the root down
+        pi = [0.0] * (n_nodes + 1)
+        tree_cost = self.cost[pred].tolist()
+        for node in order[1:]:
+            above = pi[self.parent[node]]
+            pi[node] = (
+                above - tree_cost[node] if self.up[node] else above + tree_cost[node]
+            )
+        self.pi = np.array(pi)
+
+        # the arcs again, for the pivots in Python
+        self.arc_source: list[int] = self.source.tolist()
+        self.arc_target: list[int] = self.target.tolist()
+        self.arc_cost: list[float] = self.cost.tolist()
+        self.arc_capacity: list[float] = self.capacity.tolist()
+
+        # pricing: blocks of arcs, scanned round robin
+        self.block = max(1024, math.isqrt(len(self.cost)))
+        self.next_block = 0
+
+    def solve(self) -> int:
+        """
+        Pivot until no arc prices out; returns the number of pivots
+        """
+        pivots = 0
+        while True:
+            arc = self._entering_arc()
+            if arc < 0:
+                return pivots
+            self._pivot(arc)
+            pivots += 1
+
+    def flow(self) -> np.ndarray:
+        """
+        Flow of every arc, the artificial ones last
+        """
+        flow = np.where(self.state == -1, self.capacity, 0.0)
+        flow[self.pred[:-1]] = self.pred_flow[:-1]
+        return flow
+
+    def is_feasible(self) -> bool:
+        """
+        Whether the optimal basis carries no flow on an artificial arc
+        """
+        return bool((self.flow()[self.n_arcs :] <= self.flow_tolerance).all())
+
+    def _entering_arc(self) -> int:
+        n_arcs = len(self.cost)
+        for _ in range(-(-n_arcs // self.block)):
+            start = self.next_block
+            end = min(start + self.block, n_arcs)
+            self.next_block = 0 if end == n_arcs else end
+            block = slice(start, end)
+            violation = self.pi[self.source[block]]
+            violation -= self.pi[self.target[block]]
+            violation += self.cost[block]
+            violation *= self.state[block]
+            best = violation.argmin()
+            if violation[best] < -self.tolerance:
+                return start + int(best)
+        return -1
+
+    def _pivot(self, arc: int) -> None:
+        parent, pred, up = self.parent, self.pred, self.up
+        pred_flow, pred_capacity = self.pred_flow, self.pred_capacity
+        state = int(self.state[arc])
+        source, target = self.arc_source[arc], self.arc_target[arc]
+        # the cycle pushes flow from first to second on arc
+        first, second = (source, target) if state == 1 else (target, source)
+
+        # join: the lowest common ancestor, the tree being shallow
+        ancestors = set()
+        node = first
+        while node >= 0:
+            ancestors.add(node)
+            node = parent[node]
+        join = second
+        while join not in ancestors:
+            join = parent[join]
+
+        # leaving arc: the last one of the cycle, from join, that blocks it
+        delta = self.arc_capacity[arc]
+        leaving, side = -1, 0
+        node = first
+        while node != join:
+            flow = pred_flow[node]
+            room = flow if up[node] else pred_capacity[node] - flow
+            if room < delta:
+                delta, leaving, side = room, node, 1
+            node = parent[node]
+        node = second
+        while node != join:
+            flow = pred_flow[node]
+            room = pred_capacity[node] - flow if up[node] else flow
+            if room <= delta:
+                delta, leaving, side = room, node, 2
+            node = parent[node]
+
+        if delta > 0:
+            change = state * delta
+            node = source
+            while node != join:
+                pred_flow[node] += -change if up[node] else change
+                node = parent[node]
+            node = target
+            while node != join:
+                pred_flow[node] += change if up[node] else -change
+                node = parent[node]
+        if side == 0:  # arc goes from one bound to the other
+            self.state[arc] = -state
+            return
+
+        # the leaving arc at the bound it reached
+        flow = pred_flow[leaving]
+        self.state[pred[leaving]] = (
+            1 if abs(flow) <= abs(pred_capacity[leaving] - flow) else -1
+        )
+        self.state[arc] = 0
+        # the subtree below the leaving arc moves under the other end of arc,
+        # re-rooted at the end it holds
+        u_in, v_in = (first, second) if side == 1 else (second, first)
+        arc_flow = (0.0 if state == 1 else self.arc_capacity[arc]) + state * delta
+        self._move_subtree(u_in, v_in, leaving, arc, arc_flow, join)
+
+    def _move_subtree(
+        self,
+        u_in: int,
+        v_in: int,
+        u_out: int,
+        arc: int,
+        arc_flow: float,
+        join: int,
+    ) -> None:
+        parent, pred, up, size = self.parent, self.pred, self.up, self.size
+        pred_flow, pred_capacity = self.pred_flow, self.pred_capacity
+        order, position = self.order, self.position
+
+        # stem: the path from u_in up to u_out, whose arcs turn around
+        stem = [u_in]
+        while stem[-1] != u_out:
+            stem.append(parent[stem[-1]])
+        starts = position[stem].tolist()
+        sizes = [size[node] for node in stem]
+
+        # preorder of the re-rooted subtree: every stem node with its subtree
+        # but the one of the stem node below it
+        pieces = [order[starts[0] : starts[0] + sizes[0]]]
+        for i in range(1, len(stem)):
+            pieces.append(order[starts[i] : starts[i - 1]])
+            pieces.append(order[starts[i - 1] + sizes[i - 1] : starts[i] + sizes[i]])
+        moved = np.concatenate(pieces) if len(pieces) > 1 else pieces[0].copy()
+        begin, count = starts[-1], sizes[-1]
+        at = int(position[v_in])
+        end = at + size[v_in]
+
+        # sizes along both sides of the cycle, below the join
+        node = parent[u_out]
+        while node != join:
+            size[node] -= count
+            node = parent[node]
+        node = v_in
+        while node != join:
+            size[node] += count
+            node = parent[node]
+        size[u_in] = count
+        for i in range(1, len(stem)):
+            size[stem[i]] = count - sizes[i - 1]
+
+        # the moved subtree becomes the last child of v_in when it comes from
+        # the right, its first one otherwise (also when v_in holds it): only
+        # the positions between its old and new place change
+        if at < begin:
+            low = end if end <= begin else at + 1
+            high = begin + count
+            order[low:high] = np.concatenate((moved, order[low:begin]))
+        else:
+            low, high = begin, at + 1
+            order[low:high] = np.concatenate((order[begin + count : at + 1], moved))
+        position[order[low:high]] = np.arange(low, high)
+
+        # turn the stem around
+        for i in range(len(stem) - 1, 0, -1):
+            node, below = stem[i], stem[i - 1]
+            parent[node] = below
+            pred[node] = pred[below]
+            up[node] = not up[below]
+            pred_flow[node] = pred_flow[below]
+            pred_capacity[node] = pred_capacity[below]
+        parent[u_in], pred[u_in] = v_in, arc
+        up[u_in] = self.arc_source[arc] == u_in
+        pred_flow[u_in], pred_capacity[u_in] = arc_flow, self.arc_capacity[arc]
+
+        # potentials: a zero reduced cost on arc
+        sigma = self.pi[v_in] - self.pi[u_in]
+        sigma += -self.arc_cost[arc] if up[u_in] else self.arc_cost[arc]
+        self.pi[moved] += sigma
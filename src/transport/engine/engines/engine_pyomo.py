@@ -1,28 +1,78 @@
 from __future__ import annotations
 
+import math
+from collections.abc import Mapping
+from dataclasses import replace
+
 import pyomo.environ as pyo
-from pyomo.opt import TerminationCondition
+from pyomo.core.expr.visitor import identify_variables
 from typing_extensions import override
 
-from transport.engine.result import SolveResult
-from transport.context import ModelData
+from transport.engine.result import Sensitivity, SolveResult, relative_gap
+from transport.engine.sensitivity import declare_suffixes, model_sensitivity
+from transport.engine.solve_stats import SolveStats
+from transport.context import ModelData, Route
 from transport.engine.engines.abstract_engine import AbstractEngine
+from transport.engine.model_file import cbc_summary
+
+# quantities below this count as an unused route in a warm start
+_EPS = 1e-9
+
+# terminations on a solver limit, which may leave an incumbent
+_LIMIT_CONDITIONS = (
+    pyo.TerminationCondition.maxTimeLimit,
+    pyo.TerminationCondition.maxIterations,
+    pyo.TerminationCondition.maxEvaluations,
+)
+
+# log line of each solver when it accepts a warm start
+_WARM_START_ACCEPTED = {
+    "cbc": ("MIPStart provided solution",),
+    "gurobi": ("Loaded user MIP start", "User MIP start produced solution"),
+}
 
 
 class EnginePyomo(AbstractEngine):
     def __init__(self, model_data: ModelData) -> None:
         super().__init__(model_data)
         self.BIG_M = 1e6
+        # "big_m": a var_is_route_used binary on every route, bounded by BIG_M
+        # "tight": binaries only on routes with a minimum transport quantity,
+        #          each bounded by ModelData.route_quantity_bound
+        self.formulation: str = "big_m"
+        # route_id -> quantity the solver starts from (e.g. the previous
+        # SolveResult.transport_quantity); missing routes start at 0
+        self.warm_start: Mapping[str, float] | None = None
+        # after run(): whether the solver used warm_start, None when no start
+        # was given or the solver does not say
+        self.warm_start_accepted: bool | None = None
+        # add the duals and reduced costs of the solution to the result
+        # (SolveResult.sensitivity)
+        self.sensitivity: bool = False
 
     @override
     def run(self, solver: str) -> SolveResult:
-        self._build_model()
+        self.stats = SolveStats()
+        with self.stats.phase("build"):
+            self._build_model()
+        self._record_model_size()
+        if self.sensitivity and not len(self.model.var_is_route_used):
+            # an LP: the solve itself reports them
+            declare_suffixes(self.model)
         results = self._solve_model(solver)
-
+        with self.stats.phase("extract"):
+            result = self._solve_result(results, solver)
+        if self.sensitivity and result.transport_quantity:
+            with self.stats.phase("sensitivity"):
+                result = replace(result, sensitivity=self._sensitivity(solver))
+        return result
+
+    def _solve_result(self, results, solver: str) -> SolveResult:
         term = results.solver.termination_condition
+        self._record_solver_stats(results)
 
         # If infeasible/unbounded/etc, do NOT read vars
-        if term not in (TerminationCondition.optimal, TerminationCondition.feasible):
+        if not self._check_solution_status(results):
             return SolveResult(
                 status=str(term),
                 objective=float("nan"),
@@ -35,14 +85,40 @@ class EnginePyomo(AbstractEngine):
             route_id: float(pyo.value(var))
             for route_id, var in self.model.var_transport_quantity.items()
         }
+        objective = float(pyo.value(self.model.objective))
+        bound = self._solution_bound(results, objective)
 
         return SolveResult(
             status=str(term),
-            objective=float(pyo.value(self.model.objective)),
+            objective=objective,
             transport_quantity=transport_quantity,
             solver=solver,
+            bound=bound,
+            gap=relative_gap(objective, bound),
         )
 
+    def _sensitivity(self, solver: str) -> Sensitivity | None:
+        """
+        Duals and reduced costs of the solution in the model; for a MIP, of
+        the LP with var_is_route_used fixed at the solution, solved again
+        """
+        binaries = list(self.model.var_is_route_used.values())
+        if not binaries:
+            return model_sensitivity(self.model, solver, self.solver_options)
+        for var in binaries:
+            var.fix(round(var.value))
+        declare_suffixes(self.model)
+        try:
+            results = self.solver_obj.solve(
+                self.model, tee=False, options=self.solver_options
+            )
+            if not self._check_solution_status(results):
+                return None
+            return model_sensitivity(self.model, solver, self.solver_options)
+        finally:
+            for var in binaries:
+                var.unfix()
+
     def _build_model(self) -> None:
         self.model = pyo.ConcreteModel()
 
@@ -54,10 +130,85 @@ class EnginePyomo(AbstractEngine):
 
     def _solve_model(self, solver: str):
         solver_obj = pyo.SolverFactory(solver)
-        results = solver_obj.solve(self.model, tee=False)
+        warm_start = self.warm_start is not None
+        if warm_start:
+            self._load_warm_start()
+        # Pyomo writes the problem file within solve()
+        with self.stats.phase("solve"):
+            results = solver_obj.solve(
+                self.model,
+                tee=False,
+                options=self.solver_options,
+                **self._warm_start_options(solver_obj, warm_start),
+            )
+        if warm_start:
+            self.warm_start_accepted = self._check_warm_start(solver_obj)
         self.solver = solver
+        self.solver_obj = solver_obj
         return results
 
+    def _record_model_size(self) -> None:
+        """
+        Size of the model as built, rather than as SolveStats.set_model_size
+        expects it from the data
+        """
+        self.stats.variables = self.model.nvariables()
+        self.stats.binaries = len(self.model.var_is_route_used)
+        self.stats.constraints = self.model.nconstraints()
+        self.stats.nonzeros = self._count_nonzeros()
+
+    def _count_nonzeros(self) -> int:
+        """
+        Variables of every active constraint (the fixed ones are constants)
+        """
+        return sum(
+            sum(1 for _ in identify_variables(constraint.body, include_fixed=False))
+            for constraint in self.model.component_data_objects(
+                pyo.Constraint, active=True
+            )
+        )
+
+    def _record_solver_stats(self, results) -> None:
+        statistics = results.solver.statistics
+        nodes = statistics.branch_and_bound.number_of_bounded_subproblems
+        iterations = statistics.black_box.number_of_iterations
+        self.stats.nodes = int(nodes) if _finite(nodes) else None
+        self.stats.iterations = int(iterations) if _finite(iterations) else None
+
+    def _load_warm_start(self) -> None:
+        """
+        Give the variables the values of warm_start, with var_is_route_used
+        set on the routes that ship.
+        """
+        start = self.warm_start
+        for route_id, var in self.model.var_transport_quantity.items():
+            var.set_value(float(start.get(route_id, 0.0)), skip_validation=True)
+        for route_id, var in self.model.var_is_route_used.items():
+            var.set_value(1 if start.get(route_id, 0.0) > _EPS else 0)
+
+    @staticmethod
+    def _warm_start_options(solver_obj, warm_start: bool) -> dict:
+        if not warm_start or not _takes_warm_start(solver_obj):
+            return {}
+        options = {"warmstart": True}
+        if solver_obj.name == "cbc":
+            # CBC matches the start to the model's columns by name
+            options["symbolic_solver_labels"] = True
+        return options
+
+    @staticmethod
+    def _check_warm_start(solver_obj) -> bool | None:
+        """
+        Whether the last solve used the warm start, from the solver log
+        """
+        if not _takes_warm_start(solver_obj):
+            return False
+        patterns = _WARM_START_ACCEPTED.get(_solver_family(solver_obj))
+        log = getattr(solver_obj, "_log", None)
+        if patterns is None or not log:
+            return None
+        return any(pattern in log for pattern in patterns)
+
     def _build_solution(self) -> None:
         self.data.transport_quantity = {
             self.data.routes_by_id[route_id]: float(pyo.value(value))
@@ -80,13 +231,22 @@ class EnginePyomo(AbstractEngine):
             dimen=1,
             initialize=[r.id_ for r in self.data.routes],
         )
+        # [Routes] that need var_is_route_used
+        self.model.routes_min_quantity = pyo.Set(  # type: ignore
+            dimen=1,
+            initialize=[
+                r.id_
+                for r in self.data.routes
+                if self.formulation == "big_m" or r.min_transport_quantity > 0
+            ],
+        )
 
     def _build_variables(self) -> None:
         self.model.var_transport_quantity = pyo.Var(  # type: ignore
             self.model.routes,
             within=pyo.NonNegativeReals,  # type: ignore
         )
-        self.model.var_is_route_used = pyo.Var(self.model.routes, within=pyo.Binary)  # type: ignore
+        self.model.var_is_route_used = pyo.Var(self.model.routes_min_quantity, within=pyo.Binary)  # type: ignore
 
     def _build_expressions(self) -> None:
         self.model.expression_routes_cost = pyo.Expression(
@@ -110,12 +270,12 @@ class EnginePyomo(AbstractEngine):
         )
 
         self.model.constraint_min_transport_quantity_1 = pyo.Constraint(
-            self.model.routes,
+            self.model.routes_min_quantity,
             rule=self._const_min_transport_quantity_1,  # type: ignore
         )
 
         self.model.constraint_min_transport_quantity_2 = pyo.Constraint(
-            self.model.routes,
+            self.model.routes_min_quantity,
             rule=self._const_min_transport_quantity_2,  # type: ignore
         )
 
@@ -128,24 +288,32 @@ class EnginePyomo(AbstractEngine):
         route = self.data.routes_by_id[route_id]
         return self.model.var_transport_quantity[route_id] * route.transport_cost
 
+    @staticmethod
+    def _trivial(constraint):
+        """
+        The rule of a workshop / client without routes compares two numbers:
+        Pyomo takes the outcome as Constraint.Feasible / Infeasible
+        """
+        if isinstance(constraint, bool):
+            return pyo.Constraint.Feasible if constraint else pyo.Constraint.Infeasible
+        return constraint
+
     def _const_workshop_capacity(self, _: pyo.ConcreteModel, workshop_id: str):
         workshop = self.data.workshops_by_id[workshop_id]
-        return (
+        return self._trivial(
             sum(
-                self.model.var_transport_quantity[route_id]
-                for route_id in self.model.routes
-                if self.data.routes_by_id[route_id].origin == workshop_id
+                self.model.var_transport_quantity[route.id_]
+                for route in self.data.routes_by_origin[workshop_id]
             )
             <= workshop.production_capacity
         )
 
     def _const_client_demand(self, _: pyo.ConcreteModel, client_id: str):
         client = self.data.clients_by_id[client_id]
-        return (
+        return self._trivial(
             sum(
-                self.model.var_transport_quantity[route_id]
-                for route_id in self.model.routes
-                if self.data.routes_by_id[route_id].destination == client.id_
+                self.model.var_transport_quantity[route.id_]
+                for route in self.data.routes_by_destination[client.id_]
             )
             >= client.demand
         )
@@ -158,7 +326,7 @@ class EnginePyomo(AbstractEngine):
         route = self.data.routes_by_id[route_id]
         return (
             self.model.var_transport_quantity[route_id]
-            <= self.model.var_is_route_used[route_id] * self.BIG_M
+            <= self.model.var_is_route_used[route_id] * self._route_big_m(route)
         )
 
     def _const_min_transport_quantity_2(self, _: pyo.ConcreteModel, route_id: str):
@@ -168,6 +336,11 @@ class EnginePyomo(AbstractEngine):
             >= self.model.var_is_route_used[route_id] * route.min_transport_quantity
         )
 
+    def _route_big_m(self, route: Route) -> float:
+        if self.formulation == "big_m":
+            return self.BIG_M
+        return self.data.route_quantity_bound(route)
+
     def _objective_function(self, _: pyo.ConcreteModel):
         transport_cost = sum(
             self.model.expression_routes_cost[route_id]
@@ -177,29 +350,72 @@ class EnginePyomo(AbstractEngine):
         production_cost = sum(
             self.data.workshops_by_id[workshop_id].production_cost
             * sum(
-                self.model.var_transport_quantity[route_id]
-                for route_id in self.model.routes
-                if self.data.routes_by_id[route_id].origin == workshop_id
+                self.model.var_transport_quantity[route.id_]
+                for route in self.data.routes_by_origin[workshop_id]
             )
             for workshop_id in self.model.workshops
         )
 
         return transport_cost + production_cost
 
-    def _check_solution_status(self) -> None:
-        status = self.solution.solver.status
-        termination_cause = self.solution.solver.termination_condition
-        cause_termination_is_time = (
-            termination_cause == pyo.TerminationCondition.maxTimeLimit
-        )
+    def _check_solution_status(self, results) -> bool:
+        """
+        Whether the solve left a solution in the model: an optimal / feasible
+        one, or the incumbent of a solve stopped by a limit (time, nodes,
+        iterations).
+        """
+        status = results.solver.status
+        termination_cause = results.solver.termination_condition
+        cause_termination_is_limit = termination_cause in _LIMIT_CONDITIONS
         feasible = (
             termination_cause == pyo.TerminationCondition.optimal
             or termination_cause == pyo.TerminationCondition.feasible
         )
-        solution_status = (
+        # a solve stopped before its first incumbent has no upper bound (and
+        # loads meaningless values)
+        has_incumbent = _finite(results.problem.upper_bound)
+        return (
             (status == pyo.SolverStatus.ok and feasible)
-            or (status == pyo.SolverStatus.aborted and cause_termination_is_time)
-            or (status == pyo.SolverStatus.ok and cause_termination_is_time)
+            or (
+                status == pyo.SolverStatus.aborted
+                and cause_termination_is_limit
+                and has_incumbent
+            )
+            or (
+                status == pyo.SolverStatus.ok
+                and cause_termination_is_limit
+                and has_incumbent
+            )
         )
-        if not solution_status:
-            raise Exception("Solver failed to find a solution.")
+
+    def _solution_bound(self, results, objective: float) -> float:
+        """
+        Lower bound on the optimum reported by the solver, NaN if unknown
+        """
+        bound = results.problem.lower_bound
+        if _finite(bound):
+            return float(bound)
+        # Pyomo drops the bound of CBC's summary when CBC also prints a gap
+        summary = cbc_summary(getattr(self.solver_obj, "_log", None) or "")
+        if "lower_bound" in summary:
+            return summary["lower_bound"]
+        if results.solver.termination_condition == pyo.TerminationCondition.optimal:
+            return objective
+        return float("nan")
+
+
+def _finite(value) -> bool:
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def _solver_family(solver_obj) -> str:
+    # "gurobi_persistent" -> "gurobi"
+    return solver_obj.name.split("_")[0]
+
+
+def _takes_warm_start(solver_obj) -> bool:
+    # CBC builds without a version number (e.g. devel) say they are not
+    # warm-start capable, but read -mipstart all the same
+    return bool(solver_obj.warm_start_capable()) or (
+        _solver_family(solver_obj) in _WARM_START_ACCEPTED
+    )
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.common.gc_manager import PauseGC
+from pyomo.core.expr.numeric_expr import LinearExpression, MonomialTermExpression
+from typing_extensions import override
+
+from transport.context import ColumnarModelData, ModelData, as_columnar
+from transport.engine.engines.engine_pyomo import EnginePyomo
+
+
+class EnginePyomoMatrix(EnginePyomo):
+    """
+    Same formulation as EnginePyomo, but the constraints and the objective
+    are assembled from coefficient arrays and handed to Pyomo as flat
+    LinearExpression objects, instead of being grown term by term in rule
+    callbacks.
+
+    Workshop and client rows are stored in CSR form (indptr / indices over
+    the route axis); every coefficient in those rows is 1.
+    """
+
+    def __init__(self, model_data: ModelData | ColumnarModelData) -> None:
+        super().__init__(model_data)
+
+    @override
+    def _build_model(self) -> None:
+        self._build_arrays()
+        # the build allocates millions of acyclic expression objects; letting
+        # the cyclic GC rescan them repeatedly costs more than the build itself
+        with PauseGC():
+            super()._build_model()
+
+    def _build_arrays(self) -> None:
+        # a ColumnarModelData is used as is, a ModelData is converted once
+        data = as_columnar(self.data)
+        self.columns: ColumnarModelData = data
+
+        self.route_ids: list[str] = data.route_ids
+        self.transport_capacity = data.transport_capacity
+        self.min_transport_quantity = data.min_transport_quantity
+        self.production_capacity = data.production_capacity
+        self.demand = data.demand
+
+        # objective coefficient of each route: transport + production at origin
+        self.route_cost = data.route_cost
+
+        # M of each route in x - M * y <= 0 (see ModelData.route_quantity_bound)
+        if self.formulation == "big_m":
+            self.route_big_m = np.full(len(self.route_ids), self.BIG_M)
+        else:
+            self.route_big_m = data.route_quantity_bounds()
+
+        self.workshop_indptr, self.workshop_indices = data.csr_by_origin()
+        self.client_indptr, self.client_indices = data.csr_by_destination()
+
+    @override
+    def _build_sets(self) -> None:
+        # same sets as EnginePyomo, from the columns: a ColumnarModelData
+        # never has to build its Workshop / Client / Route views
+        data = self.columns
+        self.model.workshops = pyo.Set(dimen=1, initialize=data.workshop_ids.tolist())
+        self.model.clients = pyo.Set(dimen=1, initialize=data.client_ids.tolist())
+        self.model.routes = pyo.Set(dimen=1, initialize=self.route_ids)
+        with_binary = (
+            np.ones(len(self.route_ids), dtype=bool)
+            if self.formulation == "big_m"
+            else self.min_transport_quantity > 0
+        )
+        self.model.routes_min_quantity = pyo.Set(
+            dimen=1,
+            initialize=[self.route_ids[j] for j in np.flatnonzero(with_binary)],
+        )
+
+    @override
+    def _build_expressions(self) -> None:
+        # The per-route cost expressions of the rule-based build only feed the
+        # objective, which is assembled from route_cost directly here. Keep
+        # handles on the variables instead (x in the same order as routes, y
+        # by route id as only some routes may have one).
+        self._x = list(self.model.var_transport_quantity.values())
+        self._y = dict(self.model.var_is_route_used.items())
+
+    @override
+    def _build_constraints(self) -> None:
+        x, y = self._x, self._y
+
+        workshop_rows = self._row_sums(self.workshop_indptr, self.workshop_indices)
+        self.model.constraint_workshop_capacity = pyo.Constraint(
+            self.model.workshops,
+            rule=_lookup(
+                {
+                    w: body <= capacity
+                    for w, body, capacity in zip(
+                        self.columns.workshop_ids.tolist(),
+                        workshop_rows,
+                        self.production_capacity.tolist(),
+                    )
+                }
+            ),
+        )
+
+        client_rows = self._row_sums(self.client_indptr, self.client_indices)
+        self.model.constraint_client_demand = pyo.Constraint(
+            self.model.clients,
+            rule=_lookup(
+                {
+                    c: body >= demand
+                    for c, body, demand in zip(
+                        self.columns.client_ids.tolist(),
+                        client_rows,
+                        self.demand.tolist(),
+                    )
+                }
+            ),
+        )
+
+        capacity = self.transport_capacity.tolist()
+        self.model.constraint_route_capacity = pyo.Constraint(
+            self.model.routes,
+            rule=_lookup(
+                {r: x[j] <= capacity[j] for j, r in enumerate(self.route_ids)}
+            ),
+        )
+
+        # x - M * y <= 0
+        big_m = self.route_big_m.tolist()
+        self.model.constraint_min_transport_quantity_1 = pyo.Constraint(
+            self.model.routes_min_quantity,
+            rule=_lookup(
+                {
+                    r: LinearExpression(
+                        [x[j], MonomialTermExpression((-big_m[j], y[r]))]
+                    )
+                    <= 0.0
+                    for j, r in enumerate(self.route_ids)
+                    if r in y
+                }
+            ),
+        )
+
+        # x - min_quantity * y >= 0
+        min_quantity = self.min_transport_quantity.tolist()
+        self.model.constraint_min_transport_quantity_2 = pyo.Constraint(
+            self.model.routes_min_quantity,
+            rule=_lookup(
+                {
+                    r: LinearExpression(
+                        [x[j], MonomialTermExpression((-min_quantity[j], y[r]))]
+                    )
+                    >= 0.0
+                    for j, r in enumerate(self.route_ids)
+                    if r in y
+                }
+            ),
+        )
+
+    @override
+    def _build_objective(self) -> None:
+        self.model.objective = pyo.Objective(
+            expr=LinearExpression(
+                [
+                    MonomialTermExpression((cost, x))
+                    for cost, x in zip(self.route_cost.tolist(), self._x)
+                ]
+            ),
+            sense=pyo.minimize,
+        )
+
+    @override
+    def _count_nonzeros(self) -> int:
+        # the CSR rows, a capacity row per route and two entries in each of
+        # the two rows of a binary
+        return (
+            len(self.workshop_indices)
+            + len(self.client_indices)
+            + len(self.route_ids)
+            + 4 * len(self._y)
+        )
+
+    def _row_sums(
+        self, indptr: np.ndarray, indices: np.ndarray
+    ) -> list[LinearExpression]:
+        """
+        sum(x[j] for j in row) for every CSR row, as flat LinearExpressions
+        """
+        ptr = indptr.tolist()
+        routes = indices.tolist()
+        x = self._x
+        return [
+            LinearExpression([x[j] for j in routes[ptr[i] : ptr[i + 1]]])
+            for i in range(len(ptr) - 1)
+        ]
+
+
+def _lookup(rows: dict):
+    """
+    Constraint rule serving prebuilt rows. A rule (rather than passing the dict
+    as initializer) lets Pyomo skip per-key index validation.
+    """
+    return lambda _, key: rows[key]
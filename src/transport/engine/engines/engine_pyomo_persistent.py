@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+import pyomo.environ as pyo
+from typing_extensions import override
+
+from transport.context import ModelData, Route
+from transport.engine.engines.engine_pyomo import EnginePyomo
+from transport.engine.result import SolveResult
+from transport.engine.solve_stats import SolveStats
+
+
+class EnginePyomoPersistent(EnginePyomo):
+    """
+    EnginePyomo that keeps its model (and solver) alive between runs.
+
+    Client demands, route transport costs and workshop production capacities
+    are mutable Params, so update() only touches the values that changed and
+    the next run() re-solves without rebuilding anything. With "gurobi" the
+    solver is a gurobi_persistent instance and updates are pushed to it in
+    place (RHS / objective coefficients); other solvers re-read the model on
+    each solve. Every re-solve is warm-started from the previous solution (the
+    first one from warm_start, when given).
+    """
+
+    def __init__(self, model_data: ModelData) -> None:
+        super().__init__(model_data)
+        self.model: pyo.ConcreteModel | None = None
+        self.solver: str | None = None
+        self.solver_obj = None
+        self._has_solution: bool = False
+
+    @override
+    def run(self, solver: str) -> SolveResult:
+        self.stats = SolveStats()
+        if self.model is None:
+            with self.stats.phase("build"):
+                self._build_model()
+        self._record_model_size()
+        results = self._solve_model(solver)
+        self._has_solution = self._check_solution_status(results)
+        with self.stats.phase("extract"):
+            return self._solve_result(results, solver)
+
+    def update(
+        self,
+        client_demand: Mapping[str, float] | None = None,
+        transport_cost: Mapping[str, float] | None = None,
+        production_capacity: Mapping[str, float] | None = None,
+    ) -> None:
+        """
+        Change model parameters before the next run.
+
+        Each argument maps ids (client id, route id "origin,destination",
+        workshop id) to their new value. ModelData is updated as well (see
+        ModelData.update_values), so it keeps describing the model that is
+        solved.
+        """
+        self.data.update_values(
+            client_demand=client_demand,
+            transport_cost=transport_cost,
+            production_capacity=production_capacity,
+        )
+        client_demand = client_demand or {}
+        transport_cost = transport_cost or {}
+        production_capacity = production_capacity or {}
+
+        if self.model is None:
+            return  # first run() builds from the updated data
+
+        for client_id, value in client_demand.items():
+            self.model.param_demand[client_id] = float(value)
+        for route_id, value in transport_cost.items():
+            self.model.param_transport_cost[route_id] = float(value)
+        for workshop_id, value in production_capacity.items():
+            self.model.param_production_capacity[workshop_id] = float(value)
+
+        if self._is_persistent_solver():
+            self._push_updates(client_demand, transport_cost, production_capacity)
+
+    @override
+    def _build_model(self) -> None:
+        self.model = pyo.ConcreteModel()
+
+        self._build_sets()
+        self._build_parameters()
+        self._build_variables()
+        self._build_expressions()
+        self._build_constraints()
+        self._build_objective()
+
+        self.solver_obj = None
+
+    @override
+    def _solve_model(self, solver: str):
+        if self.solver != solver or self.solver_obj is None:
+            self._create_solver(solver)
+
+        # the first solve starts from warm_start when there is one, the next
+        # ones from the previous solution
+        warm_start = self._has_solution or self.warm_start is not None
+        if self._has_solution:
+            self._set_warm_start()
+        elif warm_start:
+            self._load_warm_start()
+        with self.stats.phase("solve"):
+            results = self.solver_obj.solve(
+                self.model,
+                tee=False,
+                options=self.solver_options,
+                **self._warm_start_options(self.solver_obj, warm_start),
+            )
+        if warm_start:
+            self.warm_start_accepted = self._check_warm_start(self.solver_obj)
+        return results
+
+    def _create_solver(self, solver: str) -> None:
+        if solver == "gurobi":
+            self.solver_obj = pyo.SolverFactory("gurobi_persistent")
+            self.solver_obj.set_instance(self.model)
+        else:
+            self.solver_obj = pyo.SolverFactory(solver)
+        self.solver = solver
+        self._has_solution = False
+
+    def _set_warm_start(self) -> None:
+        """
+        Start from the previous solution: the quantities still loaded in
+        var_transport_quantity, with var_is_route_used made consistent.
+        """
+        for route_id, var in self.model.var_is_route_used.items():
+            quantity = self.model.var_transport_quantity[route_id].value
+            var.set_value(1 if quantity is not None and quantity > 0 else 0)
+
+    def _is_persistent_solver(self) -> bool:
+        return self.solver_obj is not None and self.solver_obj.name.endswith(
+            "_persistent"
+        )
+
+    def _push_updates(
+        self,
+        client_demand: Mapping[str, float],
+        transport_cost: Mapping[str, float],
+        production_capacity: Mapping[str, float],
+    ) -> None:
+        for client_id, value in client_demand.items():
+            self.solver_obj.set_linear_constraint_attr(
+                self.model.constraint_client_demand[client_id], "RHS", float(value)
+            )
+        for workshop_id, value in production_capacity.items():
+            self.solver_obj.set_linear_constraint_attr(
+                self.model.constraint_workshop_capacity[workshop_id],
+                "RHS",
+                float(value),
+            )
+        for route_id in transport_cost:
+            route = self.data.routes_by_id[route_id]
+            workshop = self.data.workshops_by_id[route.origin]
+            self.solver_obj.set_var_attr(
+                self.model.var_transport_quantity[route_id],
+                "Obj",
+                route.transport_cost + workshop.production_cost,
+            )
+
+    def _build_parameters(self) -> None:
+        self.model.param_demand = pyo.Param(  # type: ignore
+            self.model.clients,
+            initialize={c.id_: c.demand for c in self.data.clients},
+            mutable=True,
+        )
+        self.model.param_transport_cost = pyo.Param(  # type: ignore
+            self.model.routes,
+            initialize={r.id_: r.transport_cost for r in self.data.routes},
+            mutable=True,
+        )
+        self.model.param_production_capacity = pyo.Param(  # type: ignore
+            self.model.workshops,
+            initialize={w.id_: w.production_capacity for w in self.data.workshops},
+            mutable=True,
+        )
+
+    @override
+    def _expr_routes_cost(self, _: pyo.ConcreteModel, route_id: str):
+        return (
+            self.model.var_transport_quantity[route_id]
+            * self.model.param_transport_cost[route_id]
+        )
+
+    @override
+    def _route_big_m(self, route: Route) -> float:
+        # demands and production capacities can change between runs, so the
+        # tight bound only relies on the route's own capacity
+        if self.formulation == "big_m":
+            return self.BIG_M
+        return route.transport_capacity
+
+    @override
+    def _const_workshop_capacity(self, _: pyo.ConcreteModel, workshop_id: str):
+        return (
+            sum(
+                self.model.var_transport_quantity[route.id_]
+                for route in self.data.routes_by_origin[workshop_id]
+            )
+            <= self.model.param_production_capacity[workshop_id]
+        )
+
+    @override
+    def _const_client_demand(self, _: pyo.ConcreteModel, client_id: str):
+        return (
+            sum(
+                self.model.var_transport_quantity[route.id_]
+                for route in self.data.routes_by_destination[client_id]
+            )
+            >= self.model.param_demand[client_id]
+        )
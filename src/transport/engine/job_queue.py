@@ -0,0 +1,380 @@
+"""
+Persistent queue of solve jobs, in SQLite.
+
+A job is a network (the DataDict schema Converter.from_json reads) and the
+Engine arguments to solve it with. It goes queued -> running -> done or
+failed; the jobs that were running when the process using the queue stopped
+are queued again by requeue_running. A submission identical (same
+EngineConfig.cache_key) to a job still queued or running is not queued twice: it gets
+that job's id.
+
+transport.job_server serves a JobQueue over HTTP with a pool of workers.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Union
+
+import numpy as np
+
+from transport.context import ColumnarModelData
+from transport.engine.result import Sensitivity, SolveResult
+from transport.engine.engine_config import EngineConfig
+from transport.factory.types import DataDict
+
+PathLike = Union[str, Path]
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+# statuses a job does not leave
+FINAL_STATUSES = ("done", "failed")
+# EngineConfig fields a job may set
+JOB_ARGUMENTS = (
+    "engine_type",
+    "build_mode",
+    "solver_options",
+    "formulation",
+    "presolve",
+    "decompose",
+    "regions",
+    "sensitivity",
+)
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    key: str  # EngineConfig.cache_key of the data
+    status: str
+    arguments: dict[str, Any]
+    # time.time() of each step, None until it happens
+    submitted: float
+    started: float | None = None
+    finished: float | None = None
+    result: SolveResult | None = None
+    error: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        JSON-ready form, without the network
+        """
+        return {
+            "id": self.id,
+            "status": self.status,
+            "arguments": self.arguments,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+            "result": None if self.result is None else result_to_dict(self.result),
+            "error": self.error,
+        }
+
+
+@dataclass(frozen=True)
+class JobQueueMetrics:
+    """
+    Jobs per status, and latencies of the last finished jobs in seconds:
+    wait (submitted -> started), run (started -> finished) and total, each
+    as {"mean", "p50", "p95", "max"} (NaN without finished jobs)
+    """
+
+    queued: int
+    running: int
+    done: int
+    failed: int
+    wait: dict[str, float]
+    run: dict[str, float]
+    total: dict[str, float]
+
+    @property
+    def depth(self) -> int:
+        return self.queued
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        JSON-ready form: NaN latencies become None
+        """
+        latency = {
+            name: {stat: _number(value) for stat, value in values.items()}
+            for name, values in (
+                ("wait", self.wait),
+                ("run", self.run),
+                ("total", self.total),
+            )
+        }
+        return {
+            "depth": self.depth,
+            "queued": self.queued,
+            "running": self.running,
+            "done": self.done,
+            "failed": self.failed,
+            **latency,
+        }
+
+
+class JobQueue:
+    """
+    Jobs stored in a SQLite file (in memory when path is None). Safe to
+    share between threads.
+    """
+
+    def __init__(self, path: PathLike | None = None, latency_window: int = 1000):
+        self.path = None if path is None else Path(path)
+        # finished jobs the latency metrics are computed over
+        self.latency_window = latency_window
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            ":memory:" if self.path is None else self.path, check_same_thread=False
+        )
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " key TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " data TEXT NOT NULL,"
+                " arguments TEXT NOT NULL,"
+                " submitted REAL NOT NULL,"
+                " started REAL,"
+                " finished REAL,"
+                " result TEXT,"
+                " error TEXT)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key)")
+
+    def submit(
+        self, data: DataDict, arguments: dict[str, Any] | None = None
+    ) -> tuple[Job, bool]:
+        """
+        Queue a job, after validating data and arguments (ValueError);
+        returns it and whether it is a job queued or running already with the
+        same data and configuration.
+        """
+        from transport.factory.model_data_factory import ModelDataFactory
+
+        arguments = dict(arguments or {})
+        unknown = set(arguments) - set(JOB_ARGUMENTS)
+        if unknown:
+            raise ValueError(
+                f"job arguments can only be {list(JOB_ARGUMENTS)}, not {sorted(unknown)}"
+            )
+        arguments.setdefault("engine_type", "cbc")
+        config = EngineConfig(**arguments)
+        _check_tables(data)
+        columnar: ColumnarModelData = ModelDataFactory.columnar_from_dict(data)
+        key = config.cache_key(columnar)
+
+        with self._lock, self._db:
+            row = self._db.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE key = ?"
+                " AND status IN ('queued', 'running') ORDER BY submitted LIMIT 1",
+                (key,),
+            ).fetchone()
+            if row is not None:
+                return _job(row), True
+            job = Job(
+                id=uuid.uuid4().hex,
+                key=key,
+                status="queued",
+                arguments=arguments,
+                submitted=time.time(),
+            )
+            self._db.execute(
+                "INSERT INTO jobs (id, key, status, data, arguments, submitted)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    job.id,
+                    key,
+                    "queued",
+                    json.dumps(data),
+                    json.dumps(arguments),
+                    job.submitted,
+                ),
+            )
+        return job, False
+
+    def claim(self) -> tuple[Job, DataDict] | None:
+        """
+        The oldest queued job, now running, with its network; None when the
+        queue is empty
+        """
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = 'queued'"
+                " ORDER BY submitted LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = 'running', started = ? WHERE id = ?",
+                (time.time(), row[0]),
+            )
+            (data,) = self._db.execute(
+                "SELECT data FROM jobs WHERE id = ?", row
+            ).fetchone()
+            return self._get(row[0]), json.loads(data)
+
+    def complete(self, job_id: str, result: SolveResult) -> None:
+        self._finish(job_id, "done", json.dumps(result_to_dict(result)), None)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._finish(job_id, "failed", None, error)
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._get(job_id)
+
+    def requeue_running(self) -> int:
+        """
+        Queue again the jobs left running (by a process that stopped);
+        returns how many
+        """
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE jobs SET status = 'queued', started = NULL"
+                " WHERE status = 'running'"
+            ).rowcount
+
+    def metrics(self) -> JobQueueMetrics:
+        with self._lock:
+            counts = dict.fromkeys(JOB_STATUSES, 0)
+            counts.update(
+                self._db.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
+            times = np.array(
+                self._db.execute(
+                    "SELECT submitted, started, finished FROM jobs"
+                    " WHERE finished IS NOT NULL AND started IS NOT NULL"
+                    " ORDER BY finished DESC LIMIT ?",
+                    (self.latency_window,),
+                ).fetchall(),
+                dtype=float,
+            ).reshape(-1, 3)
+        submitted, started, finished = times.T
+        return JobQueueMetrics(
+            **counts,
+            wait=_latency(started - submitted),
+            run=_latency(finished - started),
+            total=_latency(finished - submitted),
+        )
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _finish(
+        self, job_id: str, status: str, result: str | None, error: str | None
+    ) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ?"
+                " WHERE id = ?",
+                (status, time.time(), result, error, job_id),
+            )
+
+    def _get(self, job_id: str) -> Job | None:
+        row = self._db.execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return None if row is None else _job(row)
+
+
+def result_to_dict(result: SolveResult) -> dict[str, Any]:
+    """
+    JSON-ready SolveResult: NaN becomes None, stats their as_dict(), the
+    sensitivity section a dict of its fields
+    """
+    return {
+        "status": result.status,
+        "objective": _number(result.objective),
+        "transport_quantity": result.transport_quantity,
+        "solver": result.solver,
+        "bound": _number(result.bound),
+        "gap": _number(result.gap),
+        "stats": None if result.stats is None else result.stats.as_dict(),
+        "sensitivity": (
+            None if result.sensitivity is None else asdict(result.sensitivity)
+        ),
+    }
+
+
+def result_from_dict(values: dict[str, Any]) -> SolveResult:
+    """
+    SolveResult of result_to_dict (without its stats)
+    """
+    nan = float("nan")
+    sensitivity = values.get("sensitivity")
+    return SolveResult(
+        status=values["status"],
+        objective=_nan(values["objective"]),
+        transport_quantity=dict(values["transport_quantity"]),
+        solver=values["solver"],
+        bound=nan if values.get("bound") is None else values["bound"],
+        gap=nan if values.get("gap") is None else values["gap"],
+        sensitivity=None if sensitivity is None else Sensitivity(**sensitivity),
+    )
+
+
+def _check_tables(data: Any) -> None:
+    """
+    ValueError unless data is a DataDict in shape: an object of tables, each
+    a list of objects
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"data can only be an object, but it is {data!r}")
+    for name, rows in data.items():
+        if not isinstance(rows, list):
+            raise ValueError(f"data.{name} can only be a list, but it is {rows!r}")
+        for k, row in enumerate(rows):
+            if not isinstance(row, dict):
+                raise ValueError(
+                    f"data.{name}[{k}] can only be an object, but it is {row!r}"
+                )
+
+
+_COLUMNS = "id, key, status, arguments, submitted, started, finished, result, error"
+
+
+def _job(row: tuple) -> Job:
+    id_, key, status, arguments, submitted, started, finished, result, error = row
+    return Job(
+        id=id_,
+        key=key,
+        status=status,
+        arguments=json.loads(arguments),
+        submitted=submitted,
+        started=started,
+        finished=finished,
+        result=None if result is None else result_from_dict(json.loads(result)),
+        error=error,
+    )
+
+
+def _latency(seconds: np.ndarray) -> dict[str, float]:
+    if len(seconds) == 0:
+        return dict.fromkeys(("mean", "p50", "p95", "max"), float("nan"))
+    return {
+        "mean": float(seconds.mean()),
+        "p50": float(np.percentile(seconds, 50)),
+        "p95": float(np.percentile(seconds, 95)),
+        "max": float(seconds.max()),
+    }
+
+
+def _number(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+def _nan(value: float | None) -> float:
+    return float("nan") if value is None else value
@@ -0,0 +1,319 @@
+"""
+Streaming LP / MPS writers for the transport model, straight from ModelData.
+
+The rows written are exactly those of EnginePyomo:
+
+    obj     min  sum_r (transport_cost_r + production_cost_origin(r)) * x_r
+    wc<i>   sum_{r from workshop i} x_r <= production_capacity_i
+    cd<k>   sum_{r to client k} x_r >= demand_k
+    rc<j>   x_j <= transport_capacity_j
+    mq1_<j> x_j - M_j * y_j <= 0
+    mq2_<j> x_j - min_transport_quantity_j * y_j >= 0
+
+Variables and rows are named by position (x<j>, y<j> for the j-th route of
+ModelData.routes) so that ids never have to be escaped for the file format.
+Every line is produced by a generator from the columns of a
+ColumnarModelData (a ModelData is converted first); no expression objects
+are built.
+
+The formulation argument selects, like EnginePyomo.formulation, which routes
+get a y<j> and which M bounds it:
+
+    "big_m"           every route, BIG_M
+    "tight"           routes with a minimum quantity only,
+                      ModelData.route_quantity_bound
+    "semicontinuous"  none: a route with a minimum quantity gets a
+                      semi-continuous x<j>, 0 or within
+                      [min_transport_quantity_j, ModelData.route_quantity_bound]
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TextIO
+
+import numpy as np
+
+from transport.context import ColumnarModelData, ModelData, as_columnar
+
+# terms per line when a row is split over several lines in LP files
+_TERMS_PER_LINE = 16
+
+# lines of CBC's result summary: label -> key in cbc_summary
+_CBC_SUMMARY = {
+    "Lower bound:": "lower_bound",
+    "Enumerated nodes:": "nodes",
+    "Total iterations:": "iterations",
+}
+_CBC_SUMMARY_LINE = re.compile(
+    r"^(" + "|".join(map(re.escape, _CBC_SUMMARY)) + r")\s+(\S+)", re.MULTILINE
+)
+
+
+def write_lp(
+    model_data: ModelData | ColumnarModelData,
+    stream: TextIO,
+    big_m: float,
+    formulation: str = "big_m",
+) -> None:
+    stream.writelines(_lp_lines(as_columnar(model_data), big_m, formulation))
+
+
+def write_mps(
+    model_data: ModelData | ColumnarModelData,
+    stream: TextIO,
+    big_m: float,
+    formulation: str = "big_m",
+) -> None:
+    stream.writelines(_mps_lines(as_columnar(model_data), big_m, formulation))
+
+
+def route_costs(model_data: ModelData | ColumnarModelData) -> list[float]:
+    """
+    Objective coefficient of each route, in ModelData.routes order
+    """
+    return as_columnar(model_data).route_cost.tolist()
+
+
+def binary_count(model_data: ModelData | ColumnarModelData, formulation: str) -> int:
+    """
+    Number of y<j> the writers produce for the formulation
+    """
+    return len(_route_big_m(as_columnar(model_data), 0.0, formulation))
+
+
+def read_cbc_solution(
+    file: str | Path, n_routes: int
+) -> tuple[str, list[float] | None]:
+    """
+    Parse a CBC solution file (``-solu``) written for a model produced by
+    write_lp / write_mps.
+
+    Returns the termination status (named like pyomo's TerminationCondition)
+    and the value of x<j> for every route, or None when CBC stopped on a
+    limit before finding any integer solution.
+    """
+    quantities = [0.0] * n_routes
+    with open(file, "r", encoding="utf-8") as f:
+        header = f.readline()
+        status = _cbc_status(header)
+        for line in f:
+            tokens = line.split()
+            if tokens and tokens[0] == "**":  # infeasibility marker
+                tokens = tokens[1:]
+            if len(tokens) < 3 or not tokens[1].startswith("x"):
+                continue
+            quantities[int(tokens[1][1:])] = float(tokens[2])
+    if "no integer solution" in header or _cbc_objective(header) >= 1e50:
+        return status, None
+    return status, quantities
+
+
+def cbc_summary(log: str) -> dict[str, float]:
+    """
+    lower_bound, nodes and iterations of CBC's result summary in its log,
+    for those it prints
+    """
+    summary = {}
+    for label, value in _CBC_SUMMARY_LINE.findall(log):
+        try:
+            summary[_CBC_SUMMARY[label]] = float(value)
+        except ValueError:
+            continue
+    return summary
+
+
+def _route_big_m(
+    data: ColumnarModelData, big_m: float, formulation: str
+) -> dict[int, float]:
+    """
+    position -> M of every route that gets a y<j>
+    """
+    if formulation == "big_m":
+        return dict.fromkeys(range(len(data.route_origin)), big_m)
+    if formulation == "tight":
+        with_min = np.flatnonzero(data.min_transport_quantity > 0)
+        bounds = data.route_quantity_bounds()[with_min]
+        return dict(zip(with_min.tolist(), bounds.tolist()))
+    return {}
+
+
+def _semicontinuous(
+    data: ColumnarModelData, formulation: str
+) -> Iterator[tuple[int, float, float]]:
+    """
+    (position, lower, upper) of every semi-continuous x<j>; upper is below
+    lower when the route can never be used.
+    """
+    if formulation != "semicontinuous":
+        return
+    with_min = np.flatnonzero(data.min_transport_quantity > 0)
+    yield from zip(
+        with_min.tolist(),
+        data.min_transport_quantity[with_min].tolist(),
+        data.route_quantity_bounds()[with_min].tolist(),
+    )
+
+
+def _routes_by(route_node: np.ndarray, n_nodes: int) -> list[list[int]]:
+    """
+    Positions of the routes of every node (workshop or client), in route
+    order.
+    """
+    order = np.argsort(route_node, kind="stable")
+    start = np.cumsum(np.bincount(route_node, minlength=n_nodes))[:-1]
+    return [group.tolist() for group in np.split(order, start)]
+
+
+def _cbc_objective(header: str) -> float:
+    # "... - objective value 123.4"
+    try:
+        return float(header.rsplit(None, 1)[-1])
+    except (ValueError, IndexError):
+        return float("nan")
+
+
+def _cbc_status(header: str) -> str:
+    header = header.strip().lower()
+    if header.startswith("optimal"):
+        return "optimal"
+    if header.startswith(("infeasible", "integer infeasible")):
+        return "infeasible"
+    if header.startswith("unbounded"):
+        return "unbounded"
+    if header.startswith("stopped on time"):
+        return "maxTimeLimit"
+    if header.startswith("stopped on iterations"):
+        return "maxIterations"
+    if header.startswith("stopped on nodes"):
+        return "maxEvaluations"
+    return "unknown"
+
+
+# --- LP ---------------------------------------------------------------------
+
+
+def _lp_lines(data: ColumnarModelData, big_m: float, formulation: str) -> Iterator[str]:
+    yield "\\ transport problem\n"
+    yield "minimize\n"
+    yield " obj:\n"
+    yield from _lp_terms((cost, f"x{j}") for j, cost in enumerate(route_costs(data)))
+
+    yield "subject to\n"
+    production_capacity = data.production_capacity.tolist()
+    by_origin = _routes_by(data.route_origin, len(production_capacity))
+    for i, (outgoing, capacity) in enumerate(zip(by_origin, production_capacity)):
+        if not outgoing:
+            continue  # 0 <= capacity always holds
+        yield f" wc{i}:\n"
+        yield from _lp_terms((1.0, f"x{j}") for j in outgoing)
+        yield f" <= {capacity!r}\n"
+
+    demand = data.demand.tolist()
+    by_destination = _routes_by(data.route_destination, len(demand))
+    for k, (incoming, client_demand) in enumerate(zip(by_destination, demand)):
+        yield f" cd{k}:\n"
+        # a client without routes still gets its (infeasible) demand row
+        yield from _lp_terms(
+            ((1.0, f"x{j}") for j in incoming) if incoming else [(0.0, "x0")]
+        )
+        yield f" >= {client_demand!r}\n"
+
+    route_big_m = _route_big_m(data, big_m, formulation)
+    min_quantity = data.min_transport_quantity.tolist()
+    for j, capacity in enumerate(data.transport_capacity.tolist()):
+        yield f" rc{j}: + x{j} <= {capacity!r}\n"
+        if j in route_big_m:
+            yield f" mq1_{j}: + x{j} - {route_big_m[j]!r} y{j} <= 0\n"
+            yield f" mq2_{j}: + x{j} - {min_quantity[j]!r} y{j} >= 0\n"
+
+    # other x<j> keep the default [0, +inf) bounds
+    semicontinuous = list(_semicontinuous(data, formulation))
+    if semicontinuous:
+        yield "bounds\n"
+        for j, lower, upper in semicontinuous:
+            yield (
+                f" {lower!r} <= x{j} <= {upper!r}\n"
+                if upper >= lower
+                else f" x{j} = 0\n"
+            )
+        yield "semi-continuous\n"
+        for j, lower, upper in semicontinuous:
+            if upper >= lower:
+                yield f" x{j}\n"
+
+    if route_big_m:
+        yield "binaries\n"
+        for j in route_big_m:
+            yield f" y{j}\n"
+    yield "end\n"
+
+
+def _lp_terms(terms) -> Iterator[str]:
+    line: list[str] = []
+    for coef, name in terms:
+        line.append(f"+ {coef!r} {name}" if coef >= 0 else f"- {-coef!r} {name}")
+        if len(line) == _TERMS_PER_LINE:
+            yield "  " + " ".join(line) + "\n"
+            line = []
+    if line:
+        yield "  " + " ".join(line) + "\n"
+
+
+# --- MPS --------------------------------------------------------------------
+
+
+def _mps_lines(
+    data: ColumnarModelData, big_m: float, formulation: str
+) -> Iterator[str]:
+    n_routes = len(data.route_origin)
+    route_big_m = _route_big_m(data, big_m, formulation)
+    min_quantity = data.min_transport_quantity.tolist()
+
+    yield "NAME TRANSPORT\n"
+    yield "ROWS\n"
+    yield " N obj\n"
+    for i in range(len(data.workshop_ids)):
+        yield f" L wc{i}\n"
+    for k in range(len(data.client_ids)):
+        yield f" G cd{k}\n"
+    for j in range(n_routes):
+        yield f" L rc{j}\n"
+    for j in route_big_m:
+        yield f" L mq1_{j}\n G mq2_{j}\n"
+
+    # MPS is column-major: each route contributes its own column entries
+    yield "COLUMNS\n"
+    for j, (i, k, cost) in enumerate(
+        zip(
+            data.route_origin.tolist(),
+            data.route_destination.tolist(),
+            route_costs(data),
+        )
+    ):
+        yield f" x{j} obj {cost!r} wc{i} 1\n"
+        yield f" x{j} cd{k} 1 rc{j} 1\n"
+        if j in route_big_m:
+            yield f" x{j} mq1_{j} 1 mq2_{j} 1\n"
+    for j, m in route_big_m.items():
+        yield f" y{j} mq1_{j} {-m!r} mq2_{j} {-min_quantity[j]!r}\n"
+
+    yield "RHS\n"
+    for i, capacity in enumerate(data.production_capacity.tolist()):
+        yield f" RHS wc{i} {capacity!r}\n"
+    for k, demand in enumerate(data.demand.tolist()):
+        yield f" RHS cd{k} {demand!r}\n"
+    for j, capacity in enumerate(data.transport_capacity.tolist()):
+        yield f" RHS rc{j} {capacity!r}\n"
+
+    yield "BOUNDS\n"
+    for j in route_big_m:
+        yield f" BV BND y{j}\n"
+    for j, lower, upper in _semicontinuous(data, formulation):
+        if upper >= lower:
+            yield f" LO BND x{j} {lower!r}\n SC BND x{j} {upper!r}\n"
+        else:
+            yield f" UP BND x{j} 0\n"
+    yield "ENDATA\n"
@@ -0,0 +1,279 @@
+"""
+Presolve: shrink a ModelData before it reaches an engine, and map the
+solution of the reduced model back to the original routes.
+
+Reductions, repeated until nothing changes:
+
+- inactive routes (is_active False) are dropped, with quantity 0;
+- transport_capacity is tightened to ModelData.route_quantity_bound; a route
+  whose bound is 0, or below its min_transport_quantity, can never be used
+  and is dropped with quantity 0;
+- clients with no demand are dropped, with their routes at 0;
+- a client with a single route forces that route's quantity (its demand, or
+  the route minimum if larger): the route and the client are dropped, the
+  quantity is taken from the workshop's production capacity and its cost
+  goes to the objective offset;
+- workshops without routes are dropped.
+
+Obviously infeasible instances (a client without routes, a demand above the
+capacity of its routes, a total demand above the total production capacity)
+are reported without building any model.
+
+The reduced model keeps the original ids, so postsolve only has to add the
+fixed quantities and the objective offset to the engine's result.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from transport.context import ModelData
+from transport.engine.result import SolveResult, relative_gap
+
+# quantities / capacities below this are treated as zero
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class PresolveStats:
+    workshops_before: int
+    workshops_after: int
+    clients_before: int
+    clients_after: int
+    routes_before: int
+    routes_after: int
+    inactive_routes: int  # dropped because is_active is False
+    fixed_routes: int  # other routes whose quantity presolve decided
+    tightened_routes: int  # transport_capacity lowered in the reduced model
+    passes: int
+
+
+@dataclass(frozen=True)
+class PresolveResult:
+    # "reduced": model_data is left to solve
+    # "solved": nothing left to optimise, the fixed quantities are the solution
+    # "infeasible": see message
+    status: str
+    model_data: ModelData | None
+    # original route id -> quantity decided by presolve
+    fixed_quantity: dict[str, float]
+    # cost of the fixed quantities, added to the reduced objective
+    objective_offset: float
+    stats: PresolveStats
+    message: str = ""
+
+    def postsolve(self, result: SolveResult) -> SolveResult:
+        """
+        Express a solution of the reduced model in terms of the original routes.
+        """
+        if not result.transport_quantity:
+            return result
+        objective = result.objective + self.objective_offset
+        bound = result.bound + self.objective_offset
+        return SolveResult(
+            status=result.status,
+            objective=objective,
+            transport_quantity={**self.fixed_quantity, **result.transport_quantity},
+            solver=result.solver,
+            bound=bound,
+            gap=relative_gap(objective, bound),
+            # of the reduced model: its capacities and demands are net of the
+            # fixed quantities, and the removed rows / routes have none
+            sensitivity=result.sensitivity,
+        )
+
+    def solution(self, solver: str = "presolve") -> SolveResult:
+        """
+        Result of an instance presolve settled on its own ("solved" or
+        "infeasible").
+        """
+        if self.status == "solved":
+            return SolveResult(
+                status="optimal",
+                objective=self.objective_offset,
+                transport_quantity=dict(self.fixed_quantity),
+                solver=solver,
+            )
+        if self.status == "infeasible":
+            return SolveResult(
+                status="infeasible",
+                objective=float("nan"),
+                transport_quantity={},
+                solver=solver,
+            )
+        raise ValueError("The presolved model still has to be solved")
+
+
+class Presolve:
+    def __init__(self, model_data: ModelData) -> None:
+        self.data: ModelData = model_data
+
+        self.production_capacity: dict[str, float] = {
+            w.id_: w.production_capacity for w in model_data.workshops
+        }
+        self.demand: dict[str, float] = {c.id_: c.demand for c in model_data.clients}
+        self.transport_capacity: dict[str, float] = {
+            r.id_: r.transport_capacity for r in model_data.routes
+        }
+        # routes still in the model, by id
+        self.routes = {r.id_: r for r in model_data.routes}
+        self.fixed_quantity: dict[str, float] = {}
+        self.objective_offset: float = 0.0
+        self.tightened: set[str] = set()
+        self.inactive: int = 0
+        self.passes: int = 0
+        self.message: str = ""
+
+    def run(self) -> PresolveResult:
+        for route in self.data.routes:
+            if not route.is_active:
+                self._fix(route.id_, 0.0)
+                self.inactive += 1
+
+        feasible = True
+        changed = True
+        while changed and feasible:
+            self.passes += 1
+            changed = self._tighten_routes()
+            feasible, fixed = self._reduce_clients()
+            changed = changed or fixed
+            if feasible:
+                feasible = self._check_total_capacity()
+
+        if not feasible:
+            return self._result("infeasible", None)
+        if not self.demand:
+            for route_id in list(self.routes):
+                self._fix(route_id, 0.0)
+            return self._result("solved", None)
+        return self._result("reduced", self._reduced_model_data())
+
+    def _fix(self, route_id: str, quantity: float) -> None:
+        route = self.routes.pop(route_id)
+        self.fixed_quantity[route_id] = quantity
+        if quantity > 0:
+            workshop = self.data.workshops_by_id[route.origin]
+            self.production_capacity[route.origin] -= quantity
+            self.objective_offset += quantity * (
+                route.transport_cost + workshop.production_cost
+            )
+
+    def _tighten_routes(self) -> bool:
+        changed = False
+        for route_id, route in list(self.routes.items()):
+            bound = min(
+                self.transport_capacity[route_id],
+                self.production_capacity[route.origin],
+                max(
+                    self.demand.get(route.destination, 0.0),
+                    route.min_transport_quantity,
+                ),
+            )
+            if bound <= _EPS or bound < route.min_transport_quantity - _EPS:
+                self._fix(route_id, 0.0)
+                changed = True
+            elif bound < self.transport_capacity[route_id] - _EPS:
+                self.transport_capacity[route_id] = bound
+                self.tightened.add(route_id)
+                changed = True
+        return changed
+
+    def _reduce_clients(self) -> tuple[bool, bool]:
+        """
+        Returns (feasible, whether anything was fixed)
+        """
+        incoming: dict[str, list[str]] = {c: [] for c in self.demand}
+        for route_id, route in self.routes.items():
+            incoming[route.destination].append(route_id)
+
+        fixed = False
+        for client_id, route_ids in incoming.items():
+            demand = self.demand[client_id]
+            if demand <= _EPS:
+                for route_id in route_ids:
+                    self._fix(route_id, 0.0)
+                del self.demand[client_id]
+                fixed = True
+                continue
+
+            if not route_ids:
+                self.message = f"Client {client_id} has no active route"
+                return False, fixed
+            capacity = sum(self.transport_capacity[r] for r in route_ids)
+            if capacity < demand - _EPS:
+                self.message = (
+                    f"Client {client_id} demand {demand} exceeds the capacity "
+                    f"of its routes {capacity}"
+                )
+                return False, fixed
+
+            if len(route_ids) == 1:
+                route_id = route_ids[0]
+                route = self.routes[route_id]
+                quantity = max(demand, route.min_transport_quantity)
+                available = min(
+                    self.transport_capacity[route_id],
+                    self.production_capacity[route.origin],
+                )
+                if quantity > available + _EPS:
+                    self.message = (
+                        f"Client {client_id} needs {quantity} from route "
+                        f"{route_id}, which can carry {available}"
+                    )
+                    return False, fixed
+                self._fix(route_id, quantity)
+                del self.demand[client_id]
+                fixed = True
+        return True, fixed
+
+    def _check_total_capacity(self) -> bool:
+        used = {route.origin for route in self.routes.values()}
+        capacity = sum(self.production_capacity[w] for w in used)
+        demand = sum(self.demand.values())
+        if demand > capacity + _EPS:
+            self.message = (
+                f"Total demand {demand} exceeds the production capacity {capacity}"
+            )
+            return False
+        return True
+
+    def _reduced_model_data(self) -> ModelData:
+        used = {route.origin for route in self.routes.values()}
+        return ModelData(
+            workshops=[
+                w.model_copy(
+                    update={"production_capacity": self.production_capacity[w.id_]}
+                )
+                for w in self.data.workshops
+                if w.id_ in used
+            ],
+            clients=[c.model_copy() for c in self.data.clients if c.id_ in self.demand],
+            routes=[
+                r.model_copy(
+                    update={"transport_capacity": self.transport_capacity[r.id_]}
+                )
+                for r in self.data.routes
+                if r.id_ in self.routes
+            ],
+        )
+
+    def _result(self, status: str, model_data: ModelData | None) -> PresolveResult:
+        return PresolveResult(
+            status=status,
+            model_data=model_data,
+            fixed_quantity=self.fixed_quantity,
+            objective_offset=self.objective_offset,
+            stats=PresolveStats(
+                workshops_before=len(self.data.workshops),
+                workshops_after=0 if model_data is None else len(model_data.workshops),
+                clients_before=len(self.data.clients),
+                clients_after=0 if model_data is None else len(model_data.clients),
+                routes_before=len(self.data.routes),
+                routes_after=0 if model_data is None else len(model_data.routes),
+                inactive_routes=self.inactive,
+                fixed_routes=len(self.fixed_quantity) - self.inactive,
+                tightened_routes=len(self.tightened & set(self.routes)),
+                passes=self.passes,
+            ),
+            message=self.message,
+        )
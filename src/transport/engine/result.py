@@ -1,8 +1,58 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from transport.engine.solve_stats import SolveStats
+
+
+@dataclass(frozen=True)
+class Sensitivity:
+    """
+    Marginal values at the solution of a SolveResult: of the LP itself, or
+    for a MIP of its LP with the binaries fixed at their solution values (so
+    they price small changes, not switching a route on or off).
+
+    A dual is the change of the objective per unit increase of the
+    constraint's right-hand side: <= 0 for the capacities (one more unit of
+    capacity saves that much), >= 0 for the demands (one more unit of demand
+    costs that much). 0 for a constraint that is not binding.
+    """
+
+    workshop_capacity: dict[str, float]  # workshop_id -> dual
+    client_demand: dict[str, float]  # client_id -> dual
+    route_capacity: dict[str, float]  # route_id -> dual
+    # route_id -> reduced cost of var_transport_quantity: by how much the
+    # unit cost of an unused route must drop before it is worth using
+    reduced_cost: dict[str, float]
+    # "solver": the duals the solver reported, "dual_lp": the solution of the
+    # dual LP, solved when the solver's were not a dual solution of the model
+    # (CBC reports the duals of the problem left by its own presolve); for
+    # a decomposed network, "dual_lp" if any component's is
+    source: str
+
 
 @dataclass(frozen=True)
 class SolveResult:
     status: str
     objective: float
     transport_quantity: dict[str, float]  # route_id -> quantity
-    solver: str
\ No newline at end of file
+    solver: str
+    # lower bound on the optimal objective, and relative_gap(objective, bound);
+    # NaN when the solver does not report them. Not compared: two results with
+    # the same solution are equal whatever the solver proved about it
+    bound: float = field(default=float("nan"), compare=False)
+    gap: float = field(default=float("nan"), compare=False)
+    # timings and model size, see solve_stats; set by Engine.run
+    stats: SolveStats | None = field(default=None, compare=False)
+    # duals and reduced costs, with Engine(..., sensitivity=True)
+    sensitivity: Sensitivity | None = field(default=None, compare=False)
+
+
+def relative_gap(objective: float, bound: float) -> float:
+    """
+    (objective - bound) / |objective|, 0 for a zero objective met by its bound
+    """
+    if objective != objective or bound != bound:
+        return float("nan")
+    difference = max(objective - bound, 0.0)
+    if difference <= 1e-9 * max(1.0, abs(objective)):
+        return 0.0
+    return difference / abs(objective) if objective else float("inf")
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""
+Memoization of solve results: identical networks solved the same way return
+the stored SolveResult instead of solving again.
+
+The key is model_fingerprint of the data (a hash of its content, independent
+of the order of workshops, clients and routes) together with the engine
+configuration (EngineConfig.cache_key: engine type, build mode, formulation,
+presolve, solver options, ...). Results live in an in-memory LRU and, when a path is given, in a
+SQLite file shared across processes and runs.
+
+Only results that do not depend on when the solve stopped are stored:
+statuses in CACHED_STATUSES. Results with a sensitivity section are kept in
+memory only, the SQLite file has no column for it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Union
+
+import numpy as np
+
+from transport.context import ColumnarModelData, ModelData, as_columnar
+from transport.engine.result import SolveResult
+
+PathLike = Union[str, Path]
+
+CACHED_STATUSES = ("optimal", "infeasible", "heuristic")
+
+
+def model_fingerprint(model_data: ModelData | ColumnarModelData) -> str:
+    """
+    Hash of the content of model_data. Workshops, clients and routes are
+    sorted by id first, so the same network listed in another order has the
+    same fingerprint.
+    """
+    data = as_columnar(model_data)
+    workshop_order = np.argsort(data.workshop_ids, kind="stable")
+    client_order = np.argsort(data.client_ids, kind="stable")
+    # rank of every workshop / client in id order
+    workshop_rank = np.empty_like(workshop_order)
+    workshop_rank[workshop_order] = np.arange(len(workshop_order))
+    client_rank = np.empty_like(client_order)
+    client_rank[client_order] = np.arange(len(client_order))
+    route_order = np.lexsort(
+        (client_rank[data.route_destination], workshop_rank[data.route_origin])
+    )
+
+    digest = hashlib.blake2b(digest_size=16)
+    for name, column in (
+        ("workshop_ids", data.workshop_ids[workshop_order]),
+        ("production_capacity", data.production_capacity[workshop_order]),
+        ("production_cost", data.production_cost[workshop_order]),
+        ("client_ids", data.client_ids[client_order]),
+        ("demand", data.demand[client_order]),
+        ("route_origin", workshop_rank[data.route_origin][route_order]),
+        ("route_destination", client_rank[data.route_destination][route_order]),
+        ("transport_cost", data.transport_cost[route_order]),
+        ("transport_capacity", data.transport_capacity[route_order]),
+        ("min_transport_quantity", data.min_transport_quantity[route_order]),
+        ("is_active", data.is_active[route_order]),
+    ):
+        if column.dtype.kind == "f":
+            column = column + 0.0  # -0.0 -> 0.0
+        elif column.dtype.kind == "i":
+            column = column.astype(np.int64)
+        digest.update(f"{name}:{column.dtype.str}:{len(column)}:".encode())
+        digest.update(np.ascontiguousarray(column).data)
+    return digest.hexdigest()
+
+
+def result_key(model_data: ModelData | ColumnarModelData, **config: Any) -> str:
+    """
+    Cache key of solving model_data with the given engine configuration
+    (the fields of EngineConfig that change the result, see its cache_key).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(model_fingerprint(model_data).encode())
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ResultCacheStats:
+    hits: int  # memory_hits + disk_hits
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    memory_entries: int
+    disk_entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    LRU of SolveResult by result_key, with an optional SQLite tier.
+
+    max_entries bounds the memory tier, max_disk_entries the SQLite one (the
+    least recently used rows are deleted). A disk hit is promoted to memory.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        path: PathLike | None = None,
+        max_disk_entries: int | None = None,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.path = None if path is None else Path(path)
+        self._memory: OrderedDict[str, SolveResult] = OrderedDict()
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        self._db: sqlite3.Connection | None = None
+        if self.path is not None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " key TEXT PRIMARY KEY,"
+                    " status TEXT NOT NULL,"
+                    " objective REAL,"
+                    " transport_quantity TEXT NOT NULL,"
+                    " solver TEXT NOT NULL,"
+                    " bound REAL,"
+                    " gap REAL,"
+                    " last_used REAL NOT NULL)"
+                )
+
+    def get(self, key: str) -> SolveResult | None:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return _copy(result)
+            result = self._get_disk(key)
+            if result is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._put_memory(key, result)
+            return _copy(result)
+
+    def put(self, key: str, result: SolveResult) -> bool:
+        """
+        Store result unless its status is not cacheable; True if stored.
+        """
+        if result.status not in CACHED_STATUSES:
+            return False
+        result = _copy(result)
+        with self._lock:
+            self._put_memory(key, result)
+            self._put_disk(key, result)
+        return True
+
+    def stats(self) -> ResultCacheStats:
+        with self._lock:
+            disk_entries = 0
+            if self._db is not None:
+                (disk_entries,) = self._db.execute(
+                    "SELECT COUNT(*) FROM results"
+                ).fetchone()
+            return ResultCacheStats(
+                hits=self._memory_hits + self._disk_hits,
+                memory_hits=self._memory_hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                memory_entries=len(self._memory),
+                disk_entries=disk_entries,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _put_memory(self, key: str, result: SolveResult) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_disk(self, key: str) -> SolveResult | None:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT status, objective, transport_quantity, solver, bound, gap "
+            "FROM results WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        status, objective, transport_quantity, solver, bound, gap = row
+        return SolveResult(
+            status=status,
+            objective=_float(objective),
+            transport_quantity=json.loads(transport_quantity),
+            solver=solver,
+            bound=_float(bound),
+            gap=_float(gap),
+        )
+
+    def _put_disk(self, key: str, result: SolveResult) -> None:
+        if self._db is None or result.sensitivity is not None:
+            return
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    result.status,
+                    result.objective,
+                    json.dumps(result.transport_quantity),
+                    result.solver,
+                    result.bound,
+                    result.gap,
+                    time.time(),
+                ),
+            )
+            if self.max_disk_entries is not None:
+                self._db.execute(
+                    "DELETE FROM results WHERE key NOT IN ("
+                    " SELECT key FROM results ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_disk_entries,),
+                )
+
+
+def _float(value: float | None) -> float:
+    # SQLite stores NaN as NULL
+    return float("nan") if value is None else value
+
+
+def _copy(result: SolveResult) -> SolveResult:
+    # the cached dict is never handed out
+    return replace(result, transport_quantity=dict(result.transport_quantity))
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any
+
+import pandas as pd
+
+from transport.context import ModelData
+from transport.engine.engine import Engine
+from transport.engine.engine_config import EngineConfig
+from transport.engine.result import SolveResult
+from transport.engine.solver_options import SolverOptions
+from transport.factory.model_data_converter import Converter
+from transport.factory.model_data_factory import ModelDataFactory
+from transport.factory.types import DataDict
+
+
+# name of the thread-count option of each solver backend
+@dataclass(frozen=True)
+class Scenario:
+    """
+    Changes applied to the base ModelData for one scenario; same keys as
+    ModelData.update_values.
+    """
+
+    name: str
+    client_demand: dict[str, float] = field(default_factory=dict)
+    transport_cost: dict[str, float] = field(default_factory=dict)
+    production_capacity: dict[str, float] = field(default_factory=dict)
+
+    @staticmethod
+    def from_dict(row: dict[str, Any]) -> "Scenario":
+        return Scenario(
+            name=str(row["name"]),
+            client_demand=dict(row.get("client_demand", {})),
+            transport_cost=dict(row.get("transport_cost", {})),
+            production_capacity=dict(row.get("production_capacity", {})),
+        )
+
+
+@dataclass(frozen=True)
+class ScenarioResult:
+    scenario: str
+    result: SolveResult
+    seconds: float
+    error: str | None = None
+
+
+class ScenarioBatch:
+    """
+    Solve many variations of one network across a process pool.
+
+    Each worker receives the base network once, as a plain DataDict, and
+    keeps its own ModelData. A task only ships its Scenario delta. For
+    "cbc" / "gurobi" a worker also keeps a persistent engine, so scenarios
+    re-solve the same model after an update() instead of rebuilding it.
+    """
+
+    def __init__(
+        self,
+        model_data: ModelData,
+        scenarios: Iterable[Scenario],
+        engine_type: str = "cbc",
+        max_workers: int | None = None,
+        solver_threads: int | None = None,
+    ) -> None:
+        self.data: ModelData = model_data
+        self.scenarios: list[Scenario] = list(scenarios)
+        self.engine_type: str = engine_type
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.solver_threads: int | None = solver_threads
+
+        names = [s.name for s in self.scenarios]
+        if len(set(names)) != len(names):
+            raise ValueError("Scenario names must be unique")
+
+    def run(self) -> Iterator[ScenarioResult]:
+        """
+        Yield results as soon as each scenario finishes (not in input order).
+        """
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(
+                Converter.from_model_data(self.data),
+                self.engine_type,
+                self._solver_options(),
+            ),
+        ) as executor:
+            futures = [
+                executor.submit(_solve_scenario, scenario)
+                for scenario in self.scenarios
+            ]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def run_all(self) -> pd.DataFrame:
+        return self.summary(self.run())
+
+    @staticmethod
+    def summary(results: Iterable[ScenarioResult]) -> pd.DataFrame:
+        """
+        One row per scenario: status, objective, solve time and error if any.
+        """
+        rows = [
+            {
+                "scenario": r.scenario,
+                "status": r.result.status,
+                "objective": r.result.objective,
+                "solver": r.result.solver,
+                "seconds": r.seconds,
+                "error": r.error,
+            }
+            for r in results
+        ]
+        columns = ["scenario", "status", "objective", "solver", "seconds", "error"]
+        return pd.DataFrame(rows, columns=columns).sort_values(
+            "scenario", ignore_index=True
+        )
+
+    def _solver_options(self) -> dict[str, Any]:
+        if self.solver_threads is None:
+            return {}
+        # the threads option in the names of the backend of engine_type
+        options = EngineConfig(
+            self.engine_type, solver_options=SolverOptions(threads=self.solver_threads)
+        ).backend_options()
+        if not options:
+            raise ValueError(
+                f"solver_threads is not supported for engine_type {self.engine_type}"
+            )
+        return options
+
+
+# --- worker side --------------------------------------------------------------
+
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(
+    data_dict: DataDict, engine_type: str, solver_options: dict[str, Any]
+) -> None:
+    model_data = ModelDataFactory.from_dict(data_dict)
+    _worker["model_data"] = model_data
+    _worker["engine_type"] = engine_type
+    _worker["solver_options"] = solver_options
+    _worker["engine"] = (
+        Engine(model_data, engine_type, persistent=True, solver_options=solver_options)
+        if engine_type in ("cbc", "gurobi")
+        else None
+    )
+
+
+def _solve_scenario(scenario: Scenario) -> ScenarioResult:
+    start = time.perf_counter()
+    try:
+        if _worker["engine"] is not None:
+            result = _solve_persistent(_worker["engine"], scenario)
+        else:
+            result = _solve_fresh(scenario)
+    except Exception as e:
+        return ScenarioResult(
+            scenario=scenario.name,
+            result=SolveResult(
+                status="error",
+                objective=float("nan"),
+                transport_quantity={},
+                solver=_worker["engine_type"],
+            ),
+            seconds=time.perf_counter() - start,
+            error=f"{type(e).__name__}: {e}",
+        )
+    return ScenarioResult(
+        scenario=scenario.name, result=result, seconds=time.perf_counter() - start
+    )
+
+
+def _solve_persistent(engine: Engine, scenario: Scenario) -> SolveResult:
+    data = engine.data
+    # base values of whatever the scenario touches, to restore afterwards
+    base = Scenario(
+        name="base",
+        client_demand={
+            c: data.clients_by_id[c].demand
+            for c in scenario.client_demand
+            if c in data.clients_by_id
+        },
+        transport_cost={
+            r: data.routes_by_id[r].transport_cost
+            for r in scenario.transport_cost
+            if r in data.routes_by_id
+        },
+        production_capacity={
+            w: data.workshops_by_id[w].production_capacity
+            for w in scenario.production_capacity
+            if w in data.workshops_by_id
+        },
+    )
+    engine.update(
+        client_demand=scenario.client_demand,
+        transport_cost=scenario.transport_cost,
+        production_capacity=scenario.production_capacity,
+    )
+    try:
+        return engine.run()
+    finally:
+        engine.update(
+            client_demand=base.client_demand,
+            transport_cost=base.transport_cost,
+            production_capacity=base.production_capacity,
+        )
+
+
+def _solve_fresh(scenario: Scenario) -> SolveResult:
+    # deep copy of the already validated base: no parsing, no re-validation
+    model_data = _worker["model_data"].model_copy(deep=True)
+    model_data.update_values(
+        client_demand=scenario.client_demand,
+        transport_cost=scenario.transport_cost,
+        production_capacity=scenario.production_capacity,
+    )
+    engine = Engine(
+        model_data,
+        _worker["engine_type"],
+        solver_options=_worker["solver_options"],
+    )
+    return engine.run()
@@ -0,0 +1,258 @@
+"""
+Duals and reduced costs of a solved EnginePyomo model (see Sensitivity).
+
+The LP is the model with every fixed variable taken as a constant: the model
+itself when it has no binaries, the MIP with its binaries fixed otherwise.
+The solver reports its duals and reduced costs through the `dual` and `rc`
+suffixes; they are kept when they form a dual solution of that LP (dual
+signs, complementary slackness with the solution, reduced costs equal to
+c - A^T y). A solver whose presolve turns rows into bounds (CBC) reports
+values of another problem: the dual LP is then built and solved with the
+same solver.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.common.collections import ComponentMap
+from pyomo.repn import generate_standard_repn
+
+from transport.engine.result import Sensitivity
+
+# constraint of the model -> section of Sensitivity
+SECTIONS = {
+    "constraint_workshop_capacity": "workshop_capacity",
+    "constraint_client_demand": "client_demand",
+    "constraint_route_capacity": "route_capacity",
+}
+
+# relative tolerance of the dual solution checks
+_TOLERANCE = 1e-6
+
+
+def declare_suffixes(model: pyo.ConcreteModel) -> None:
+    """
+    Ask the solver for the duals and reduced costs of model
+    """
+    if model.component("dual") is None:
+        model.dual = pyo.Suffix(direction=pyo.Suffix.IMPORT)
+    if model.component("rc") is None:
+        model.rc = pyo.Suffix(direction=pyo.Suffix.IMPORT)
+
+
+def model_sensitivity(
+    model: pyo.ConcreteModel, solver: str, solver_options: dict[str, Any]
+) -> Sensitivity | None:
+    """
+    Sensitivity of model, solved last by the LP solve that filled its
+    suffixes; None when the dual LP cannot be solved either
+    """
+    lp = _LinearProgram(model)
+    duals = lp.solver_duals()
+    source = "solver"
+    if duals is None or not lp.is_dual_solution(duals, lp.solver_reduced_costs()):
+        duals = lp.solve_dual(solver, solver_options)
+        source = "dual_lp"
+        if duals is None:
+            return None
+    reduced_cost = lp.reduced_costs(duals)
+
+    sections: dict[str, dict[str, float]] = {}
+    for name, section in SECTIONS.items():
+        sections[section] = {
+            index: lp.constraint_dual(constraint, duals)
+            for index, constraint in model.component(name).items()
+        }
+    return Sensitivity(
+        **sections,
+        reduced_cost={
+            route_id: float(reduced_cost[lp.columns[var]])
+            for route_id, var in model.var_transport_quantity.items()
+        },
+        source=source,
+    )
+
+
+class _LinearProgram:
+    """
+    min c x  s.t.  A x (<=, >=, ==) b,  x >= 0: the active constraints and
+    free variables of model, the fixed ones being constants
+    """
+
+    def __init__(self, model: pyo.ConcreteModel) -> None:
+        self.model = model
+        # variable -> column, constraint -> its rows (two for a range)
+        self.columns: ComponentMap = ComponentMap()
+        self.rows: ComponentMap = ComponentMap()
+        self.variables: list[Any] = []
+        entries: list[tuple[int, int, float]] = []
+        rhs: list[float] = []
+        sense: list[int] = []  # -1: <=, 1: >=, 0: ==
+
+        def column(var) -> int:
+            if var not in self.columns:
+                if var.lb != 0 or var.ub is not None:
+                    raise ValueError(f"{var.name} is not a non-negative variable")
+                self.columns[var] = len(self.variables)
+                self.variables.append(var)
+            return self.columns[var]
+
+        for constraint in model.component_data_objects(pyo.Constraint, active=True):
+            repn = generate_standard_repn(constraint.body, compute_values=True)
+            if repn.nonlinear_vars or repn.quadratic_vars:
+                raise ValueError(f"{constraint.name} is not linear")
+            lower, upper = constraint.lb, constraint.ub
+            if lower is not None and upper is not None and lower == upper:
+                bounds = [(0, upper)]
+            else:
+                bounds = [(1, lower)] if lower is not None else []
+                bounds += [(-1, upper)] if upper is not None else []
+            rows = []
+            for row_sense, value in bounds:
+                row = len(rhs)
+                rows.append(row)
+                rhs.append(float(value) - float(repn.constant))
+                sense.append(row_sense)
+                entries.extend(
+                    (row, column(var), float(coef))
+                    for var, coef in zip(repn.linear_vars, repn.linear_coefs)
+                )
+            self.rows[constraint] = rows
+
+        objective = next(model.component_data_objects(pyo.Objective, active=True))
+        if objective.sense != pyo.minimize:
+            raise ValueError("the objective must be minimized")
+        repn = generate_standard_repn(objective.expr, compute_values=True)
+        cost = {
+            column(var): float(c) for var, c in zip(repn.linear_vars, repn.linear_coefs)
+        }
+        for var in model.var_transport_quantity.values():
+            column(var)
+
+        self.n_rows = len(rhs)
+        self.n_columns = len(self.variables)
+        self.rhs = np.array(rhs)
+        self.sense = np.array(sense, dtype=int)
+        entries_array = np.array(entries, dtype=float).reshape(-1, 3)
+        self.entry_row = entries_array[:, 0].astype(np.int64)
+        self.entry_column = entries_array[:, 1].astype(np.int64)
+        self.entry_value = entries_array[:, 2]
+        self.cost = np.zeros(self.n_columns)
+        for j, c in cost.items():
+            self.cost[j] = c
+        self.x = np.array([var.value or 0.0 for var in self.variables])
+        self.activity = np.bincount(
+            self.entry_row,
+            self.entry_value * self.x[self.entry_column],
+            minlength=self.n_rows,
+        )
+        self.objective = float(self.cost @ self.x)
+
+    def solver_duals(self) -> np.ndarray | None:
+        """
+        Dual of every row from the dual suffix (that of its constraint for
+        the two rows of a range); None without one
+        """
+        suffix = self.model.component("dual")
+        if suffix is None:
+            return None
+        y = np.zeros(self.n_rows)
+        for constraint, rows in self.rows.items():
+            value = suffix.get(constraint)
+            if value is None:
+                return None
+            if len(rows) == 1:
+                y[rows[0]] = value
+            else:  # on the side the constraint is binding
+                y[rows[0] if value > 0 else rows[1]] = value
+        return y
+
+    def solver_reduced_costs(self) -> np.ndarray | None:
+        suffix = self.model.component("rc")
+        if suffix is None:
+            return None
+        values = [suffix.get(var) for var in self.variables]
+        if None in values:
+            return None
+        return np.array(values, dtype=float)
+
+    def reduced_costs(self, y: np.ndarray) -> np.ndarray:
+        """
+        c - A^T y
+        """
+        return self.cost - np.bincount(
+            self.entry_column,
+            self.entry_value * y[self.entry_row],
+            minlength=self.n_columns,
+        )
+
+    def is_dual_solution(self, y: np.ndarray, reduced_cost: np.ndarray | None) -> bool:
+        """
+        Whether y is an optimal dual solution for the current solution x,
+        with reduced_cost its reduced costs
+        """
+        computed = self.reduced_costs(y)
+        scale = 1.0 + np.abs(self.cost).max(initial=0.0)
+        tolerance = _TOLERANCE * scale
+        if (
+            reduced_cost is None
+            or np.abs(reduced_cost - computed).max(initial=0.0) > tolerance
+        ):
+            return False
+        if (y[self.sense < 0] > tolerance).any() or (
+            y[self.sense > 0] < -tolerance
+        ).any():
+            return False
+        if (computed < -tolerance).any():
+            return False
+        # complementary slackness
+        slack = _TOLERANCE * (1.0 + abs(self.objective))
+        return bool(
+            np.abs(self.x * computed).max(initial=0.0) <= slack
+            and np.abs(y * (self.activity - self.rhs)).max(initial=0.0) <= slack
+        )
+
+    def solve_dual(
+        self, solver: str, solver_options: dict[str, Any]
+    ) -> np.ndarray | None:
+        """
+        max b y  s.t.  A^T y <= c,  y <= 0 on <= rows, y >= 0 on >= rows
+        """
+        dual = pyo.ConcreteModel()
+        dual.rows = pyo.RangeSet(0, self.n_rows - 1)
+        domains = {-1: pyo.NonPositiveReals, 1: pyo.NonNegativeReals, 0: pyo.Reals}
+        dual.y = pyo.Var(dual.rows, domain=lambda _, i: domains[int(self.sense[i])])
+
+        order = np.argsort(self.entry_column, kind="stable")
+        starts = np.searchsorted(
+            self.entry_column[order], np.arange(self.n_columns + 1)
+        )
+        rows = self.entry_row[order].tolist()
+        values = self.entry_value[order].tolist()
+
+        def column(_, j: int):
+            if starts[j] == starts[j + 1]:
+                return pyo.Constraint.Skip
+            return (
+                sum(
+                    values[k] * dual.y[rows[k]] for k in range(starts[j], starts[j + 1])
+                )
+                <= self.cost[j]
+            )
+
+        dual.columns = pyo.Constraint(pyo.RangeSet(0, self.n_columns - 1), rule=column)
+        rhs = self.rhs.tolist()
+        dual.objective = pyo.Objective(
+            expr=sum(rhs[i] * dual.y[i] for i in range(self.n_rows)),
+            sense=pyo.maximize,
+        )
+        results = pyo.SolverFactory(solver).solve(dual, options=solver_options)
+        if results.solver.termination_condition != pyo.TerminationCondition.optimal:
+            return None
+        return np.array([dual.y[i].value or 0.0 for i in range(self.n_rows)])
+
+    def constraint_dual(self, constraint, y: np.ndarray) -> float:
+        return float(sum(y[row] for row in self.rows[constraint]))
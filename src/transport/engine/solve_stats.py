@@ -0,0 +1,138 @@
+"""
+Where a solve spends its time, and how large the model was.
+
+Engines record their phases into AbstractEngine.stats:
+
+    presolve  Presolve (Engine only)
+    build     model construction (Pyomo model, arrays, Hexaly model)
+    write     model file written for the solver (LP / MPS)
+    solve     the solver itself, including reading its results back
+    extract   SolveResult built from the solution
+
+Engine attaches the stats to SolveResult.stats and hands the result to its
+hooks, e.g. to ship SolveStats.as_dict() to a metrics system. Within a
+transport.memory_profile.MemoryProfile the phases record their memory too,
+and within on_phase(callback) every phase entered is reported to callback
+(AsyncEngine's progress events).
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from transport.memory_profile import memory_stage
+
+if TYPE_CHECKING:
+    from transport.engine.result import SolveResult
+
+# called by Engine.run with every result
+SolveHook = Callable[["SolveResult"], None]
+
+# called with the name of every phase entered, see on_phase
+_phase_listener: ContextVar[Callable[[str], None] | None] = ContextVar(
+    "phase_listener", default=None
+)
+
+
+@dataclass(frozen=True)
+class PhaseTiming:
+    wall: float  # seconds
+    # seconds of CPU of this process; a solver running in a subprocess is
+    # not included
+    cpu: float
+
+
+@dataclass
+class SolveStats:
+    """
+    Timings of the phases of one solve, the size of the model solved and
+    what the solver reports. None when an engine does not know.
+    """
+
+    phases: dict[str, PhaseTiming] = field(default_factory=dict)
+    variables: int | None = None
+    binaries: int | None = None
+    constraints: int | None = None
+    nonzeros: int | None = None
+    # branch-and-bound nodes and simplex / local search iterations
+    nodes: int | None = None
+    iterations: int | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        listener = _phase_listener.get()
+        if listener is not None:
+            listener(name)
+        with memory_stage(name):
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                yield
+            finally:
+                self.add(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def add(self, name: str, wall: float, cpu: float) -> None:
+        """
+        Add time to a phase (phases entered several times accumulate)
+        """
+        before = self.phases.get(name, PhaseTiming(0.0, 0.0))
+        self.phases[name] = PhaseTiming(before.wall + wall, before.cpu + cpu)
+
+    def set_model_size(
+        self, n_workshops: int, n_clients: int, n_routes: int, n_binaries: int
+    ) -> None:
+        """
+        Size of the EnginePyomo formulation: a quantity per route, a row per
+        workshop, client and route, and two rows (x - M y, x - min y) per
+        var_is_route_used binary.
+        """
+        self.variables = n_routes + n_binaries
+        self.binaries = n_binaries
+        self.constraints = n_workshops + n_clients + n_routes + 2 * n_binaries
+        self.nonzeros = 3 * n_routes + 4 * n_binaries
+
+    @property
+    def wall(self) -> float:
+        return sum(t.wall for t in self.phases.values())
+
+    @property
+    def cpu(self) -> float:
+        return sum(t.cpu for t in self.phases.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Flat name -> number mapping ("build_wall", "solve_cpu", "variables",
+        ...), without the values that are unknown
+        """
+        values: dict[str, Any] = {}
+        for name, timing in self.phases.items():
+            values[f"{name}_wall"] = timing.wall
+            values[f"{name}_cpu"] = timing.cpu
+        for name in (
+            "variables",
+            "binaries",
+            "constraints",
+            "nonzeros",
+            "nodes",
+            "iterations",
+        ):
+            value = getattr(self, name)
+            if value is not None:
+                values[name] = value
+        return values
+
+
+@contextmanager
+def on_phase(callback: Callable[[str], None]) -> Iterator[None]:
+    """
+    Report the name of every SolveStats phase entered within the block
+    """
+    token = _phase_listener.set(callback)
+    try:
+        yield
+    finally:
+        _phase_listener.reset(token)
@@ -0,0 +1,92 @@
+"""
+Solver settings shared by the backends, under one name each.
+
+SolverOptions.for_solver translates them to the option names and values of
+a backend; Engine does it for its engine_type. A setting a backend has no
+equivalent for is left out.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import asdict, dataclass
+from typing import Any
+
+# backend -> SolverOptions field -> backend option name
+OPTION_NAMES: dict[str, dict[str, str]] = {
+    "cbc": {
+        "time_limit": "seconds",
+        "mip_gap": "ratioGap",
+        "threads": "threads",
+        "node_limit": "maxNodes",
+        "presolve": "presolve",
+    },
+    "gurobi": {
+        "time_limit": "TimeLimit",
+        "mip_gap": "MIPGap",
+        "threads": "Threads",
+        "node_limit": "NodeLimit",
+        "presolve": "Presolve",
+    },
+    "hexaly": {
+        "time_limit": "time_limit",
+        "threads": "nb_threads",
+    },
+}
+
+# presolve level -> CBC's -presolve value
+_CBC_PRESOLVE = {0: "off", 1: "on", 2: "more"}
+
+
+@dataclass(frozen=True)
+class SolverOptions:
+    """
+    Settings of a solve; None leaves the solver's default.
+
+    Attributes
+    ----------
+    time_limit : seconds, after which the best solution found is returned
+    mip_gap : relative gap (0.01 is 1%) at which the solve stops
+    threads : threads the solver may use
+    node_limit : branch-and-bound nodes after which the solve stops
+    presolve : 0 off, 1 on, 2 aggressive
+    """
+
+    time_limit: float | None = None
+    mip_gap: float | None = None
+    threads: int | None = None
+    node_limit: int | None = None
+    presolve: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.time_limit is not None and not self.time_limit > 0:
+            raise ValueError(f"time_limit must be positive, not {self.time_limit}")
+        if self.mip_gap is not None and not 0 <= self.mip_gap < 1:
+            raise ValueError(f"mip_gap must be in [0, 1), not {self.mip_gap}")
+        for name in ("threads", "node_limit"):
+            value = getattr(self, name)
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1, not {value}")
+        if self.presolve is not None and self.presolve not in _CBC_PRESOLVE:
+            raise ValueError(f"presolve must be 0, 1 or 2, not {self.presolve}")
+
+    def for_solver(self, solver: str) -> dict[str, Any]:
+        """
+        Options of the given backend ("cbc", "gurobi", "hexaly"), with its
+        own names
+        """
+        names = OPTION_NAMES.get(solver)
+        if names is None:
+            raise ValueError(
+                f"solver can only be {list(OPTION_NAMES)}, but it is {solver}"
+            )
+        options = {}
+        for field, value in asdict(self).items():
+            if value is None or field not in names:
+                continue
+            if solver == "cbc" and field == "presolve":
+                value = _CBC_PRESOLVE[value]
+            elif solver == "hexaly" and field == "time_limit":
+                value = math.ceil(value)  # whole seconds
+            options[names[field]] = value
+        return options
@@ -1,6 +1,10 @@
+from transport.factory.generator import generate_network
 from transport.factory.model_data_factory import ModelDataFactory
+from transport.factory.snapshot import SnapshotCache
 
 
 __all__ = [
     "ModelDataFactory",
+    "SnapshotCache",
+    "generate_network",
 ]
\ No newline at end of file
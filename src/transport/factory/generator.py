@@ -0,0 +1,233 @@
+"""
+Seeded synthetic transport networks, for benchmarks and tests.
+
+Workshops and clients are points in the unit square and a route costs more
+the longer it is. The structure decides which routes exist:
+
+    random    routes between uniformly drawn (workshop, client) pairs
+    regional  workshops and clients gathered around n_regions centres; most
+              routes stay within their region, and those that leave it are
+              longer, so dearer
+
+Every workshop and every client has at least one route, the routes of a
+client can carry its whole demand, and the workshops together produce
+total demand / tightness. A network is then feasible in most cases, though
+not always: with tightness close to 1 the capacity is spread too thinly for
+some workshops to serve all the clients relying on them.
+"""
+
+from __future__ import annotations
+
+from typing import Literal
+
+import numpy as np
+
+from transport.context.columnar_model_data import ColumnarModelData
+
+STRUCTURES = ("random", "regional")
+
+# share of the routes of the regional structure within their region
+_LOCALITY = 0.9
+# spread of the points around their region centre
+_REGION_RADIUS = 0.05
+
+
+def generate_network(
+    n_workshops: int,
+    n_clients: int,
+    n_routes: int | None = None,
+    density: float = 1.0,
+    min_quantity_share: float = 0.0,
+    tightness: float = 0.8,
+    structure: Literal["random", "regional"] = "random",
+    n_regions: int = 4,
+    seed: int = 0,
+) -> ColumnarModelData:
+    """
+    Random network; the same arguments give the same network.
+
+    Parameters
+    ----------
+    n_workshops, n_clients : number of workshops and clients
+    n_routes : number of routes, between max(n_workshops, n_clients) and
+        n_workshops * n_clients; density * n_workshops * n_clients when None
+    density : share of the (workshop, client) pairs with a route, used when
+        n_routes is None
+    min_quantity_share : share of the routes with a minimum transport
+        quantity (10-50% of their capacity)
+    tightness : total demand / total production capacity, in (0, 1]
+    structure : "random" or "regional", see the module docstring
+    n_regions : number of regions of the regional structure
+    seed : seed of the random generator
+    """
+    if n_workshops < 1 or n_clients < 1:
+        raise ValueError(
+            "n_workshops and n_clients must be at least 1, "
+            f"not {n_workshops} / {n_clients}"
+        )
+    if structure not in STRUCTURES:
+        raise ValueError(
+            f"structure can only be {list(STRUCTURES)}, but it is {structure}"
+        )
+    if not 0 <= min_quantity_share <= 1:
+        raise ValueError(
+            f"min_quantity_share must be in [0, 1], not {min_quantity_share}"
+        )
+    if not 0 < tightness <= 1:
+        raise ValueError(f"tightness must be in (0, 1], not {tightness}")
+    if n_regions < 1:
+        raise ValueError(f"n_regions must be at least 1, not {n_regions}")
+    n_pairs = n_workshops * n_clients
+    if n_routes is None:
+        if not 0 < density <= 1:
+            raise ValueError(f"density must be in (0, 1], not {density}")
+        n_routes = max(round(density * n_pairs), n_workshops, n_clients)
+    if not max(n_workshops, n_clients) <= n_routes <= n_pairs:
+        raise ValueError(
+            f"n_routes must be in [{max(n_workshops, n_clients)}, {n_pairs}], "
+            f"not {n_routes}"
+        )
+
+    rng = np.random.default_rng(seed)
+    if structure == "regional":
+        workshop_region = rng.integers(n_regions, size=n_workshops)
+        client_region = rng.integers(n_regions, size=n_clients)
+        centres = rng.uniform(0.1, 0.9, size=(n_regions, 2))
+        workshop_xy = _around(rng, centres[workshop_region])
+        client_xy = _around(rng, centres[client_region])
+    else:
+        workshop_region = client_region = None
+        workshop_xy = rng.uniform(size=(n_workshops, 2))
+        client_xy = rng.uniform(size=(n_clients, 2))
+
+    origin, destination = _routes(
+        rng, n_workshops, n_clients, n_routes, workshop_region, client_region
+    )
+
+    distance = np.hypot(*(workshop_xy[origin] - client_xy[destination]).T)
+    transport_cost = 1.0 + 20.0 * distance * rng.uniform(0.9, 1.1, size=n_routes)
+
+    demand = rng.uniform(1.0, 10.0, size=n_clients)
+    transport_capacity = demand[destination] * rng.uniform(0.3, 1.0, size=n_routes)
+    # the routes of every client can carry at least 1.2 times its demand
+    reach = np.bincount(destination, weights=transport_capacity, minlength=n_clients)
+    transport_capacity *= np.maximum(1.2 * demand / reach, 1.0)[destination]
+
+    # workshops produce in proportion to what their routes can carry
+    supply = np.bincount(origin, weights=transport_capacity, minlength=n_workshops)
+    supply *= rng.uniform(0.8, 1.2, size=n_workshops)
+    production_capacity = supply * demand.sum() / (tightness * supply.sum())
+
+    min_transport_quantity = np.where(
+        rng.random(n_routes) < min_quantity_share,
+        transport_capacity * rng.uniform(0.1, 0.5, size=n_routes),
+        0.0,
+    )
+
+    # built valid, the caller decides when to pay for the checks
+    return ColumnarModelData(
+        workshop_ids=np.char.add("W", np.arange(n_workshops).astype(str)),
+        production_capacity=production_capacity,
+        production_cost=rng.uniform(10.0, 30.0, size=n_workshops),
+        client_ids=np.char.add("C", np.arange(n_clients).astype(str)),
+        demand=demand,
+        route_origin=origin,
+        route_destination=destination,
+        transport_cost=transport_cost,
+        transport_capacity=transport_capacity,
+        min_transport_quantity=min_transport_quantity,
+        validate=False,
+    )
+
+
+def _around(rng: np.random.Generator, centres: np.ndarray) -> np.ndarray:
+    return np.clip(centres + rng.normal(0.0, _REGION_RADIUS, centres.shape), 0, 1)
+
+
+def _routes(
+    rng: np.random.Generator,
+    n_workshops: int,
+    n_clients: int,
+    n_routes: int,
+    workshop_region: np.ndarray | None,
+    client_region: np.ndarray | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (origin, destination) of n_routes distinct pairs, sorted by workshop
+    then client
+    """
+    # pairs (w_t, c_t) of two permutations, t < max(W, C), are distinct and
+    # give every workshop and every client a route
+    n_cover = max(n_workshops, n_clients)
+    t = np.arange(n_cover)
+    cover = (
+        rng.permutation(n_workshops)[t % n_workshops] * n_clients
+        + rng.permutation(n_clients)[t % n_clients]
+    )
+
+    # pairs as flat codes workshop * n_clients + client
+    n_pairs = n_workshops * n_clients
+    if workshop_region is None or client_region is None:
+        drawn = rng.choice(n_pairs, size=n_routes - n_cover, replace=False)
+    else:
+        drawn = _regional_pairs(
+            rng, n_clients, n_routes - n_cover, workshop_region, client_region
+        )
+    codes = _distinct(cover, drawn)
+    # complete the drawn pairs that were cover pairs already
+    if n_routes > n_pairs // 2:
+        rest = np.delete(np.arange(n_pairs), codes)
+        codes = _distinct(
+            codes, rng.choice(rest, size=n_routes - len(codes), replace=False)
+        )
+    while len(codes) < n_routes:
+        more = rng.integers(n_pairs, size=2 * (n_routes - len(codes)) + 16)
+        more = _distinct(more[~np.isin(more, codes, kind="sort")])
+        codes = _distinct(codes, rng.permutation(more)[: n_routes - len(codes)])
+    return (codes // n_clients).astype(np.int32), (codes % n_clients).astype(np.int32)
+
+
+def _regional_pairs(
+    rng: np.random.Generator,
+    n_clients: int,
+    size: int,
+    workshop_region: np.ndarray,
+    client_region: np.ndarray,
+) -> np.ndarray:
+    """
+    Up to `size` distinct pairs: a random client and a workshop of its region
+    (of any region for 1 - _LOCALITY of them, or when its region has none)
+    """
+    n_workshops = len(workshop_region)
+    # workshops sorted by region, and where every region starts among them
+    by_region = np.argsort(workshop_region, kind="stable")
+    n_regions = int(max(workshop_region.max(), client_region.max())) + 1
+    counts = np.bincount(workshop_region, minlength=n_regions)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    codes = np.empty(0, dtype=np.int64)
+    for _ in range(20):
+        if len(codes) >= size:
+            break
+        n_draw = 2 * (size - len(codes))
+        client = rng.integers(n_clients, size=n_draw)
+        region = client_region[client]
+        local = (rng.random(n_draw) < _LOCALITY) & (counts[region] > 0)
+        workshop = rng.integers(n_workshops, size=n_draw)
+        offset = (rng.random(n_draw) * counts[region]).astype(np.int64)
+        workshop[local] = by_region[starts[region[local]] + offset[local]]
+        codes = _distinct(codes, workshop * n_clients + client)
+    # dense regional networks run out of local pairs: the rest is left to
+    # _routes, which completes with uniform pairs
+    return rng.permutation(codes)[:size]
+
+
+def _distinct(*codes: np.ndarray) -> np.ndarray:
+    """
+    Sorted distinct values of the arrays (np.union1d, sorting instead of
+    hashing: several times faster on millions of pairs)
+    """
+    values = np.sort(np.concatenate(codes))
+    first = np.ones(len(values), dtype=bool)
+    first[1:] = values[1:] != values[:-1]
+    return values[first]
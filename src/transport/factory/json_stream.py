@@ -0,0 +1,162 @@
+"""
+Incremental reader for the JSON layout of Converter.from_json:
+
+    {"workshops": [{...}, ...], "clients": [{...}, ...], "routes": [{...}, ...]}
+
+The file is read in fixed-size chunks and every row object is decoded on
+its own by json's C scanner, so memory holds one chunk and one row at a
+time instead of the whole document.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, TextIO
+
+# characters read from the file at a time
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = " \t\n\r"
+
+# separator after an array element, with the whitespace around it
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+
+
+def iter_json_rows(
+    file: str | Path,
+    tables: tuple[str, ...] = ("workshops", "clients", "routes"),
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    (table, row) for every element of the top-level arrays named in tables,
+    in file order. Other top-level keys are decoded and skipped.
+    """
+    with open(file, "r", encoding="utf-8") as f:
+        yield from _RowReader(f, chunk_size).rows(tables)
+
+
+class _RowReader:
+    def __init__(self, stream: TextIO, chunk_size: int) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def rows(self, tables: tuple[str, ...]) -> Iterator[tuple[str, dict[str, Any]]]:
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                self._error("Expected an object key")
+            self._expect(":")
+            if key in tables and self._peek() == "[":
+                self.pos += 1
+                yield from self._array(key)
+            else:
+                self._value()
+            separator = self._next()
+            if separator == "}":
+                return
+            if separator != ",":
+                self.pos -= 1
+                self._error("Expected ',' or '}'")
+
+    def _array(self, key: str) -> Iterator[tuple[str, Any]]:
+        """
+        (key, element) for every element of the array at the current position
+        """
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        # json's C scanner, without raw_decode's wrapper
+        scan = self.decoder.scan_once
+        while True:
+            # fast path: an element and its separator complete in the buffer
+            try:
+                value, end = scan(self.buffer, self.pos)
+                match = _SEPARATOR.match(self.buffer, end)
+            except (StopIteration, json.JSONDecodeError):
+                match = None  # incomplete (or invalid): see _value
+            if match is not None:
+                self.pos = match.end()
+                yield key, value
+                if match.group(1) == "]":
+                    return
+                continue
+
+            yield key, self._value()
+            separator = self._next()
+            if separator == "]":
+                return
+            if separator != ",":
+                self.pos -= 1
+                self._error("Expected ',' or ']'")
+            self._skip_whitespace()
+
+    def _value(self) -> Any:
+        """
+        Decode the JSON value at the current position, reading more of the
+        file until it is complete.
+        """
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # a number (or a literal) cut by the end of the buffer decodes
+            # too early: make sure more input cannot extend it
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _next(self) -> str:
+        char = self._peek()
+        self.pos += 1
+        return char
+
+    def _peek(self) -> str:
+        self._skip_whitespace()
+        if self.pos >= len(self.buffer):
+            self._error("Unexpected end of file")
+        return self.buffer[self.pos]
+
+    def _expect(self, char: str) -> None:
+        if self._next() != char:
+            self.pos -= 1
+            self._error(f"Expected {char!r}")
+
+    def _skip_whitespace(self) -> None:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def _fill(self) -> bool:
+        """
+        Append a chunk to the buffer, dropping what was consumed. False at
+        the end of the file.
+        """
+        if self.eof:
+            return False
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def _error(self, message: str) -> None:
+        raise json.JSONDecodeError(message, self.buffer, self.pos)
@@ -1,35 +1,229 @@
 from __future__ import annotations
 
+import importlib.util
 import json
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, Any, Union
 
-from transport.factory.types import DataDict
+from transport.context import ColumnarModelData, ModelData
+from transport.factory.json_stream import iter_json_rows
+from transport.factory.types import ColumnsDict, DataDict
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 PathLike = Union[str, Path]
 
+# Excel sheet, or CSV / Parquet file stem, of each table
+TABLE_NAMES = {"workshops": "Workshops", "clients": "Clients", "routes": "Routes"}
+
+# dtype of the columns read from the tables (is_active is left to the factory,
+# as it is optional and may hold blanks)
+COLUMN_DTYPES = {
+    "id": str,
+    "production_capacity": float,
+    "production_cost": float,
+    "demand": float,
+    "origin": str,
+    "destination": str,
+    "transport_cost": float,
+    "transport_capacity": float,
+    "min_transport_quantity": float,
+}
+
 
 class Converter:
     def __init__(self):
         pass
 
     @staticmethod
-    def from_json(file: str) -> DataDict:
+    def from_json(file: PathLike) -> DataDict:
+        """
+        Whole document at once, parsed by orjson when it is installed.
+        """
+        if _installed("orjson"):
+            import orjson
+
+            with open(file, "rb") as f:
+                data: DataDict = orjson.loads(f.read())
+            return data
         with open(file, "r", encoding="utf-8") as f:
-            data: DataDict = json.load(f)
+            data = json.load(f)
         return data
 
+    @staticmethod
+    def iter_json(file: PathLike) -> Iterator[tuple[str, dict[str, Any]]]:
+        """
+        (table, row) for every row of the file read by from_json, decoded one
+        at a time: the whole DataDict is never held in memory.
+        """
+        return iter_json_rows(file, tuple(TABLE_NAMES))
+
     @staticmethod
     def from_excel(file: PathLike) -> DataDict:
+        frames = Converter._read_excel(file)
+        data: DataDict = {
+            "workshops": frames["workshops"].to_dict("records"),
+            "clients": frames["clients"].to_dict("records"),
+            "routes": frames["routes"].to_dict("records"),
+        }
+        return data
+
+    @staticmethod
+    def columns_from_excel(file: PathLike) -> ColumnsDict:
+        return _columns(Converter._read_excel(file))
+
+    @staticmethod
+    def columns_from_csv(directory: PathLike) -> ColumnsDict:
+        """
+        Tables from Workshops.csv, Clients.csv and Routes.csv in directory,
+        parsed by pyarrow's multi-threaded reader when it is installed.
+        """
+        import pandas as pd
+
+        engine = "pyarrow" if _installed("pyarrow") else "c"
+        return _columns(
+            {
+                name: pd.read_csv(
+                    Path(directory) / f"{stem}.csv",
+                    dtype=COLUMN_DTYPES,
+                    engine=engine,
+                )
+                for name, stem in TABLE_NAMES.items()
+            }
+        )
+
+    @staticmethod
+    def columns_from_parquet(
+        directory: PathLike, memory_map: bool = True
+    ) -> ColumnsDict:
+        """
+        Tables from Workshops.parquet, Clients.parquet and Routes.parquet in
+        directory (requires pyarrow, from the io extra). With memory_map the files are mapped
+        rather than read into memory, and numeric columns stored as a single
+        chunk without nulls are handed over without a copy.
+        """
+        _require("pyarrow", "Parquet files")
+        import pyarrow.parquet as pq
+
+        columns = {}
+        for name, stem in TABLE_NAMES.items():
+            table = pq.read_table(
+                Path(directory) / f"{stem}.parquet", memory_map=memory_map
+            )
+            columns[name] = {
+                column: table.column(column).to_numpy() for column in table.column_names
+            }
+        return ColumnsDict(**columns)
+
+    @staticmethod
+    def _read_excel(file: PathLike) -> dict[str, pd.DataFrame]:
+        """
+        The three sheets, parsed in one pass over the workbook with typed
+        columns (with the calamine engine when python-calamine is installed,
+        openpyxl otherwise).
+        """
         import pandas as pd
 
-        workshops = pd.read_excel(file, sheet_name="Workshops").to_dict("records")
-        clients = pd.read_excel(file, sheet_name="Clients").to_dict("records")
-        routes = pd.read_excel(file, sheet_name="Routes").to_dict("records")
+        if _installed("python_calamine"):
+            engine = "calamine"
+        else:
+            _require("openpyxl", "Excel files")
+            engine = "openpyxl"
+        sheets = pd.read_excel(
+            file,
+            sheet_name=list(TABLE_NAMES.values()),
+            dtype=COLUMN_DTYPES,
+            engine=engine,
+        )
+        return {name: sheets[sheet] for name, sheet in TABLE_NAMES.items()}
+
+    @staticmethod
+    def from_model_data(model_data: ModelData) -> DataDict:
+        """
+        Plain-dict form of a ModelData (the schema from_json reads); cheap to
+        pickle or serialize, and ModelDataFactory can rebuild it.
+        """
+        data: DataDict = {
+            "workshops": [
+                {
+                    "id": w.id_,
+                    "production_capacity": w.production_capacity,
+                    "production_cost": w.production_cost,
+                }
+                for w in model_data.workshops
+            ],
+            "clients": [{"id": c.id_, "demand": c.demand} for c in model_data.clients],
+            "routes": [
+                {
+                    "origin": r.origin,
+                    "destination": r.destination,
+                    "transport_cost": r.transport_cost,
+                    "transport_capacity": r.transport_capacity,
+                    "min_transport_quantity": r.min_transport_quantity,
+                    "is_active": r.is_active,
+                }
+                for r in model_data.routes
+            ],
+        }
+        return data
 
+    @staticmethod
+    def from_columnar(columnar: ColumnarModelData) -> DataDict:
+        """
+        from_model_data for a ColumnarModelData, read off its columns without
+        building the Workshop / Client / Route views
+        """
+        workshops = {
+            "id": columnar.workshop_ids.tolist(),
+            "production_capacity": columnar.production_capacity.tolist(),
+            "production_cost": columnar.production_cost.tolist(),
+        }
+        clients = {
+            "id": columnar.client_ids.tolist(),
+            "demand": columnar.demand.tolist(),
+        }
+        routes = {
+            "origin": columnar.workshop_ids[columnar.route_origin].tolist(),
+            "destination": columnar.client_ids[columnar.route_destination].tolist(),
+            "transport_cost": columnar.transport_cost.tolist(),
+            "transport_capacity": columnar.transport_capacity.tolist(),
+            "min_transport_quantity": columnar.min_transport_quantity.tolist(),
+            "is_active": columnar.is_active.tolist(),
+        }
         data: DataDict = {
-            "workshops": workshops,
-            "clients": clients,
-            "routes": routes,
+            "workshops": _records(workshops),
+            "clients": _records(clients),
+            "routes": _records(routes),
         }
         return data
+
+
+def _records(table: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    return [dict(zip(table, row)) for row in zip(*table.values())]
+
+
+def _columns(frames: dict[str, pd.DataFrame]) -> ColumnsDict:
+    return ColumnsDict(
+        **{
+            name: {column: frame[column].to_numpy() for column in frame.columns}
+            for name, frame in frames.items()
+        }
+    )
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _require(module: str, feature: str) -> None:
+    """
+    ImportError naming the io extra when module, needed to read feature, is
+    not installed
+    """
+    if not _installed(module):
+        raise ImportError(
+            f"reading {feature} requires {module}, "
+            "install it with: pip install 'transportproblem[io]'"
+        )
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+from array import array
+from collections.abc import Callable, Iterable
 from pathlib import Path
+from typing import Any
 
+import numpy as np
+
+from transport.context.columnar_model_data import ColumnarModelData
 from transport.context.model_data import ModelData
 from transport.context.objects import Client, Route, Workshop
+from transport.context.objects.validation_utils import (
+    ModelDataValidationError,
+    intern_ids,
+)
 from transport.factory.model_data_converter import Converter, DataDict
-from transport.factory.types import ClientRow, RouteRow, WorkshopRow
+from transport.factory.snapshot import SnapshotCache
+from transport.factory.types import ClientRow, ColumnsDict, RouteRow, WorkshopRow
+from transport.memory_profile import memory_stage
 
 
 class ModelDataFactory:
@@ -13,14 +25,228 @@ class ModelDataFactory:
         pass
 
     @staticmethod
-    def from_json(file: str | "Path") -> ModelData:
-        return ModelDataFactory()._create_model_data(Converter.from_json(file))
+    def from_json(
+        file: str | "Path",
+        bulk_validation: bool = False,
+        cache: SnapshotCache | None = None,
+    ) -> ModelData:
+        """
+        bulk_validation streams the file row by row into columns (see
+        columnar_from_json) instead of loading it whole first.
+
+        With a cache, the data is read from its snapshot when the file has
+        not changed since it was stored, without parsing nor validation
+        (the checks are the bulk ones).
+        """
+        factory = ModelDataFactory()
+        if bulk_validation or cache is not None:
+            return factory._model_data_from_columnar(
+                ModelDataFactory.columnar_from_json(file, cache=cache)
+            )
+        with memory_stage("read"):
+            data_dict = Converter.from_json(file)
+        with memory_stage("model_data"):
+            return factory._create_model_data(data_dict)
+
+    @staticmethod
+    def from_excel(
+        file: str | "Path",
+        bulk_validation: bool = False,
+        cache: SnapshotCache | None = None,
+    ) -> ModelData:
+        """
+        See from_json for bulk_validation and cache
+        """
+        factory = ModelDataFactory()
+        if bulk_validation or cache is not None:
+            return factory._model_data_from_columnar(
+                ModelDataFactory.columnar_from_excel(file, cache=cache)
+            )
+        with memory_stage("read"):
+            data_dict = Converter.from_excel(file)
+        with memory_stage("model_data"):
+            return factory._create_model_data(data_dict)
+
+    @staticmethod
+    def from_csv(directory: str | "Path") -> ModelData:
+        factory = ModelDataFactory()
+        return factory._model_data_from_columnar(
+            factory._create_columnar_model_data(Converter.columns_from_csv(directory))
+        )
+
+    @staticmethod
+    def from_parquet(directory: str | "Path") -> ModelData:
+        factory = ModelDataFactory()
+        return factory._model_data_from_columnar(
+            factory._create_columnar_model_data(
+                Converter.columns_from_parquet(directory)
+            )
+        )
+
+    @staticmethod
+    def from_dict(data_dict: DataDict, bulk_validation: bool = False) -> ModelData:
+        with memory_stage("model_data"):
+            return ModelDataFactory()._create_model_data(data_dict, bulk_validation)
+
+    @staticmethod
+    def columnar_from_json(
+        file: str | "Path",
+        stream: bool = True,
+        cache: SnapshotCache | None = None,
+    ) -> ColumnarModelData:
+        """
+        stream reads the file row by row, so peak memory stays close to the
+        size of the columns; stream=False loads it whole first (faster, with
+        orjson, but holding every row dict at once).
+        """
+        factory = ModelDataFactory()
+
+        def build() -> ColumnarModelData:
+            if stream:
+                return factory._create_columnar_model_data_from_rows(
+                    Converter.iter_json(file)
+                )
+            return factory.columnar_from_dict(Converter.from_json(file))
+
+        return factory._load(file, "json", build, cache)
+
+    @staticmethod
+    def columnar_from_excel(
+        file: str | "Path", cache: SnapshotCache | None = None
+    ) -> ColumnarModelData:
+        factory = ModelDataFactory()
+
+        def build() -> ColumnarModelData:
+            return factory._create_columnar_model_data(
+                Converter.columns_from_excel(file)
+            )
+
+        return factory._load(file, "excel", build, cache)
+
+    @staticmethod
+    def columnar_from_csv(directory: str | "Path") -> ColumnarModelData:
+        return ModelDataFactory()._create_columnar_model_data(
+            Converter.columns_from_csv(directory)
+        )
 
     @staticmethod
-    def from_excel(file: str) -> ModelData:
-        return ModelDataFactory()._create_model_data(Converter.from_excel(file))
+    def columnar_from_parquet(
+        directory: str | "Path", memory_map: bool = True
+    ) -> ColumnarModelData:
+        return ModelDataFactory()._create_columnar_model_data(
+            Converter.columns_from_parquet(directory, memory_map)
+        )
+
+    @staticmethod
+    def columnar_from_dict(data_dict: DataDict) -> ColumnarModelData:
+        return ModelDataFactory()._create_columnar_model_data(
+            _record_columns(data_dict), records=True
+        )
+
+    def _load(
+        self,
+        file: str | "Path",
+        reader: str,
+        build: Callable[[], ColumnarModelData],
+        cache: SnapshotCache | None,
+    ) -> ColumnarModelData:
+        with memory_stage("load"):
+            if cache is None:
+                return build()
+            return cache.load(file, build, reader)
+
+    def _create_columnar_model_data(
+        self, columns: ColumnsDict, records: bool = False
+    ) -> ColumnarModelData:
+        """
+        ColumnarModelData straight from the columns of the three tables: no
+        Workshop / Client / Route object (nor per-row dict) is built.
+
+        Every column is checked at once, and all violations (missing or
+        unreadable values included) are raised together as a
+        ModelDataValidationError. The ids of records (JSON rows) must be
+        strings, as for the Workshop / Client / Route models; those of the
+        table readers are read as text.
+        """
+        workshops = columns.get("workshops", {})
+        clients = columns.get("clients", {})
+        routes = columns.get("routes", {})
+        errors: list[str] = []
+        n_routes = _n_rows(routes)
+        try:
+            columnar = ColumnarModelData.from_columns(
+                workshop_ids=_id_column(workshops, "id", "workshops", errors, records),
+                production_capacity=_float_column(
+                    workshops, "production_capacity", "workshops", errors
+                ),
+                production_cost=_float_column(
+                    workshops, "production_cost", "workshops", errors
+                ),
+                client_ids=_id_column(clients, "id", "clients", errors, records),
+                demand=_float_column(clients, "demand", "clients", errors),
+                origin=_id_column(routes, "origin", "routes", errors, records),
+                destination=_id_column(
+                    routes, "destination", "routes", errors, records
+                ),
+                transport_cost=_float_column(
+                    routes, "transport_cost", "routes", errors
+                ),
+                transport_capacity=_float_column(
+                    routes, "transport_capacity", "routes", errors
+                ),
+                min_transport_quantity=_float_column(
+                    routes, "min_transport_quantity", "routes", errors
+                ),
+                is_active=_bool_column(routes, "is_active", n_routes),
+            )
+        except ModelDataValidationError as error:
+            raise ModelDataValidationError(errors + error.errors) from None
+        if errors:
+            raise ModelDataValidationError(errors)
+        return columnar
+
+    def _create_columnar_model_data_from_rows(
+        self, rows: Iterable[tuple[str, dict[str, Any]]]
+    ) -> ColumnarModelData:
+        """
+        ColumnarModelData from (table, row) pairs, as streamed by
+        Converter.iter_json: each row is checked (missing or unreadable
+        values) and appended to compact columns as it arrives, so neither the
+        rows nor the per-route ids are kept. The checks across rows and
+        tables run on the columns at the end; all violations are raised
+        together as a ModelDataValidationError.
+        """
+        columns = _StreamedColumns()
+        for name, row in rows:
+            columns.append(name, row)
+        return columns.columnar()
+
+    def _model_data_from_columnar(self, columnar: ColumnarModelData) -> ModelData:
+        """
+        ModelData sharing the (already validated) objects of columnar's views
+        """
+        with memory_stage("model_data"):
+            return ModelData.model_construct(
+                workshops=columnar.workshops,
+                clients=columnar.clients,
+                routes=columnar.routes,
+            )
+
+    def _create_model_data(
+        self, data_dict: DataDict, bulk_validation: bool = False
+    ) -> ModelData:
+        """
+        bulk_validation checks the data column by column (see
+        _create_columnar_model_data) and only then builds the objects,
+        without running their validators again.
+        """
+        if bulk_validation:
+            return self._model_data_from_columnar(
+                self._create_columnar_model_data(
+                    _record_columns(data_dict), records=True
+                )
+            )
 
-    def _create_model_data(self, data_dict: DataDict) -> ModelData:
         workshops = [
             Workshop(
                 id_=w["id"],
@@ -93,3 +319,238 @@ class ModelDataFactory:
                 )
             )
         return routes
+
+
+# column names of each table, as in DataDict / ColumnsDict
+_COLUMN_NAMES = {
+    "workshops": ("id", "production_capacity", "production_cost"),
+    "clients": ("id", "demand"),
+    "routes": (
+        "origin",
+        "destination",
+        "transport_cost",
+        "transport_capacity",
+        "min_transport_quantity",
+        "is_active",
+    ),
+}
+
+
+def _record_columns(data_dict: DataDict) -> ColumnsDict:
+    """
+    Rows -> columns; a key missing from a row gives None
+    """
+    columns = {}
+    for name, keys in _COLUMN_NAMES.items():
+        rows = data_dict.get(name, [])
+        columns[name] = {key: [row.get(key) for row in rows] for key in keys}
+    return ColumnsDict(**columns)
+
+
+def _n_rows(table: dict[str, Any]) -> int:
+    return max((len(column) for column in table.values()), default=0)
+
+
+def _id_column(
+    table: dict[str, Any], key: str, name: str, errors: list[str], records: bool
+) -> np.ndarray:
+    values = table.get(key)
+    if values is None:
+        values = [None] * _n_rows(table)
+    if records and not set(map(type, values)) <= {str, type(None)}:
+        # numpy would turn the numbers into text
+        values = list(values)
+        for k, value in enumerate(values):
+            if value is not None and not isinstance(value, str):
+                errors.append(f"{name}[{k}].{key} must be a string, not {value!r}")
+                values[k] = ""
+    values = np.asarray(values)
+    if values.dtype.kind == "U":
+        return values
+    # object column: None / NaN are blanks
+    missing = [k for k, v in enumerate(values.tolist()) if v is None or v != v]
+    errors.extend(f"{name}[{k}].{key} is missing" for k in missing)
+    values = values.astype(object)
+    values[missing] = ""
+    return values.astype(str)
+
+
+def _float_column(
+    table: dict[str, Any], key: str, name: str, errors: list[str]
+) -> np.ndarray:
+    values = table.get(key)
+    if values is None:
+        values = [None] * _n_rows(table)
+    unreadable: list[int] = []
+    try:
+        column = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        # name every value that is not a number
+        column = np.full(len(values), np.nan)
+        for k, value in enumerate(list(values)):
+            try:
+                column[k] = float(value)
+            except (TypeError, ValueError):
+                if value is not None:
+                    unreadable.append(k)
+                    errors.append(f"{name}[{k}].{key} is not a number: {value!r}")
+    # None / NaN / blank cells
+    missing = np.isnan(column)
+    missing[unreadable] = False
+    errors.extend(
+        f"{name}[{k}].{key} is missing" for k in np.flatnonzero(missing).tolist()
+    )
+    return column
+
+
+def _bool_column(table: dict[str, Any], key: str, n_rows: int) -> np.ndarray:
+    """
+    is_active defaults to True, for a missing column or a blank cell; text
+    cells (CSV) are read as true / false, 1 / 0, yes / no.
+    """
+    values = table.get(key)
+    if values is None:
+        return np.ones(n_rows, dtype=bool)
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        return values != 0  # NaN (blank) != 0 too
+    return np.array([_to_bool(v) for v in values.tolist()], dtype=bool)
+
+
+def _to_bool(value: Any) -> bool:
+    if value is None or value != value:
+        return True
+    if isinstance(value, str):
+        return value.strip().lower() not in ("false", "0", "no")
+    return bool(value)
+
+
+class _StreamedColumns:
+    """
+    Columns of the three tables, filled one row at a time. The floats of a
+    table go to one array("d") buffer, row after row; route endpoints are
+    interned on the fly into array("i") codes over the distinct ids seen, as
+    the workshops and clients may come after the routes in the file.
+    """
+
+    def __init__(self) -> None:
+        self.errors: list[str] = []
+        self.rows = dict.fromkeys(_COLUMN_NAMES, 0)
+        self.ids: dict[str, list[str]] = {"workshops": [], "clients": []}
+        self.float_keys = {
+            name: tuple(key for key in keys if key not in _NON_FLOAT_KEYS)
+            for name, keys in _COLUMN_NAMES.items()
+        }
+        self.floats = {name: array("d") for name in _COLUMN_NAMES}
+        # distinct endpoint ids -> code, and the code of every route
+        self.endpoints: dict[str, dict[str, int]] = {"origin": {}, "destination": {}}
+        self.codes = {"origin": array("i"), "destination": array("i")}
+        self.is_active = array("b")
+
+    def append(self, name: str, row: Any) -> None:
+        if name not in self.rows:
+            return
+        k = self.rows[name]
+        self.rows[name] += 1
+        if not isinstance(row, dict):
+            self.errors.append(f"{name}[{k}] is not an object: {row!r}")
+            row = {}
+
+        if name == "routes":
+            for key in ("origin", "destination"):
+                endpoints = self.endpoints[key]
+                id_ = self._id(row.get(key), name, k, key)
+                self.codes[key].append(endpoints.setdefault(id_, len(endpoints)))
+        else:
+            self.ids[name].append(self._id(row.get("id"), name, k, "id"))
+
+        keys = self.float_keys[name]
+        try:
+            # a complete row of numbers, converted in one go
+            values = array("d", map(row.__getitem__, keys))
+            if values != values:
+                raise ValueError("NaN")
+        except (KeyError, TypeError, ValueError):
+            values = array(
+                "d", (self._float(row.get(key), name, k, key) for key in keys)
+            )
+        self.floats[name].extend(values)
+
+        if name == "routes":
+            self.is_active.append(_to_bool(row.get("is_active")))
+
+    def columnar(self) -> ColumnarModelData:
+        workshop_ids = np.asarray(self.ids["workshops"], dtype=str)
+        client_ids = np.asarray(self.ids["clients"], dtype=str)
+        origin = self._endpoint_column("origin")
+        destination = self._endpoint_column("destination")
+        route_origin = intern_ids(origin[0], workshop_ids)[origin[1]]
+        route_destination = intern_ids(destination[0], client_ids)[destination[1]]
+
+        columnar = ColumnarModelData(
+            workshop_ids=workshop_ids,
+            production_capacity=self._column("workshops", "production_capacity"),
+            production_cost=self._column("workshops", "production_cost"),
+            client_ids=client_ids,
+            demand=self._column("clients", "demand"),
+            route_origin=route_origin,
+            route_destination=route_destination,
+            transport_cost=self._column("routes", "transport_cost"),
+            transport_capacity=self._column("routes", "transport_capacity"),
+            min_transport_quantity=self._column("routes", "min_transport_quantity"),
+            is_active=np.frombuffer(self.is_active, dtype=np.int8).astype(bool),
+            validate=False,
+        )
+        # per-route ids are only needed to name unknown / blank endpoints
+        origin_ids = destination_ids = None
+        if (
+            (route_origin < 0).any()
+            or (route_destination < 0).any()
+            or (np.char.strip(origin[0]) == "").any()
+            or (np.char.strip(destination[0]) == "").any()
+        ):
+            origin_ids = origin[0][origin[1]]
+            destination_ids = destination[0][destination[1]]
+        errors = self.errors + columnar.violations(origin_ids, destination_ids)
+        if errors:
+            raise ModelDataValidationError(errors)
+        return columnar
+
+    def _endpoint_column(self, key: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (distinct ids, code of every route)
+        """
+        ids = np.asarray(list(self.endpoints[key]), dtype=str)
+        return ids, np.frombuffer(self.codes[key], dtype=np.intc)
+
+    def _column(self, name: str, key: str) -> np.ndarray:
+        keys = self.float_keys[name]
+        table = np.frombuffer(self.floats[name], dtype=float).reshape(-1, len(keys))
+        return table[:, keys.index(key)].copy()
+
+    def _id(self, value: Any, name: str, k: int, key: str) -> str:
+        if type(value) is str:
+            return value
+        if value is None:
+            self.errors.append(f"{name}[{k}].{key} is missing")
+        elif not isinstance(value, str):
+            self.errors.append(f"{name}[{k}].{key} must be a string, not {value!r}")
+        else:
+            return value
+        return ""
+
+    def _float(self, value: Any, name: str, k: int, key: str) -> float:
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            if value is not None:
+                self.errors.append(f"{name}[{k}].{key} is not a number: {value!r}")
+                return float("nan")
+            number = float("nan")
+        if number != number:
+            self.errors.append(f"{name}[{k}].{key} is missing")
+        return number
+
+
+# the keys _StreamedColumns does not read as floats
+_NON_FLOAT_KEYS = ("id", "origin", "destination", "is_active")
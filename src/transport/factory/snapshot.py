@@ -0,0 +1,319 @@
+"""
+Binary snapshots of validated model data, and an on-disk cache of them keyed
+by the source file.
+
+A snapshot holds the columns of a ColumnarModelData, already validated:
+
+    magic (8 bytes) | header length (uint32, little endian) | header (JSON)
+    | padding | column data, every column aligned to ALIGNMENT bytes
+
+The header carries the format version, the fingerprint of the source the
+data was read from, a hash of the column data and the dtype / shape / offset
+of every column. The columns are raw arrays, so loading memory-maps the file
+(copy-on-write) and builds the ColumnarModelData over it without parsing or
+validating anything.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Union
+
+import numpy as np
+
+from transport.context.columnar_model_data import ColumnarModelData
+
+PathLike = Union[str, Path]
+
+SNAPSHOT_MAGIC = b"TRSNAP\r\n"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".trsnap"
+# column data offsets are multiples of this
+ALIGNMENT = 64
+
+# ColumnarModelData attributes stored, in file order
+SNAPSHOT_COLUMNS = (
+    "workshop_ids",
+    "production_capacity",
+    "production_cost",
+    "client_ids",
+    "demand",
+    "route_origin",
+    "route_destination",
+    "transport_cost",
+    "transport_capacity",
+    "min_transport_quantity",
+    "is_active",
+)
+
+_PREFIX = struct.Struct("<8sI")
+
+
+class SnapshotError(ValueError):
+    """
+    The file is not a snapshot, or not one this version can read.
+    """
+
+
+@dataclass(frozen=True)
+class SnapshotHeader:
+    version: int
+    source: str  # fingerprint of the file the data was read from, or ""
+    hash: str  # of the column data
+    columns: dict[str, dict[str, Any]]  # name -> dtype, shape, offset
+    data_offset: int  # where the column data starts in the file
+
+
+def write_snapshot(
+    columnar: ColumnarModelData, file: PathLike, source: str = ""
+) -> Path:
+    """
+    Write the columns of columnar (validated already) to file, atomically.
+    """
+    arrays = {
+        name: np.ascontiguousarray(getattr(columnar, name)) for name in SNAPSHOT_COLUMNS
+    }
+    columns = {}
+    offset = end = 0
+    for name, array in arrays.items():
+        columns[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        end = offset + array.nbytes
+        offset = _aligned(end)
+    header = json.dumps(
+        {
+            "version": SNAPSHOT_VERSION,
+            "source": source,
+            "hash": _hash(arrays),
+            "columns": columns,
+        }
+    ).encode("utf-8")
+    data_offset = _aligned(_PREFIX.size + len(header))
+
+    file = Path(file)
+    fd, tmp = tempfile.mkstemp(dir=file.parent, prefix=file.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREFIX.pack(SNAPSHOT_MAGIC, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_offset + columns[name]["offset"])
+                f.write(array.data)
+            f.truncate(data_offset + end)
+        os.replace(tmp, file)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return file
+
+
+def read_snapshot_header(file: PathLike) -> SnapshotHeader:
+    with open(file, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise SnapshotError(f"{file} is not a snapshot")
+        magic, header_size = _PREFIX.unpack(prefix)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"{file} is not a snapshot")
+        try:
+            header = json.loads(f.read(header_size))
+        except ValueError as error:
+            raise SnapshotError(f"{file} has a corrupted header") from error
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(
+            f"{file} has snapshot version {header.get('version')}, "
+            f"expected {SNAPSHOT_VERSION}"
+        )
+    return SnapshotHeader(
+        version=header["version"],
+        source=header["source"],
+        hash=header["hash"],
+        columns=header["columns"],
+        data_offset=_aligned(_PREFIX.size + header_size),
+    )
+
+
+def read_snapshot(
+    file: PathLike, memory_map: bool = True, verify: bool = False
+) -> ColumnarModelData:
+    """
+    ColumnarModelData over the columns of a snapshot, without validation.
+
+    memory_map maps the file copy-on-write (columns are paged in when read;
+    update_values does not write back to the file). verify checks the column
+    data against the hash of the header, which reads the whole file.
+    """
+    header = read_snapshot_header(file)
+    if memory_map:
+        buffer = np.memmap(file, dtype=np.uint8, mode="c")
+    else:
+        buffer = np.fromfile(file, dtype=np.uint8)
+
+    arrays = {}
+    for name in SNAPSHOT_COLUMNS:
+        column = header.columns[name]
+        dtype = np.dtype(column["dtype"])
+        start = header.data_offset + column["offset"]
+        stop = start + int(np.prod(column["shape"])) * dtype.itemsize
+        if stop > len(buffer):
+            raise SnapshotError(f"{file} is truncated")
+        arrays[name] = buffer[start:stop].view(dtype).reshape(column["shape"])
+    if verify and _hash(arrays) != header.hash:
+        raise SnapshotError(f"{file} does not match its hash")
+
+    return ColumnarModelData(
+        workshop_ids=arrays["workshop_ids"],
+        production_capacity=arrays["production_capacity"],
+        production_cost=arrays["production_cost"],
+        client_ids=arrays["client_ids"],
+        demand=arrays["demand"],
+        route_origin=arrays["route_origin"],
+        route_destination=arrays["route_destination"],
+        transport_cost=arrays["transport_cost"],
+        transport_capacity=arrays["transport_capacity"],
+        min_transport_quantity=arrays["min_transport_quantity"],
+        is_active=arrays["is_active"],
+        validate=False,
+    )
+
+
+def file_fingerprint(file: PathLike, content: bool = False, salt: str = "") -> str:
+    """
+    Key of a source file: its resolved path, size and modification time, or
+    (content=True) the hash of its bytes, which survives copies and touches
+    but reads the whole file. salt separates keys of the same file read in
+    different ways.
+    """
+    path = Path(file).resolve()
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{SNAPSHOT_VERSION}:{salt}:".encode())
+    if content:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    else:
+        stat = path.stat()
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+class SnapshotCache:
+    """
+    Directory of snapshots of validated input files, keyed by
+    file_fingerprint of the source.
+
+    load returns the snapshot of a source when there is one, and otherwise
+    builds the data (parsing and validating it) and stores it. A hit
+    refreshes the entry's modification time; past max_entries entries (or
+    max_bytes on disk), the least recently used ones are removed.
+    """
+
+    def __init__(
+        self,
+        directory: PathLike,
+        max_entries: int = 32,
+        max_bytes: int | None = None,
+        content_hash: bool = False,
+        memory_map: bool = True,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        self.memory_map = memory_map
+        self.hits = 0
+        self.misses = 0
+
+    def load(
+        self,
+        source: PathLike,
+        build: Callable[[], ColumnarModelData],
+        reader: str = "",
+    ) -> ColumnarModelData:
+        """
+        Snapshot of source, or build() stored as its snapshot. reader names
+        the way build reads the file (e.g. "json"), as part of the key.
+        """
+        key = file_fingerprint(source, self.content_hash, reader)
+        columnar = self.get(key)
+        if columnar is not None:
+            self.hits += 1
+            return columnar
+        self.misses += 1
+        columnar = build()
+        self.put(key, columnar)
+        return columnar
+
+    def get(self, key: str) -> ColumnarModelData | None:
+        path = self.path(key)
+        try:
+            columnar = read_snapshot(path, memory_map=self.memory_map)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (SnapshotError, KeyError, OSError):
+            # unreadable (older version, truncated): rebuilt by the caller
+            path.unlink(missing_ok=True)
+            return None
+        return columnar
+
+    def put(self, key: str, columnar: ColumnarModelData) -> Path:
+        path = write_snapshot(columnar, self.path(key), source=key)
+        self.evict()
+        return path
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}{SNAPSHOT_SUFFIX}"
+
+    def entries(self) -> list[Path]:
+        """
+        Snapshots in the cache, most recently used first
+        """
+        paths = []
+        for path in self.directory.glob(f"*{SNAPSHOT_SUFFIX}"):
+            try:
+                paths.append((path.stat().st_mtime_ns, path))
+            except FileNotFoundError:
+                continue
+        return [path for _, path in sorted(paths, reverse=True)]
+
+    def evict(self) -> None:
+        size = 0
+        for k, path in enumerate(self.entries()):
+            try:
+                size += path.stat().st_size
+            except FileNotFoundError:
+                continue
+            if k >= self.max_entries or (
+                self.max_bytes is not None and size > self.max_bytes and k > 0
+            ):
+                path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.entries():
+            path.unlink(missing_ok=True)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _hash(arrays: dict[str, np.ndarray]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for name, array in arrays.items():
+        digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+        digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
@@ -1,4 +1,4 @@
-from typing import TypedDict, NotRequired
+from typing import Any, TypedDict, NotRequired
 
 
 class WorkshopRow(TypedDict):
@@ -17,6 +17,7 @@ class RouteRow(TypedDict):
     destination: str
     transport_cost: float
     transport_capacity: float
+    min_transport_quantity: float
     is_active: bool
     id: NotRequired[str]  # if sometimes present
 
@@ -25,3 +26,14 @@ class DataDict(TypedDict):
     workshops: list[WorkshopRow]
     clients: list[ClientRow]
     routes: list[RouteRow]
+
+
+class ColumnsDict(TypedDict):
+    """
+    Same tables as DataDict, by column: column name -> values (a NumPy
+    array or a list), one per row.
+    """
+
+    workshops: dict[str, Any]
+    clients: dict[str, Any]
+    routes: dict[str, Any]
@@ -0,0 +1,337 @@
+"""
+Local solve service: one fixed pool of solver processes shared by every tool
+that submits to it, instead of each spawning its own Engines.
+
+    python -m transport.job_server --port 8765 --db jobs.sqlite --workers 8
+    python -m transport.job_server --socket /tmp/transport.sock
+
+Jobs are kept in a JobQueue (SQLite): the jobs that were running when the
+service stopped run again when it restarts. An identical submission (same
+network and arguments) while a job is queued or running returns that job.
+
+HTTP API (JSON):
+
+    POST /jobs                  {"data": <DataDict>, "engine_type": ...,
+                                 "build_mode", "solver_options", "formulation",
+                                 "presolve", "decompose", "regions",
+                                 "sensitivity"}, or a bare DataDict (the schema
+                                 Converter.from_json reads) solved with cbc
+                                -> 202 {"id", "status", "deduplicated"}
+    GET  /jobs/<id>             the job, with its result once done;
+                                ?wait=<seconds> waits for it to finish first
+    GET  /jobs/<id>/events      the job every time its status changes, one
+                                JSON per line, until it is done or failed
+    GET  /metrics               queue depth, jobs per status, wait / run /
+                                total latency of the last finished jobs
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import replace
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from transport.engine import worker_context
+from transport.engine.job_queue import FINAL_STATUSES, Job, JobQueue
+from transport.engine.result import SolveResult
+from transport.factory.types import DataDict
+
+
+class JobServer:
+    """
+    Runs the jobs of a JobQueue on `workers` processes (default: one per
+    CPU), each job in its own Engine; start() / stop(), or use as a context
+    manager.
+    """
+
+    def __init__(self, queue: JobQueue, workers: int | None = None) -> None:
+        self.queue: JobQueue = queue
+        self.workers: int = workers or os.cpu_count() or 1
+        # notified, with _version incremented, whenever a job changes
+        self._changed = threading.Condition()
+        self._version = 0
+        self._stopping = False
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self._dispatchers: list[threading.Thread] = []
+
+    def __enter__(self) -> JobServer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.queue.requeue_running()
+        self._stopping = False
+        self._pool = self._new_pool()
+        self._dispatchers = [
+            threading.Thread(target=self._dispatch, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in self._dispatchers:
+            thread.start()
+
+    def stop(self) -> None:
+        """
+        Wait for the running jobs to finish; the queued ones stay queued
+        """
+        with self._changed:
+            self._stopping = True
+            self._changed.notify_all()
+        for thread in self._dispatchers:
+            thread.join()
+        self._dispatchers = []
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def submit(
+        self, data: DataDict, arguments: dict[str, Any] | None = None
+    ) -> tuple[Job, bool]:
+        """
+        JobQueue.submit, waking a worker up
+        """
+        job, deduplicated = self.queue.submit(data, arguments)
+        self._notify()
+        return job, deduplicated
+
+    def wait(self, job_id: str, timeout: float | None = None) -> Job | None:
+        """
+        The job once done or failed, or as it is after timeout seconds
+        """
+        job = None
+        for job in self.watch(job_id, timeout):
+            pass
+        return job
+
+    def watch(self, job_id: str, timeout: float | None = None) -> Iterator[Job]:
+        """
+        The job, then again every time its status changes until it is done
+        or failed (or timeout seconds have passed)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        status = None
+        while True:
+            with self._changed:
+                version = self._version
+                job = self.queue.get(job_id)
+            if job is None:
+                return
+            if job.status != status:
+                status = job.status
+                yield job
+            if status in FINAL_STATUSES:
+                return
+            left = None if deadline is None else deadline - time.monotonic()
+            if left is not None and left <= 0:
+                return
+            with self._changed:
+                self._changed.wait_for(lambda: self._version != version, left)
+
+    def _dispatch(self) -> None:
+        while True:
+            with self._changed:
+                while not self._stopping and (claimed := self.queue.claim()) is None:
+                    self._changed.wait()
+                if self._stopping:
+                    return
+                self._version += 1
+                self._changed.notify_all()
+            job, data = claimed
+            try:
+                result = self._run(data, job.arguments)
+            except Exception as error:
+                self.queue.fail(job.id, f"{type(error).__name__}: {error}")
+            else:
+                self.queue.complete(job.id, result)
+            self._notify()
+
+    def _run(self, data: DataDict, arguments: dict[str, Any]) -> SolveResult:
+        pool = self._pool
+        try:
+            return pool.submit(_solve_job, data, arguments).result()
+        except BrokenProcessPool:
+            # a worker died (killed, out of memory): the job fails, the next
+            # ones get a new pool
+            with self._pool_lock:
+                if self._pool is pool:
+                    self._pool = self._new_pool()
+            raise
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=worker_context()
+        )
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._version += 1
+            self._changed.notify_all()
+
+
+def _solve_job(data: DataDict, arguments: dict[str, Any]) -> SolveResult:
+    from transport.engine.engine import Engine
+    from transport.engine.engine_config import EngineConfig
+    from transport.factory.model_data_factory import ModelDataFactory
+
+    # the columnar data and configuration JobQueue.submit keyed the job with;
+    # the components of a decomposed job are solved in this worker, the pool
+    # is the parallelism
+    config = EngineConfig(**arguments)
+    if config.decompose:
+        config = replace(config, max_workers=1)
+    return Engine.from_config(ModelDataFactory.columnar_from_dict(data), config).run()
+
+
+# --- HTTP ---------------------------------------------------------------------
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    The HTTP API of the module docstring, for a server with a `jobs`
+    attribute (the JobServer)
+    """
+
+    server: Any
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path.rstrip("/") != "/jobs":
+            return self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length))
+            if not isinstance(body, dict):
+                raise ValueError("the body must be a JSON object")
+            if "data" in body:
+                data = body.pop("data")
+                arguments = body
+            else:
+                data, arguments = body, {}
+            job, deduplicated = self.server.jobs.submit(data, arguments)
+        except (ValueError, KeyError, TypeError) as error:
+            return self._send(HTTPStatus.BAD_REQUEST, {"error": str(error)})
+        self._send(
+            HTTPStatus.ACCEPTED,
+            {"id": job.id, "status": job.status, "deduplicated": deduplicated},
+        )
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        jobs: JobServer = self.server.jobs
+        if parts == ["metrics"]:
+            metrics = jobs.queue.metrics().as_dict()
+            return self._send(HTTPStatus.OK, {**metrics, "workers": jobs.workers})
+        if len(parts) == 2 and parts[0] == "jobs":
+            try:
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+            except ValueError:
+                return self._send(HTTPStatus.BAD_REQUEST, {"error": "wait: seconds"})
+            job = jobs.wait(parts[1], wait) if wait > 0 else jobs.queue.get(parts[1])
+            if job is None:
+                return self._send(HTTPStatus.NOT_FOUND, {"error": "no such job"})
+            return self._send(HTTPStatus.OK, job.as_dict())
+        if len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            return self._stream(parts[1])
+        self._send(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def address_string(self) -> str:
+        # a Unix socket has no client address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _stream(self, job_id: str) -> None:
+        events = self.server.jobs.watch(job_id)
+        first = next(events, None)
+        if first is None:
+            return self._send(HTTPStatus.NOT_FOUND, {"error": "no such job"})
+        # no length: the events end with the connection
+        self.close_connection = True
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            self._write_line(first)
+            for job in events:
+                self._write_line(job)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client left
+
+    def _write_line(self, job: Job) -> None:
+        self.wfile.write(json.dumps(job.as_dict()).encode() + b"\n")
+        self.wfile.flush()
+
+    def _send(self, status: HTTPStatus, body: dict[str, Any]) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(
+    jobs: JobServer,
+    port: int | None = None,
+    host: str = "127.0.0.1",
+    socket_path: str | None = None,
+) -> ThreadingHTTPServer | UnixHTTPServer:
+    """
+    HTTP server of the API on host:port, or on the Unix socket socket_path;
+    call its serve_forever()
+    """
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, JobRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port or 0), JobRequestHandler)
+    server.jobs = jobs
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a queue of solve jobs.")
+    address = parser.add_mutually_exclusive_group()
+    address.add_argument("--port", type=int, default=8765, help="TCP port")
+    address.add_argument("--socket", default=None, help="Unix socket path instead")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP address")
+    parser.add_argument("--db", default="jobs.sqlite", help="SQLite job queue")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="solver processes (default: CPUs)"
+    )
+    args = parser.parse_args()
+
+    queue = JobQueue(args.db)
+    with JobServer(queue, args.workers) as jobs:
+        server = serve(jobs, args.port, args.host, args.socket)
+        where = args.socket or f"http://{args.host}:{server.server_address[1]}"
+        print(f"Serving {jobs.workers} workers on {where} (jobs: {args.db})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
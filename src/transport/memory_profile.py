@@ -0,0 +1,249 @@
+"""
+Opt-in memory profile of the load -> build -> solve pipeline.
+
+Within `with MemoryProfile() as memory:` every stage of the pipeline records
+what it allocates:
+
+    read        Converter: the file parsed into a DataDict
+    model_data  the Workshop / Client / Route objects of ModelData
+    load        a ColumnarModelData read and validated
+    presolve, build, write, solve, extract
+                the SolveStats phases of Engine and the engines (build holds
+                the Pyomo ConcreteModel, extract the transport_quantity of
+                the result)
+
+Python allocations are traced with tracemalloc, and the resident set size of
+the process is sampled from a background thread; with psutil installed the
+RSS includes the solver subprocesses. Tracing slows the pipeline down
+severalfold: do not compare timings taken under a profile with others.
+
+Outside a profile memory_stage does nothing, so the pipeline pays for the
+instrumentation only when asked.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import itertools
+import os
+import threading
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any
+
+# the profile stages are recorded into
+_active: ContextVar[MemoryProfile | None] = ContextVar("memory_profile", default=None)
+
+
+@dataclass(frozen=True)
+class StageMemory:
+    """
+    Bytes of a stage; stages entered several times add up their allocated
+    bytes and keep their highest peaks. RSS values are None when the RSS
+    cannot be read on this platform.
+    """
+
+    # Python allocations still alive at the end of the stage
+    allocated: int
+    # highest Python allocations during the stage, above those at its start
+    peak: int
+    # highest RSS sampled during the stage, and its growth over the stage
+    rss_peak: int | None
+    rss_delta: int | None
+
+    def merge(self, other: StageMemory) -> StageMemory:
+        return StageMemory(
+            allocated=self.allocated + other.allocated,
+            peak=max(self.peak, other.peak),
+            rss_peak=_max(self.rss_peak, other.rss_peak),
+            rss_delta=_add(self.rss_delta, other.rss_delta),
+        )
+
+
+class MemoryProfile:
+    """
+    Memory of the pipeline stages run within the profile.
+
+    Attributes
+    ----------
+    stages : stage name -> StageMemory, in the order the stages were entered
+    top : stage name -> the top_lines source lines that allocated the most
+        during the stage (tracemalloc snapshot difference), when top_lines
+    """
+
+    def __init__(self, interval: float = 0.01, top_lines: int = 0) -> None:
+        # seconds between two RSS samples
+        self.interval: float = interval
+        # snapshots are as large as the traces: only taken on demand
+        self.top_lines: int = top_lines
+        self.stages: dict[str, StageMemory] = {}
+        self.top: dict[str, list[str]] = {}
+
+        # stage entered and not left yet -> [peak, RSS peak]
+        self._open: dict[int, list[Any]] = {}
+        self._keys = itertools.count()
+        self._names: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._started_tracing = False
+        self._token = None
+
+    def __enter__(self) -> MemoryProfile:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if rss() is not None:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _active.reset(self._token)
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if name in self._names:  # counted by the stage around it
+            yield
+            return
+        self._names.add(name)
+        try:
+            with self._stage(name):
+                yield
+        finally:
+            self._names.discard(name)
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        snapshot = tracemalloc.take_snapshot() if self.top_lines else None
+        rss_start = rss()
+        with self._lock:
+            self._fold_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            key = next(self._keys)
+            self._open[key] = [start, rss_start]
+        try:
+            yield
+        finally:
+            rss_end = rss()
+            with self._lock:
+                self._fold_peak()
+                peak, rss_peak = self._open.pop(key)
+                end = tracemalloc.get_traced_memory()[0]
+            if rss_end is not None and rss_start is not None:
+                rss_peak = max(rss_peak or 0, rss_end)
+            memory = StageMemory(
+                allocated=end - start,
+                peak=peak - start,
+                rss_peak=rss_peak,
+                rss_delta=_sub(rss_end, rss_start),
+            )
+            before = self.stages.get(name)
+            self.stages[name] = memory if before is None else before.merge(memory)
+            if snapshot is not None:
+                self.top[name] = [
+                    str(line)
+                    for line in tracemalloc.take_snapshot().compare_to(
+                        snapshot, "lineno"
+                    )[: self.top_lines]
+                ]
+
+    def per_entity(
+        self, n_workshops: int, n_clients: int, n_routes: int
+    ) -> dict[str, dict[str, float]]:
+        """
+        stage -> allocated and peak bytes per workshop, client and route
+        ("allocated_per_route", "peak_per_route", ...)
+        """
+        counts = {"workshop": n_workshops, "client": n_clients, "route": n_routes}
+        return {
+            name: {
+                f"{value}_per_{entity}": getattr(memory, value) / max(count, 1)
+                for value in ("allocated", "peak")
+                for entity, count in counts.items()
+            }
+            for name, memory in self.stages.items()
+        }
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        return {name: asdict(memory) for name, memory in self.stages.items()}
+
+    def _fold_peak(self) -> None:
+        """
+        Carry the peak traced so far into every open stage, then restart it,
+        so that nested stages do not hide the peaks of the stages around them
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        for memory in self._open.values():
+            memory[0] = max(memory[0], peak)
+        tracemalloc.reset_peak()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            value = rss()
+            with self._lock:
+                for memory in self._open.values():
+                    memory[1] = _max(memory[1], value)
+
+
+@contextmanager
+def memory_stage(name: str) -> Iterator[None]:
+    """
+    Record the block as a stage of the active MemoryProfile, if any
+    """
+    profile = _active.get()
+    if profile is None:
+        yield
+        return
+    with profile.stage(name):
+        yield
+
+
+def rss() -> int | None:
+    """
+    Resident set size of the process in bytes, with its children when psutil
+    is installed; None when it cannot be read
+    """
+    if _PSUTIL:
+        import psutil
+
+        process = psutil.Process()
+        total = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:  # ended in the meantime
+                pass
+        return total
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+_PSUTIL = importlib.util.find_spec("psutil") is not None
+
+
+def _max(a: int | None, b: int | None) -> int | None:
+    return b if a is None else a if b is None else max(a, b)
+
+
+def _add(a: int | None, b: int | None) -> int | None:
+    return None if a is None or b is None else a + b
+
+
+def _sub(a: int | None, b: int | None) -> int | None:
+    return None if a is None or b is None else a - b
@@ -0,0 +1,60 @@
+"""
+Solve a batch of scenarios of one network in parallel.
+
+    python -m transport.run_batch base.json scenarios.json --workers 8
+
+scenarios.json is a list of
+    {"name": ..., "client_demand": {...}, "transport_cost": {...},
+     "production_capacity": {...}}
+where every mapping is optional (see transport.engine.Scenario).
+"""
+
+import argparse
+import json
+
+from transport.engine import Scenario, ScenarioBatch
+from transport.factory.model_data_factory import ModelDataFactory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Solve a batch of scenarios.")
+    parser.add_argument("data", help="base network (JSON, same schema as run.py)")
+    parser.add_argument("scenarios", help="JSON list of scenario deltas")
+    parser.add_argument("--engine", default="cbc", help="engine type (default: cbc)")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="worker processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=None, help="solver threads per worker"
+    )
+    parser.add_argument("--output", default=None, help="write the summary to CSV")
+    args = parser.parse_args()
+
+    data = ModelDataFactory.from_json(args.data)
+    with open(args.scenarios, "r", encoding="utf-8") as f:
+        scenarios = [Scenario.from_dict(row) for row in json.load(f)]
+
+    batch = ScenarioBatch(
+        data,
+        scenarios,
+        engine_type=args.engine,
+        max_workers=args.workers,
+        solver_threads=args.threads,
+    )
+
+    results = []
+    for done, result in enumerate(batch.run(), start=1):
+        results.append(result)
+        print(
+            f"[{done}/{len(scenarios)}] {result.scenario}: {result.result.status} "
+            f"{result.result.objective} ({result.seconds:.2f}s)"
+        )
+
+    summary = ScenarioBatch.summary(results)
+    print(summary.to_string(index=False))
+    if args.output is not None:
+        summary.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Stand-in for the cbc executable, called like EngineFile calls it:
+
+    fake_cbc.py -import model.lp [-option value ...] -solve -solu model.sol
+
+It writes an optimal solution file with every variable at 0. Environment
+variables make it misbehave:
+
+    FAKE_CBC_LOG      file to which it appends "<pid> start <time>" and
+                      "<pid> end <time>"
+    FAKE_CBC_SECONDS  seconds to sleep before answering
+    FAKE_CBC_EXIT     exit code to fail with, without a solution
+"""
+
+import os
+import sys
+import time
+
+
+def main(args: list[str]) -> int:
+    log = os.environ.get("FAKE_CBC_LOG")
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(f"{os.getpid()} start {time.time()}\n")
+
+    time.sleep(float(os.environ.get("FAKE_CBC_SECONDS", "0")))
+    exit_code = int(os.environ.get("FAKE_CBC_EXIT", "0"))
+    if exit_code:
+        print("fake cbc failed")
+        return exit_code
+
+    solution = args[args.index("-solu") + 1]
+    with open(solution, "w", encoding="utf-8") as f:
+        f.write("Optimal - objective value 0.00000000\n")
+    if log:
+        with open(log, "a", encoding="utf-8") as f:
+            f.write(f"{os.getpid()} end {time.time()}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
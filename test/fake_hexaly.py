@@ -0,0 +1,240 @@
+"""
+Stand-in for the part of the hexaly.optimizer API used by EngineHexaly, so
+the engine can be tested without Hexaly nor a license.
+
+Expressions are recorded as a tree that can be evaluated. solve() does not
+search: it gives the decisions the values of `assignment` (set by the test),
+checks every constraint on them and reports FEASIBLE, or INFEASIBLE when a
+constraint is violated.
+"""
+
+from __future__ import annotations
+
+import enum
+import sys
+import types
+from types import SimpleNamespace
+from typing import Any
+
+
+class HxSolutionStatus(enum.Enum):
+    INCONSISTENT = 0
+    INFEASIBLE = 1
+    FEASIBLE = 2
+    OPTIMAL = 3
+
+
+class HxCallbackType(enum.Enum):
+    PHASE_STARTED = 0
+    PHASE_ENDED = 1
+    DISPLAY = 2
+    TIME_TICKED = 3
+    ITERATION_TICKED = 4
+
+
+def _node(value: Any) -> "Expr":
+    return value if isinstance(value, Expr) else Const(value)
+
+
+class Expr:
+    # expressions created, decisions included
+    created = 0
+
+    def __init__(self) -> None:
+        Expr.created += 1
+
+    def evaluate(self, env: dict) -> Any:
+        raise NotImplementedError
+
+    @property
+    def value(self) -> Any:
+        return self.evaluate({})
+
+    def __mul__(self, other: Any) -> "Expr":
+        return Op(lambda a, b: a * b, self, other)
+
+    __rmul__ = __mul__
+
+    def __add__(self, other: Any) -> "Expr":
+        return Op(lambda a, b: a + b, self, other)
+
+    __radd__ = __add__
+
+    def __le__(self, other: Any) -> "Expr":
+        return Op(lambda a, b: a <= b + 1e-9, self, other)
+
+    def __ge__(self, other: Any) -> "Expr":
+        return Op(lambda a, b: a >= b - 1e-9, self, other)
+
+
+class Const(Expr):
+    def __init__(self, value: Any) -> None:
+        super().__init__()
+        self.constant = value
+
+    def evaluate(self, env: dict) -> Any:
+        return self.constant
+
+
+class Decision(Expr):
+    def __init__(self, lower: float, upper: float) -> None:
+        super().__init__()
+        self.lower, self.upper = lower, upper
+        self.assigned = 0.0
+
+    def evaluate(self, env: dict) -> Any:
+        return self.assigned
+
+
+class Op(Expr):
+    def __init__(self, function: Any, *operands: Any) -> None:
+        super().__init__()
+        self.function = function
+        self.operands = [_node(o) for o in operands]
+
+    def evaluate(self, env: dict) -> Any:
+        return self.function(*(o.evaluate(env) for o in self.operands))
+
+
+class Array(Expr):
+    def __init__(self, items: list) -> None:
+        super().__init__()
+        self.items = [_node(item) for item in items]
+
+    def evaluate(self, env: dict) -> Any:
+        return self
+
+
+class Argument(Expr):
+    def evaluate(self, env: dict) -> Any:
+        return env[self]
+
+
+class Lambda(Expr):
+    def __init__(self, function: Any) -> None:
+        super().__init__()
+        self.argument = Argument()
+        self.body = _node(function(self.argument))
+
+
+class Range(Expr):
+    def __init__(self, start: Any, stop: Any) -> None:
+        super().__init__()
+        self.start, self.stop = _node(start), _node(stop)
+
+
+class Sum(Expr):
+    def __init__(self, over: Range, function: Lambda) -> None:
+        super().__init__()
+        self.over, self.function = over, function
+
+    def evaluate(self, env: dict) -> Any:
+        start, stop = self.over.start.evaluate(env), self.over.stop.evaluate(env)
+        body, argument = self.function.body, self.function.argument
+        return sum(body.evaluate({**env, argument: k}) for k in range(start, stop))
+
+
+class At(Expr):
+    def __init__(self, array: Array, index: Any) -> None:
+        super().__init__()
+        self.array, self.index = array, _node(index)
+
+    def evaluate(self, env: dict) -> Any:
+        return self.array.items[int(self.index.evaluate(env))].evaluate(env)
+
+
+class HxModel:
+    def __init__(self) -> None:
+        self.decisions: list[Decision] = []
+        self.constraints: list[Expr] = []
+        self.objective: Expr | None = None
+        self.closed = False
+
+    def float(self, lower: float, upper: float) -> Decision:
+        decision = Decision(lower, upper)
+        self.decisions.append(decision)
+        return decision
+
+    def array(self, items: list) -> Array:
+        return Array(items)
+
+    def at(self, array: Array, index: Any) -> At:
+        return At(array, index)
+
+    def iif(self, condition: Any, if_true: Any, if_false: Any) -> Op:
+        return Op(lambda c, a, b: a if c else b, condition, if_true, if_false)
+
+    def range(self, start: Any, stop: Any) -> Range:
+        return Range(start, stop)
+
+    def lambda_function(self, function: Any) -> Lambda:
+        return Lambda(function)
+
+    def sum(self, over: Range, function: Lambda) -> Sum:
+        return Sum(over, function)
+
+    def constraint(self, expr: Expr) -> None:
+        self.constraints.append(expr)
+
+    def minimize(self, expr: Expr) -> None:
+        self.objective = expr
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class HexalyOptimizer:
+    # values given to the decisions by solve(), in creation order
+    assignment: list[float] = []
+    # status reported instead of FEASIBLE, e.g. OPTIMAL
+    status: HxSolutionStatus | None = None
+    # the last optimizer created, for inspection
+    last: "HexalyOptimizer | None" = None
+
+    def __init__(self) -> None:
+        self.model = HxModel()
+        self.param = SimpleNamespace()
+        self.solution = SimpleNamespace(status=HxSolutionStatus.INFEASIBLE)
+        self.statistics = SimpleNamespace(running_time=0, nb_iterations=0)
+        self.callbacks: list[tuple[HxCallbackType, Any]] = []
+        HexalyOptimizer.last = self
+
+    def __enter__(self) -> "HexalyOptimizer":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        pass
+
+    def add_callback(self, callback_type: HxCallbackType, callback: Any) -> None:
+        self.callbacks.append((callback_type, callback))
+
+    def solve(self) -> None:
+        assert self.model.closed
+        for decision, value in zip(self.model.decisions, self.assignment):
+            assert decision.lower <= value <= decision.upper
+            decision.assigned = value
+        feasible = all(c.value for c in self.model.constraints)
+        self.solution.status = (
+            (self.status or HxSolutionStatus.FEASIBLE)
+            if feasible
+            else HxSolutionStatus.INFEASIBLE
+        )
+        self.statistics.running_time = 1
+        self.statistics.nb_iterations = 1000
+        for callback_type, callback in self.callbacks:
+            if callback_type == HxCallbackType.TIME_TICKED:
+                callback(self, callback_type)
+
+
+def install(monkeypatch: Any) -> types.ModuleType:
+    """
+    Make `import hexaly.optimizer` load this module, for the test's duration.
+    """
+    module = sys.modules[__name__]
+    package = types.ModuleType("hexaly")
+    package.optimizer = module
+    monkeypatch.setitem(sys.modules, "hexaly", package)
+    monkeypatch.setitem(sys.modules, "hexaly.optimizer", module)
+    monkeypatch.setattr(HexalyOptimizer, "assignment", [])
+    monkeypatch.setattr(HexalyOptimizer, "status", None)
+    return module
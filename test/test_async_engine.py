@@ -0,0 +1,178 @@
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from transport.context import ModelData
+from transport.engine import AsyncEngine, Engine, SolveEvent
+from transport.factory import ModelDataFactory
+
+PATH = Path(__file__).parent
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="the fake cbc is a shell script"
+)
+
+
+class TestAsyncEngine:
+    @pytest.fixture
+    def model_data(self) -> ModelData:
+        return ModelDataFactory.from_json(
+            PATH / "data/test_engine/test_engine_objective.json"
+        )
+
+    @pytest.fixture
+    def fake_cbc(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+        """
+        Put the fake cbc first on PATH; returns the file it logs to
+        """
+        executable = tmp_path / "bin" / "cbc"
+        executable.parent.mkdir()
+        executable.write_text(
+            f'#!/bin/sh\nexec "{sys.executable}" "{PATH / "fake_cbc.py"}" "$@"\n'
+        )
+        executable.chmod(0o755)
+        monkeypatch.setenv(
+            "PATH", f"{executable.parent}{os.pathsep}{os.environ['PATH']}"
+        )
+        log = tmp_path / "cbc.log"
+        monkeypatch.setenv("FAKE_CBC_LOG", str(log))
+        return log
+
+    @staticmethod
+    async def collect(job: AsyncEngine) -> tuple[list[SolveEvent], object]:
+        """
+        Events and result (or exception) of the job
+        """
+        task = asyncio.create_task(job.run())
+        events = [event async for event in job.events()]
+        try:
+            return events, await task
+        except BaseException as error:
+            return events, error
+
+    def test_run_async(self, model_data: ModelData) -> None:
+        """
+        Test that a job gives the result of Engine.run and reports its
+        progress, and that run_async is the shortcut.
+        """
+        expected = Engine(model_data, "cbc").run()
+        results = []
+        job = AsyncEngine(Engine(model_data, "cbc", hooks=[results.append]))
+
+        events, result = asyncio.run(self.collect(job))
+
+        assert result == expected
+        assert results == [result]
+        assert [e.kind for e in events[:2]] == ["queued", "started"]
+        assert {e.phase for e in events if e.kind == "phase"} == {
+            "build",
+            "solve",
+            "extract",
+        }
+        assert events[-1].kind == "done" and events[-1].result is result
+        assert [e.elapsed for e in events] == sorted(e.elapsed for e in events)
+
+        result = asyncio.run(Engine(model_data, "network_flow").run_async())
+        assert result.objective == pytest.approx(expected.objective)
+
+    def test_cancel_kills_solver(
+        self, model_data: ModelData, fake_cbc: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Test that cancelling a job kills its solver subprocess.
+        """
+        monkeypatch.setenv("FAKE_CBC_SECONDS", "60")
+
+        async def cancel() -> list[SolveEvent]:
+            job = AsyncEngine(Engine(model_data, "cbc_lp"))
+            run = asyncio.create_task(job.run())
+            while not fake_cbc.exists():  # the solver is running
+                await asyncio.sleep(0.05)
+            run.cancel()
+            events = [event async for event in job.events()]
+            with pytest.raises(asyncio.CancelledError):
+                await run
+            return events
+
+        start = time.perf_counter()
+        events = asyncio.run(cancel())
+
+        assert events[-1].kind == "cancelled"
+        assert time.perf_counter() - start < 30
+        pid = int(fake_cbc.read_text().split()[0])
+        assert not self.running(pid)
+
+    def test_timeout(
+        self, model_data: ModelData, fake_cbc: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setenv("FAKE_CBC_SECONDS", "60")
+        job = AsyncEngine(Engine(model_data, "cbc_lp"), timeout=2.0)
+
+        events, error = asyncio.run(self.collect(job))
+
+        assert isinstance(error, TimeoutError)
+        assert events[-1].kind == "timeout"
+        pid = int(fake_cbc.read_text().split()[0])
+        assert not self.running(pid)
+
+    def test_limit(
+        self, model_data: ModelData, fake_cbc: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Test that jobs sharing a semaphore never solve at the same time.
+        """
+        monkeypatch.setenv("FAKE_CBC_SECONDS", "0.3")
+
+        async def solve_all() -> list:
+            limit = asyncio.Semaphore(1)
+            return await asyncio.gather(
+                *(Engine(model_data, "cbc_lp").run_async(limit=limit) for _ in range(3))
+            )
+
+        results = asyncio.run(solve_all())
+
+        assert [r.status for r in results] == ["optimal"] * 3
+        times = {}
+        for line in fake_cbc.read_text().splitlines():
+            pid, kind, at = line.split()
+            times.setdefault(pid, {})[kind] = float(at)
+        runs = sorted((t["start"], t["end"]) for t in times.values())
+        assert len(runs) == 3
+        assert all(end <= start for (_, end), (start, _) in zip(runs, runs[1:]))
+
+    def test_failure(
+        self, model_data: ModelData, fake_cbc: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setenv("FAKE_CBC_EXIT", "3")
+        job = AsyncEngine(Engine(model_data, "cbc_lp"))
+
+        events, error = asyncio.run(self.collect(job))
+
+        assert isinstance(error, RuntimeError)
+        assert "exit code 3" in str(error)
+        assert events[-1].kind == "failed" and events[-1].error is error
+
+    @staticmethod
+    def running(pid: int) -> bool:
+        """
+        Whether pid is a live process (a zombie waiting for its parent is not)
+        """
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return False
+            try:
+                with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+                    state = f.read().rsplit(")", 1)[1].split()[0]
+            except FileNotFoundError:
+                return False
+            if state in ("Z", "X"):
+                return False
+            time.sleep(0.1)
+        return True
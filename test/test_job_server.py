@@ -0,0 +1,139 @@
+import importlib.util
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from transport.engine import Engine, JobQueue
+from transport.factory import ModelDataFactory
+from transport.factory.model_data_converter import Converter
+from transport.factory.types import DataDict
+from transport.job_server import JobServer, serve
+
+PATH = Path(__file__).parent
+
+
+class TestJobServer:
+    @pytest.fixture
+    def data(self) -> DataDict:
+        return Converter.from_json(PATH / "data/test_engine/test_engine_objective.json")
+
+    @staticmethod
+    def request(url: str, body: dict | None = None) -> tuple[int, bytes]:
+        content = None if body is None else json.dumps(body).encode()
+        try:
+            with urllib.request.urlopen(url, content, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+    def test_queue(self, data: DataDict, tmp_path: Path) -> None:
+        """
+        Test that identical jobs in flight are deduplicated, that jobs are
+        claimed oldest first, and that running jobs are queued again when
+        the queue is reopened.
+        """
+        queue = JobQueue(tmp_path / "jobs.sqlite")
+        first, deduplicated = queue.submit(data)
+        assert not deduplicated
+        assert queue.submit(data) == (first, True)
+        second, deduplicated = queue.submit(data, {"engine_type": "heuristic"})
+        assert not deduplicated
+
+        job, claimed = queue.claim()
+        assert (job.id, job.status, claimed) == (first.id, "running", data)
+        assert queue.submit(data)[0].id == first.id
+        queue.complete(first.id, Engine(ModelDataFactory.from_dict(data), "cbc").run())
+        assert queue.submit(data)[1] is False  # done: not in flight anymore
+
+        assert queue.claim()[0].id == second.id
+        queue.close()
+
+        queue = JobQueue(tmp_path / "jobs.sqlite")
+        assert queue.requeue_running() == 1
+        metrics = queue.metrics()
+        assert (metrics.depth, metrics.running, metrics.done) == (2, 0, 1)
+        assert metrics.run["p50"] >= 0
+        assert queue.get(first.id).result.status == "optimal"
+
+    def test_errors(self, data: DataDict) -> None:
+        """
+        Test that invalid data, unknown arguments and options EngineConfig
+        rejects are rejected on submission.
+        """
+        queue = JobQueue()
+        data["routes"][0]["origin"] = "unknown"
+        with pytest.raises(ValueError):
+            queue.submit(data)
+        with pytest.raises(ValueError, match="job arguments"):
+            queue.submit(data, {"hooks": []})
+        with pytest.raises(ValueError, match="engine_type"):
+            queue.submit(data, {"engine_type": "unknown"})
+        with pytest.raises(ValueError, match="regions"):
+            queue.submit(data, {"regions": {"c1": "north"}})
+        for wrong in ([], {"workshops": "x"}, {"clients": [["c1", 10.0]]}):
+            with pytest.raises(ValueError, match="can only be"):
+                queue.submit(wrong)
+        assert queue.metrics().depth == 0
+
+    def test_http(self, data: DataDict) -> None:
+        """
+        Test a job submitted over HTTP: its result equals Engine.run's, it
+        can be waited for and streamed, and it shows in the metrics.
+        """
+        expected = Engine(ModelDataFactory.from_dict(data), "cbc").run()
+        with JobServer(JobQueue(), workers=1) as jobs:
+            server = serve(jobs, port=0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            try:
+                status, body = self.request(f"{url}/jobs", {"data": data})
+                assert status == 202
+                job_id = json.loads(body)["id"]
+
+                status, body = self.request(f"{url}/jobs/{job_id}/events")
+                events = [json.loads(line) for line in body.splitlines()]
+                assert events[-1]["status"] == "done"
+
+                status, body = self.request(f"{url}/jobs/{job_id}?wait=10")
+                job = json.loads(body)
+                assert job["result"]["status"] == expected.status
+                assert job["result"]["objective"] == pytest.approx(expected.objective)
+                assert job["result"]["transport_quantity"] == pytest.approx(
+                    expected.transport_quantity
+                )
+
+                # a bare DataDict is solved with cbc: the same job, not in flight
+                status, body = self.request(f"{url}/jobs", data)
+                assert json.loads(body)["deduplicated"] is False
+                assert jobs.wait(json.loads(body)["id"], 60).status == "done"
+
+                status, body = self.request(f"{url}/metrics")
+                metrics = json.loads(body)
+                assert metrics["depth"] == 0
+                assert (metrics["done"], metrics["workers"]) == (2, 1)
+
+                assert self.request(f"{url}/jobs/unknown")[0] == 404
+                assert self.request(f"{url}/jobs", {"routes": []})[0] == 400
+                status, body = self.request(f"{url}/jobs", {"data": []})
+                assert status == 400
+                assert "can only be" in json.loads(body)["error"]
+            finally:
+                server.shutdown()
+                server.server_close()
+
+    def test_failure(self, data: DataDict) -> None:
+        """
+        Test that a job whose Engine raises fails with the error: hexaly,
+        without its package.
+        """
+        if importlib.util.find_spec("hexaly") is not None:
+            pytest.skip("hexaly is installed")
+        with JobServer(JobQueue(), workers=1) as jobs:
+            job, _ = jobs.submit(data, {"engine_type": "hexaly"})
+            job = jobs.wait(job.id, 60)
+        assert job.status == "failed"
+        assert "hexaly" in job.error
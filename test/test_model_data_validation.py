@@ -1,9 +1,10 @@
+import json
 from pathlib import Path
 
 from pydantic import ValidationError
 import pytest
 
-from transport.context import ModelData
+from transport.context import ModelData, ModelDataValidationError
 from transport.factory import ModelDataFactory
 
 
@@ -40,3 +41,102 @@ class TestValidationRoute:
         """Test route validation - add specific test case"""
         # This would need actual invalid route data to test
         pass
+
+
+class TestBulkValidation:
+    """Test that bulk validation reports every violation at once"""
+
+    PATH_DATA = PATH / "data" / "test_model_data_validation"
+
+    def test_client_messages(self):
+        """Test that the messages are those of the object validators"""
+        file = self.PATH_DATA / "test_model_data_validation_client.json"
+        with pytest.raises(ValidationError) as object_info:
+            ModelDataFactory.from_json(file)
+        with pytest.raises(ModelDataValidationError) as bulk_info:
+            ModelDataFactory.from_json(file, bulk_validation=True)
+
+        errors = bulk_info.value.errors
+        assert errors[0] in str(object_info.value)
+        assert errors == [
+            "Value -5.0 is below minimum range 0.0 for object Client[Client2]",
+            "Referential integrity error: "
+            "unknown client ids in routes.destination: ['Client3']",
+        ]
+
+    def test_route_all_violations(self):
+        """Test that every bad route is reported, not only the first one"""
+        with pytest.raises(ModelDataValidationError) as exc_info:
+            ModelDataFactory.from_json(
+                self.PATH_DATA / "test_model_data_validation_route.json",
+                bulk_validation=True,
+            )
+
+        errors = exc_info.value.errors
+        assert "Route.destination cannot be empty" in errors
+        assert (
+            "Value -1.0 is below minimum range 0.0 for object Route[Workshop2,Client1]"
+            in errors
+        )
+        assert (
+            "Value -1.0 is below minimum range 0.0 for object Route[Workshop2,Client2]"
+            in errors
+        )
+        assert f"{len(errors)} validation errors for ModelData" in str(exc_info.value)
+
+    def test_unreadable_values(self):
+        """Test that values that are not numbers are reported with the rest"""
+        data = {
+            "workshops": [
+                {"id": "Workshop1", "production_capacity": "lots", "production_cost": 1.0}
+            ],
+            "clients": [{"id": "Client1", "demand": -2.0}],
+            "routes": [
+                {
+                    "origin": "Workshop1",
+                    "destination": "Client1",
+                    "transport_cost": 1.0,
+                    "transport_capacity": 10.0,
+                }
+            ],
+        }
+        with pytest.raises(ModelDataValidationError) as exc_info:
+            ModelDataFactory.from_dict(data, bulk_validation=True)
+
+        assert exc_info.value.errors == [
+            "workshops[0].production_capacity is not a number: 'lots'",
+            "routes[0].min_transport_quantity is missing",
+            "Value -2.0 is below minimum range 0.0 for object Client[Client1]",
+        ]
+
+    @pytest.mark.parametrize("stream", [True, False])
+    def test_ids_not_strings(self, tmp_path, stream):
+        """Test that ids that are not strings are rejected, as by the models"""
+        data = {
+            "workshops": [
+                {"id": 1, "production_capacity": 10.0, "production_cost": 1.0}
+            ],
+            "clients": [{"id": "Client1", "demand": 2.0}],
+            "routes": [
+                {
+                    "origin": 1,
+                    "destination": "Client1",
+                    "transport_cost": 1.0,
+                    "transport_capacity": 10.0,
+                    "min_transport_quantity": 0.0,
+                }
+            ],
+        }
+        file = tmp_path / "network.json"
+        file.write_text(json.dumps(data))
+        with pytest.raises(ValidationError):
+            ModelDataFactory.from_dict(data)
+        with pytest.raises(ModelDataValidationError) as exc_info:
+            ModelDataFactory.columnar_from_json(file, stream=stream)
+
+        assert exc_info.value.errors[:2] == [
+            "workshops[0].id must be a string, not 1",
+            "routes[0].origin must be a string, not 1",
+        ]
+        with pytest.raises(ModelDataValidationError, match="must be a string"):
+            ModelDataFactory.from_json(file, bulk_validation=True)
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from transport.context import ModelData
+from transport.engine import Engine, Scenario, ScenarioBatch
+from transport.factory import ModelDataFactory
+
+PATH = Path(__file__).parent
+
+
+class TestScenarioBatch:
+    def create_model_data(self) -> ModelData:
+        return ModelDataFactory.from_json(
+            PATH / "data/test_engine/test_engine_objective.json"
+        )
+
+    @pytest.mark.parametrize("engine_type", ["cbc", "cbc_lp"])
+    def test_scenario_batch(self, engine_type: str) -> None:
+        """
+        Test that every scenario is solved on the base data plus its own
+        delta only, whatever the worker solved before.
+        """
+        scenarios = [
+            Scenario(name="base"),
+            Scenario(name="expensive_w1", transport_cost={"Workshop1,Client1": 30.0}),
+            Scenario(name="high_demand", client_demand={"Client1": 150.0}),
+            Scenario(name="base_again"),
+        ]
+        batch = ScenarioBatch(
+            self.create_model_data(),
+            scenarios,
+            engine_type=engine_type,
+            max_workers=1,
+            solver_threads=1,
+        )
+        results = {r.scenario: r.result for r in batch.run()}
+
+        for scenario in scenarios:
+            model_data = self.create_model_data()
+            model_data.update_values(
+                client_demand=scenario.client_demand,
+                transport_cost=scenario.transport_cost,
+            )
+            expected = Engine(model_data, engine_type).run()
+            assert results[scenario.name].status == expected.status
+            assert results[scenario.name].objective == pytest.approx(expected.objective)
+
+    def test_scenario_batch_summary(self) -> None:
+        scenarios = [
+            Scenario(name="base"),
+            Scenario(name="unknown_client", client_demand={"ClientX": 1.0}),
+        ]
+        summary = ScenarioBatch(
+            self.create_model_data(), scenarios, max_workers=2
+        ).run_all()
+
+        assert list(summary["scenario"]) == ["base", "unknown_client"]
+        assert list(summary["status"]) == ["optimal", "error"]
+        assert summary["objective"][0] == pytest.approx(900.0)
+        assert "Unknown client id: ClientX" in summary["error"][1]
+
+    def test_scenario_batch_solver_threads(self) -> None:
+        """
+        Test that solver_threads takes the option name of the backend.
+        """
+
+        def options(engine_type: str) -> dict:
+            return ScenarioBatch(
+                self.create_model_data(), [], engine_type, solver_threads=2
+            )._solver_options()
+
+        assert options("cbc_lp") == {"threads": 2}
+        assert options("gurobi") == {"Threads": 2}
+        assert options("hexaly") == {"nb_threads": 2}
+        with pytest.raises(ValueError, match="solver_threads"):
+            options("heuristic")